@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from dagster_utils.lib import (
+    PubChemReturnParameters,
+    UtilsGMailClient,
+    UtilspCloudClient,
+    UtilsPubChemClient,
+    _google_auth,
+)
+from dagster_utils.testing import use_cassette
+
+from .conftest import CASSETTES_DIR
+
+# Simulated network conditions of the recorded traffic
+LATENCIES = [0.0, 0.02]
+BANDWIDTH = 10 * 1024 * 1024
+
+
+@pytest.fixture(autouse=True)
+def clear_google_tokens():
+    _google_auth.clear_google_token_managers()
+
+
+@pytest.mark.parametrize("latency", LATENCIES)
+def test_pcloud_read_files(benchmark, mock_fetch_auth, latency):
+    client = UtilspCloudClient()
+
+    with use_cassette(
+        os.path.join(CASSETTES_DIR, "pcloud.json"),
+        latency=latency,
+        bandwidth=BANDWIDTH,
+    ):
+        benchmark(client.read_files_by_id, ["some_id"] * 10)
+
+
+@pytest.mark.parametrize("latency", LATENCIES)
+def test_gmail_extract_attachments(benchmark, mock_fetch_auth, latency):
+    client = UtilsGMailClient()
+
+    with use_cassette(
+        os.path.join(CASSETTES_DIR, "google.json"),
+        latency=latency,
+        bandwidth=BANDWIDTH,
+    ):
+        client.setup_for_execution(None)
+        benchmark(
+            client.fetch, {"function": {"name": "extract_attachments", "args": {}}}
+        )
+
+
+@pytest.mark.parametrize("latency", LATENCIES)
+def test_pubchem_fetch_compounds(benchmark, latency):
+    client = UtilsPubChemClient()
+    return_parameters = [
+        PubChemReturnParameters(label="Molecular Weight", alias="molecular_weight"),
+        PubChemReturnParameters(label="Molecular Formula", alias="molecular_formula"),
+        PubChemReturnParameters(label="InChI", alias="inchi"),
+    ]
+
+    with use_cassette(
+        os.path.join(CASSETTES_DIR, "pubchem.json"),
+        latency=latency,
+        bandwidth=BANDWIDTH,
+    ):
+        benchmark(client.fetch_compounds_by_name, ["glucose"] * 20, return_parameters)
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from dagster_utils.dagsterhub import dbt_manifest, generate_dbt_downstream_asset_sensors
+
+SOURCE_COUNTS = [50, 300, 1000]
+# Nodes make up the bulk of a real manifest but are skipped by the index
+NODES_PER_SOURCE = 10
+
+
+def _synthetic_manifest(sources: int) -> dict:
+    manifest = {"metadata": {"dbt_version": "1.5.0"}, "nodes": {}, "sources": {}}
+    child_map = {}
+    for i in range(sources):
+        source_id = f"source.dp.src_landing.src_table_{i}"
+        manifest["sources"][source_id] = {
+            "source_name": "src_landing",
+            "schema": "landing",
+            "name": f"src_table_{i}",
+            "columns": {f"col_{c}": {"description": "x" * 200} for c in range(20)},
+        }
+        children = []
+        for n in range(NODES_PER_SOURCE):
+            node_id = f"model.dp.model_{i}_{n}"
+            manifest["nodes"][node_id] = {
+                "name": f"model_{i}_{n}",
+                "raw_code": "select * from source" * 50,
+                "columns": {f"col_{c}": {"description": "x" * 200} for c in range(20)},
+            }
+            children.append(node_id)
+        child_map[source_id] = children
+    manifest["child_map"] = child_map
+    return manifest
+
+
+@pytest.fixture(params=SOURCE_COUNTS)
+def dbt_project(request, tmp_path, monkeypatch):
+    target = tmp_path / "dp_dbthub" / "bench_project" / "target"
+    target.mkdir(parents=True)
+    (target / "manifest.json").write_text(
+        json.dumps(_synthetic_manifest(request.param))
+    )
+    monkeypatch.chdir(tmp_path)
+    yield target
+
+
+@pytest.mark.parametrize("parser", ["json", "ijson"])
+def test_manifest_index_cold(benchmark, dbt_project, monkeypatch, parser):
+    if parser == "json":
+        monkeypatch.setattr(dbt_manifest, "ijson", None)
+    elif dbt_manifest.ijson is None:
+        pytest.skip("ijson not installed")
+
+    manifest_path = str(dbt_project / "manifest.json")
+    cache_path = dbt_project / "manifest_index.pickle"
+
+    def load_cold():
+        cache_path.unlink(missing_ok=True)
+        return dbt_manifest.load_dbt_manifest_index(manifest_path)
+
+    benchmark(load_cold)
+
+
+def test_manifest_index_warm(benchmark, dbt_project):
+    manifest_path = str(dbt_project / "manifest.json")
+    dbt_manifest.load_dbt_manifest_index(manifest_path)
+
+    benchmark(dbt_manifest.load_dbt_manifest_index, manifest_path)
+
+
+def test_generate_dbt_downstream_asset_sensors(benchmark, dbt_project):
+    generate_dbt_downstream_asset_sensors("bench_project")
+
+    benchmark(generate_dbt_downstream_asset_sensors, "bench_project")
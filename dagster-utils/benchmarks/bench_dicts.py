@@ -0,0 +1,59 @@
+import pytest
+
+from dagster_utils.utils import build_dict_from_nested_properties, safeget
+from dagster_utils.utils.dicts import compile_path, compile_paths, extract_columns
+
+RECORD_COUNTS = [1_000, 1_000_000]
+
+# Shaped like the Gmail message parts, with a tenth of them missing the nested key
+INFO_LOCATION = {
+    "attachment_id": ["body", "attachmentId"],
+    "size": ["body", "size"],
+    "filename": ["filename"],
+    "mime_type": ["headers", 0, "value"],
+}
+
+
+def _records(count: int) -> list[dict]:
+    return [
+        {
+            "filename": f"file_{i}.csv",
+            "body": {"size": i} if i % 10 == 0 else {"attachmentId": str(i), "size": i},
+            "headers": [{"name": "Content-Type", "value": "text/csv"}],
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture(scope="module", params=RECORD_COUNTS)
+def records(request):
+    return _records(request.param)
+
+
+def test_safeget(benchmark, records):
+    res = benchmark(lambda: [safeget(r, "body", "attachmentId") for r in records])
+    assert res[1] == "1"
+
+
+def test_compile_path(benchmark, records):
+    getter = compile_path("body", "attachmentId")
+    res = benchmark(lambda: [getter(r) for r in records])
+    assert res[1] == "1"
+
+
+def test_build_dict_from_nested_properties(benchmark, records):
+    res = benchmark(
+        lambda: [build_dict_from_nested_properties(r, INFO_LOCATION) for r in records]
+    )
+    assert res[0]["attachment_id"] is None
+
+
+def test_compile_paths(benchmark, records):
+    build = compile_paths(INFO_LOCATION)
+    res = benchmark(lambda: [build(r) for r in records])
+    assert res[0]["attachment_id"] is None
+
+
+def test_extract_columns(benchmark, records):
+    res = benchmark(extract_columns, records, INFO_LOCATION)
+    assert len(res["filename"]) == len(records)
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+from dagster import build_op_context
+
+from dagster_utils.dagsterhub import csv_to_utilssinkinput
+from dagster_utils.lib import UtilsFileSystemOutputType, frame_num_rows
+
+ROW_COUNTS = [1_000, 100_000, 1_000_000]
+
+
+def _csv_file(rows: int) -> UtilsFileSystemOutputType:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "id": np.arange(rows),
+            "value": rng.random(rows),
+            "label": rng.choice(["foo", "bar", "baz", "qux"], rows),
+        }
+    )
+    return UtilsFileSystemOutputType(
+        filename="bench.csv", content=df.to_csv(index=False).encode("utf-8")
+    )
+
+
+@pytest.mark.parametrize("frame_type", ["pandas", "arrow"])
+@pytest.mark.parametrize("rows", ROW_COUNTS)
+def test_csv_to_utilssinkinput(benchmark, rows, frame_type):
+    csv_obj = _csv_file(rows)
+    context = build_op_context(
+        config={"dest_asset": "bench_asset", "frame_type": frame_type}
+    )
+
+    res = benchmark(csv_to_utilssinkinput, context, csv_obj=csv_obj)
+    assert frame_num_rows(res.data) == rows
@@ -0,0 +1,99 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from dagster import DagsterType, build_input_context, build_output_context
+
+from dagster_utils.dagsterhub import UtilsS3IOManager
+from dagster_utils.lib import (
+    StubSnowflakeClient,
+    UtilsSinkInputType,
+    from_arrow_table,
+    to_arrow_table,
+)
+
+from .conftest import PAYLOAD_SIZES, payload_id
+
+ROW_COUNTS = [1_000, 100_000, 1_000_000]
+
+
+def _io_manager(bucket):
+    return UtilsS3IOManager(bucket=bucket, utils_snow=StubSnowflakeClient())
+
+
+def _contexts(**output_kwargs):
+    out_context = build_output_context(name="result", step_key="bench", **output_kwargs)
+    in_context = build_input_context(
+        upstream_output=out_context,
+        dagster_type=DagsterType(type_check_fn=lambda _, x: True, name="bench_type"),
+    )
+    return out_context, in_context
+
+
+def _sink_df(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "id": np.arange(rows),
+            "value": rng.random(rows),
+            "label": rng.choice(["foo", "bar", "baz", "qux"], rows),
+            "created_at": pd.Timestamp("2023-01-01")
+            + pd.to_timedelta(np.arange(rows), unit="s"),
+        }
+    )
+
+
+@pytest.mark.parametrize("size", PAYLOAD_SIZES, ids=payload_id)
+def test_handle_output(benchmark, s3_bucket, size):
+    manager = _io_manager(s3_bucket)
+    out_context, _ = _contexts()
+    payload = os.urandom(size)
+
+    benchmark.pedantic(
+        lambda: list(manager.handle_output(out_context, payload)),
+        rounds=3,
+        iterations=1,
+    )
+
+
+@pytest.mark.parametrize("size", PAYLOAD_SIZES, ids=payload_id)
+def test_load_input(benchmark, s3_bucket, size):
+    manager = _io_manager(s3_bucket)
+    out_context, in_context = _contexts()
+    payload = os.urandom(size)
+    list(manager.handle_output(out_context, payload))
+
+    res = benchmark.pedantic(
+        lambda: manager.load_input(in_context), rounds=3, iterations=1
+    )
+    assert len(res) == size
+
+
+@pytest.mark.parametrize("rows", ROW_COUNTS)
+def test_handle_output_sink_input(benchmark, s3_bucket, rows):
+    manager = _io_manager(s3_bucket)
+    out_context, _ = _contexts(asset_key="bench_asset")
+    obj = UtilsSinkInputType(
+        dest_asset="bench_asset", load_to_snow=True, data=_sink_df(rows)
+    )
+
+    benchmark.pedantic(
+        lambda: list(manager.handle_output(out_context, obj)),
+        rounds=3,
+        iterations=1,
+    )
+
+
+@pytest.mark.parametrize("frame_type", ["pandas", "arrow"])
+@pytest.mark.parametrize("rows", ROW_COUNTS)
+def test_upload_df(benchmark, s3_bucket, rows, frame_type):
+    manager = _io_manager(s3_bucket)
+    data = from_arrow_table(to_arrow_table(_sink_df(rows)), frame_type)
+    obj = UtilsSinkInputType(dest_asset="bench_asset", data=data)
+
+    benchmark.pedantic(
+        lambda: manager._upload_df(obj.data, "bench/bench_asset"),
+        rounds=3,
+        iterations=1,
+    )
@@ -0,0 +1,55 @@
+import os
+
+import boto3
+import pytest
+from moto import mock_s3
+
+KB = 1024
+MB = 1024 * KB
+GB = 1024 * MB
+
+# 1 GB payloads take a while and need a few GB of RAM, so they are opt-in
+PAYLOAD_SIZES = [KB, MB, 100 * MB] + ([GB] if os.getenv("BENCH_LARGE") else [])
+
+CASSETTES_DIR = os.path.join(
+    os.path.dirname(__file__), "..", "dagster_utils_tests", "lib", "_cassettes"
+)
+
+
+def payload_id(size: int) -> str:
+    for unit, name in ((GB, "GB"), (MB, "MB"), (KB, "KB")):
+        if size >= unit:
+            return f"{size // unit}{name}"
+    return f"{size}B"
+
+
+@pytest.fixture(autouse=True)
+def aws_creds(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    monkeypatch.setenv("AWS_SECURITY_TOKEN", "testing")
+    monkeypatch.setenv("AWS_SESSION_TOKEN", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "eu-central-1")
+    # Newer botocore sends streaming uploads with aws-chunked checksums, which moto can't read
+    monkeypatch.setenv("AWS_REQUEST_CHECKSUM_CALCULATION", "when_required")
+
+
+@pytest.fixture
+def s3_bucket():
+    with mock_s3():
+        client = boto3.resource("s3").meta.client
+        client.create_bucket(
+            Bucket="bench-bucket",
+            CreateBucketConfiguration={"LocationConstraint": "eu-central-1"},
+        )
+        yield "bench-bucket"
+
+
+@pytest.fixture
+def mock_fetch_auth(monkeypatch):
+    from dagster_utils import utils
+
+    monkeypatch.setattr(
+        utils, "fetch_authentication", lambda *args, **kwargs: {"access_token": ""}
+    )
+    monkeypatch.setattr(utils, "prefetch_registered_authentication", lambda auth: None)
@@ -1,6 +1,49 @@
-from .asset_job_factory import *
-from .ops import *
-from .partitions import *
-from .s3_io_manager import *
-from .slack_sensor import *
-from .sqs_email_sensor import *
+# Definitions are imported on first access rather than with the package, so e.g. building a
+# sensor doesn't import the IO manager's warehouse dependencies, nor dagster_slack
+import importlib
+
+_LAZY_IMPORTS = {
+    "generate_asset_and_job_from_graph": ".asset_job_factory",
+    "generate_dbt_downstream_asset_sensors": ".asset_job_factory",
+    "MANIFEST_INDEX_FILENAME": ".dbt_manifest",
+    "MANIFEST_INDEX_VERSION": ".dbt_manifest",
+    "SOURCE_FIELDS": ".dbt_manifest",
+    "load_dbt_manifest_index": ".dbt_manifest",
+    "CSVToSinkInputConfig": ".ops",
+    "WebAPIOutputToSinkInputConfig": ".ops",
+    "add_or_delete_dynamic_partitions": ".ops",
+    "add_or_delete_dynamic_partitions_job": ".ops",
+    "SyncDynamicPartitionsConfig": ".ops",
+    "sync_dynamic_partitions_op": ".ops",
+    "csv_to_utilssinkinput": ".ops",
+    "webapioutput_to_sinkinput": ".ops",
+    "DYNAMIC_PARTITIONS_BATCH_SIZE": ".partitions",
+    "QuarterlyPartitionsDefinition": ".partitions",
+    "add_dynamic_partitions": ".partitions",
+    "delete_dynamic_partitions": ".partitions",
+    "sync_dynamic_partitions": ".partitions",
+    "PICKLE_PROTOCOL": ".s3_io_manager",
+    "UtilsS3IOManager": ".s3_io_manager",
+    "sensor_status": ".slack_sensor",
+    "slack_message_fn": ".slack_sensor",
+    "slack_on_run_failure": ".slack_sensor",
+    "SQS_MAX_BATCH_SIZE": ".sqs_email_sensor",
+    "SQS_MESSAGE_GROUP_TAG": ".sqs_email_sensor",
+    "SQSSensorCursor": ".sqs_email_sensor",
+    "generate_sqs_sensor": ".sqs_email_sensor",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,64 @@
+import hashlib
+import pickle
+from typing import Optional
+
+import pandas as pd
+
+from dagster_utils.lib import UtilsSinkInputType
+
+# Stored as the `x-amz-meta-fingerprint` header of the pickled object. The version is bumped
+# whenever fingerprints stop being comparable with earlier ones
+FINGERPRINT_METADATA_KEY = "fingerprint"
+# Outputs loaded to Snowflake only get their fingerprint once the load is done, in a small
+# sidecar object next to the pickle, along with the ETag of the pickle it was computed for
+FINGERPRINT_SIDECAR_SUFFIX = ".fingerprint"
+FINGERPRINT_VERSION = "1"
+
+
+def _hasher():
+    return hashlib.blake2b(FINGERPRINT_VERSION.encode(), digest_size=16)
+
+
+def fingerprint_bytes(data: bytes) -> str:
+    h = _hasher()
+    h.update(data)
+    return h.hexdigest()
+
+
+def fingerprint_frame(df: pd.DataFrame) -> Optional[str]:
+    """Fingerprint of the frame's values, index, columns and dtypes, hashed without pickling.
+    None if some values can't be hashed, e.g. lists or dicts in object columns."""
+    h = _hasher()
+    try:
+        h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    except TypeError:
+        return None
+    h.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    return h.hexdigest()
+
+
+def fingerprint_object(obj) -> Optional[str]:
+    """Fingerprint of the pandas frame-holding outputs that can be hashed without pickling,
+    None for anything else, which is fingerprinted from its pickle instead."""
+    if not isinstance(obj, UtilsSinkInputType) or not isinstance(
+        obj.data, pd.DataFrame
+    ):
+        return None
+
+    frame_fingerprint = fingerprint_frame(obj.data)
+    if frame_fingerprint is None:
+        return None
+
+    h = _hasher()
+    h.update(frame_fingerprint.encode())
+    h.update(pickle.dumps((obj.dest_asset, obj.load_to_snow, obj.meta)))
+    return h.hexdigest()
+
+
+def fingerprint_load(fingerprint: str, load_config: dict) -> str:
+    """Fingerprint of an output loaded to Snowflake, also covering where and how it's loaded,
+    so that e.g. switching the landing table to typed columns loads unchanged outputs again."""
+    h = _hasher()
+    h.update(fingerprint.encode())
+    h.update(repr(sorted(load_config.items())).encode())
+    return h.hexdigest()
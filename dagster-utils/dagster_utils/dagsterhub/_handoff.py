@@ -0,0 +1,68 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+HANDOFF_MAX_BYTES = 256 * 1024**2
+
+_MISSING = object()
+
+
+class HandoffRegistry:
+    """Pickled objects handed over in memory between the steps of a run executing in one
+    process, keyed by run id and storage key.
+
+    Objects are kept pickled, so that each consumer unpickles its own copy and can mutate it
+    without affecting the producer or the other consumers. Once they hold more than
+    `max_bytes`, the least recently used ones are dropped, consumers then load them from
+    storage as usual.
+    """
+
+    def __init__(self, max_bytes: int = HANDOFF_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._objects = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def put(self, run_id: str, key: str, pickled: bytes) -> bool:
+        """Registers a pickled object, returns whether it fits in the registry at all."""
+        nbytes = len(pickled)
+        with self._lock:
+            self._pop((run_id, key))
+            if nbytes > self.max_bytes:
+                return False
+
+            self._objects[(run_id, key)] = (pickled, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                self._pop(next(iter(self._objects)))
+            return True
+
+    def get(self, run_id: str, key: str, default: Any = _MISSING) -> Any:
+        """Returns the registered pickle, or `default`. Raises KeyError without a default."""
+        with self._lock:
+            entry = self._objects.get((run_id, key))
+            if entry is None:
+                if default is _MISSING:
+                    raise KeyError((run_id, key))
+                return default
+            self._objects.move_to_end((run_id, key))
+            return entry[0]
+
+    def clear(self, run_id: Optional[str] = None) -> None:
+        """Drops every object, or only those of `run_id`."""
+        with self._lock:
+            for registry_key in list(self._objects):
+                if run_id is None or registry_key[0] == run_id:
+                    self._pop(registry_key)
+
+    def _pop(self, registry_key) -> None:
+        entry = self._objects.pop(registry_key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
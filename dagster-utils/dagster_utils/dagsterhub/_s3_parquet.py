@@ -0,0 +1,255 @@
+import io
+import re
+from typing import Iterable, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dagster import get_dagster_logger
+
+from dagster_utils.lib import frame_nbytes, frame_num_rows, get_s3_client
+from dagster_utils.utils import span
+
+logger = get_dagster_logger()
+
+MULTIPART_PART_SIZE = 16 * 1024**2
+# Snowflake loads files of 100-250 MB compressed most efficiently, and loads the files of a
+# single COPY in parallel
+PARQUET_MAX_FILE_BYTES = 250 * 1024**2
+PARQUET_ROW_GROUP_BYTES = 64 * 1024**2
+
+_REGEX_SPECIAL_CHARS = set(".^$*+?{}[]|()")
+
+
+class S3MultipartWriter(io.RawIOBase):
+    """Write-only file object uploading to S3 in parts as data is written, so the whole object
+    is never held in memory. Objects smaller than a single part are sent with one `put_object`.
+
+    Call `complete` to finish the upload, or `abort` to discard it.
+    """
+
+    def __init__(self, s3, bucket: str, key: str, part_size: int = MULTIPART_PART_SIZE):
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+
+        self._buffer = bytearray()
+        self._position = 0
+        self._upload_id = None
+        self._parts = []
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def write(self, b) -> int:
+        self._buffer += b
+        self._position += len(b)
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(self._buffer[: self.part_size])
+            del self._buffer[: self.part_size]
+        return len(b)
+
+    def complete(self) -> None:
+        if self._upload_id is None:
+            with span("S3 parquet upload", len(self._buffer)):
+                self.s3.put_object(
+                    Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer)
+                )
+        else:
+            if self._buffer:
+                self._upload_part(self._buffer)
+            self.s3.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+                MultipartUpload={"Parts": self._parts},
+            )
+        self._buffer = bytearray()
+        super().close()
+
+    def abort(self) -> None:
+        if self._upload_id is not None:
+            self.s3.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+            )
+        self._buffer = bytearray()
+        super().close()
+
+    def _upload_part(self, data) -> None:
+        if self._upload_id is None:
+            self._upload_id = self.s3.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key
+            )["UploadId"]
+
+        part_number = len(self._parts) + 1
+        with span("S3 parquet upload", len(data)):
+            res = self.s3.upload_part(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+                PartNumber=part_number,
+                Body=bytes(data),
+            )
+        self._parts.append({"ETag": res["ETag"], "PartNumber": part_number})
+
+
+def parquet_part_key(filekey: str, index: int) -> str:
+    """Key of the `index`-th file of a split parquet upload. The first file keeps the plain
+    `{filekey}.parquet` key, so unsplit uploads are stored where they always were."""
+    if index == 0:
+        return f"{filekey}.parquet"
+    return f"{filekey}.part-{index:05d}.parquet"
+
+
+def parquet_parts_pattern(filekey: str) -> str:
+    """Snowflake COPY `PATTERN` matching every file of a split parquet upload, and nothing
+    else: it is anchored to the exact key at both ends, like the keys of a `FILES` list.
+    Special characters are put in brackets rather than backslash-escaped, since backslashes
+    are also escapes in Snowflake string literals."""
+    escaped = "".join(f"[{c}]" if c in _REGEX_SPECIAL_CHARS else c for c in filekey)
+    return f"^{escaped}([.]part-[0-9]+)?[.]parquet$"
+
+
+def row_group_rows(df: Union[pd.DataFrame, pa.Table], row_group_bytes: int) -> int:
+    """Rows per row group so each group holds about `row_group_bytes` of in-memory data."""
+    num_rows = frame_num_rows(df)
+    if num_rows == 0:
+        return 1
+    row_bytes = max(1, frame_nbytes(df) // num_rows)
+    return max(1, row_group_bytes // row_bytes)
+
+
+def write_parquet_to_s3(
+    s3,
+    bucket: str,
+    filekey: str,
+    df: Union[pd.DataFrame, pa.Table],
+    row_group_bytes: int = PARQUET_ROW_GROUP_BYTES,
+    max_file_bytes: int = PARQUET_MAX_FILE_BYTES,
+    schema: Optional[pa.Schema] = None,
+) -> list[str]:
+    """Streams a pandas frame or Arrow table to S3 as parquet, one row group at a time,
+    starting a new file whenever the current one reaches `max_file_bytes`. Files left over
+    from an earlier, larger upload to the same key are deleted.
+
+    Returns:
+        list[str]: Keys of the written files, see `parquet_part_key`
+    """
+    rows = row_group_rows(df, row_group_bytes)
+    starts = range(0, max(frame_num_rows(df), 1), rows)
+    if isinstance(df, pa.Table):
+        # Slices share the table's buffers
+        schema = schema or df.schema
+        tables = (df.slice(start, rows) for start in starts)
+    else:
+        schema = schema or pa.Schema.from_pandas(df, preserve_index=False)
+        tables = (
+            pa.Table.from_pandas(
+                df.iloc[start : start + rows], schema=schema, preserve_index=False
+            )
+            for start in starts
+        )
+
+    keys, _ = write_parquet_tables_to_s3(
+        s3, bucket, filekey, tables, max_file_bytes=max_file_bytes, schema=schema
+    )
+    return keys
+
+
+def write_parquet_tables_to_s3(
+    s3,
+    bucket: str,
+    filekey: str,
+    tables: Iterable[pa.Table],
+    max_file_bytes: int = PARQUET_MAX_FILE_BYTES,
+    schema: Optional[pa.Schema] = None,
+) -> tuple[list[str], Optional[pa.Schema]]:
+    """Streams Arrow tables to S3 as parquet, one row group per table as they are produced,
+    like `write_parquet_to_s3`. Tables are cast to `schema`, which defaults to the schema of
+    the first table.
+
+    Returns:
+        tuple[list[str], Optional[pa.Schema]]: Keys of the written files, and their schema,
+            None if there were no tables to write
+    """
+    keys = []
+    sink, writer = None, None
+    try:
+        for table in tables:
+            if schema is None:
+                schema = table.schema
+            if writer is None:
+                sink = S3MultipartWriter(
+                    s3, bucket, parquet_part_key(filekey, len(keys))
+                )
+                writer = pq.ParquetWriter(sink, schema)
+
+            with span("Parquet encode") as s:
+                position = sink.tell()
+                writer.write_table(
+                    table if table.schema.equals(schema) else table.cast(schema)
+                )
+                s.bytes = sink.tell() - position
+
+            if sink.tell() >= max_file_bytes:
+                writer.close()
+                sink.complete()
+                keys.append(sink.key)
+                sink, writer = None, None
+
+        if writer is not None:
+            writer.close()
+            sink.complete()
+            keys.append(sink.key)
+            sink, writer = None, None
+    finally:
+        if sink is not None:
+            sink.abort()
+
+    _delete_stale_parts(s3, bucket, filekey, keys)
+    return keys, schema
+
+
+class S3ParquetChunks:
+    """Re-iterable chunks of a parquet upload, yielded as Arrow record batches. Each file is
+    downloaded whole, then read one row group at a time.
+
+    The S3 client isn't pickled, set `s3` after unpickling to use another one than the default.
+    """
+
+    def __init__(self, bucket: str, keys: list[str], s3=None):
+        self.bucket = bucket
+        self.keys = keys
+        self.s3 = s3
+
+    def __iter__(self):
+        if self.s3 is None:
+            self.s3 = get_s3_client()
+
+        for key in self.keys:
+            body = self.s3.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+            parquet_file = pq.ParquetFile(io.BytesIO(body))
+            for i in range(parquet_file.num_row_groups):
+                yield from parquet_file.read_row_group(i).to_batches()
+
+    def __getstate__(self):
+        return {**self.__dict__, "s3": None}
+
+
+def _delete_stale_parts(s3, bucket: str, filekey: str, keys: list[str]) -> None:
+    paginator = s3.get_paginator("list_objects_v2")
+    part_key = re.compile(re.escape(filekey) + r"[.]part-[0-9]+[.]parquet")
+    stale = [
+        {"Key": obj["Key"]}
+        for page in paginator.paginate(Bucket=bucket, Prefix=f"{filekey}.part-")
+        for obj in page.get("Contents", [])
+        if obj["Key"] not in keys and part_key.fullmatch(obj["Key"])
+    ]
+    for i in range(0, len(stale), 1000):
+        s3.delete_objects(Bucket=bucket, Delete={"Objects": stale[i : i + 1000]})
+    if stale:
+        logger.info(f"Deleted {len(stale)} stale parquet parts of {filekey}")
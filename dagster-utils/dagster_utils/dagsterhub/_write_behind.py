@@ -0,0 +1,125 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable
+
+from dagster import MetadataValue, get_dagster_logger
+
+from dagster_utils.utils import StepTracer, span
+
+logger = get_dagster_logger()
+
+WRITE_BEHIND_MAX_WORKERS = 4
+WRITE_BEHIND_MAX_BYTES = 512 * 1024**2
+
+
+class WriteBehindUploader:
+    """Runs uploads on a thread pool, so the step carries on while they are in flight.
+
+    Pending uploads hold at most `max_bytes`, `submit` blocks until enough of them have
+    finished to make room. A single upload bigger than the limit is let through on its own.
+    Uploads to the same key run in the order they were submitted.
+
+    Call `flush` to wait for every pending upload, which raises the first failure if any.
+    Uploads are timed on a tracer of the uploader, reported by `flush` with the uploads
+    made since the previous one.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = WRITE_BEHIND_MAX_WORKERS,
+        max_bytes: int = WRITE_BEHIND_MAX_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix="dagster_utils_write_behind"
+        )
+        self._condition = threading.Condition()
+        self._in_flight_bytes = 0
+        self._pending = {}
+        self._uploads = 0
+        self._uploaded_bytes = 0
+        self._tracer = StepTracer()
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    @property
+    def in_flight_bytes(self) -> int:
+        return self._in_flight_bytes
+
+    def submit(self, key: str, nbytes: int, fn: Callable, *args, **kwargs) -> Future:
+        with span("Write-behind wait"):
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._in_flight_bytes == 0
+                    or self._in_flight_bytes + nbytes <= self.max_bytes
+                )
+                self._in_flight_bytes += nbytes
+
+        previous = self._pending.get(key)
+        future = self._executor.submit(
+            self._run, self._tracer, key, nbytes, previous, fn, *args, **kwargs
+        )
+        self._pending[key] = future
+        return future
+
+    def _run(
+        self, tracer: StepTracer, key: str, nbytes: int, previous, fn, *args, **kwargs
+    ):
+        try:
+            if previous is not None:
+                wait([previous])
+            # Worker threads have no active tracer, the span is recorded on the uploader's
+            with span("S3 write-behind upload", nbytes, tracers=(tracer,)):
+                result = fn(*args, **kwargs)
+            logger.debug(f"Uploaded {key} in the background")
+            return result
+        finally:
+            with self._condition:
+                self._in_flight_bytes -= nbytes
+                self._uploads += 1
+                self._uploaded_bytes += nbytes
+                self._condition.notify_all()
+
+    def wait(self, key: str) -> None:
+        """Waits for the pending upload to `key`, if any, raising its failure."""
+        future = self._pending.get(key)
+        if future is not None:
+            future.result()
+
+    def flush(self) -> dict:
+        """Waits for every pending upload. If any failed, the first failure is raised once
+        all of them are done, the others are logged.
+
+        Returns:
+            dict: Metadata on the uploads made since the last flush
+        """
+        pending, self._pending = self._pending, {}
+        with span("Write-behind wait"):
+            wait(pending.values())
+
+        errors = [
+            (key, future.exception())
+            for key, future in pending.items()
+            if future.exception() is not None
+        ]
+        for key, error in errors[1:]:
+            logger.error(f"Background upload of {key} failed: {error!r}")
+
+        with self._condition:
+            metadata = {
+                "Write-behind uploads": MetadataValue.int(self._uploads),
+                "Write-behind bytes": MetadataValue.int(self._uploaded_bytes),
+                **self._tracer.to_metadata(peak_rss=False),
+            }
+            self._uploads, self._uploaded_bytes = 0, 0
+            self._tracer = StepTracer()
+
+        if errors:
+            key, error = errors[0]
+            raise RuntimeError(f"Background upload of {key} failed") from error
+        return metadata
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
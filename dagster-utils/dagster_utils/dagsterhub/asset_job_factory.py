@@ -1,4 +1,3 @@
-import json
 import os
 from typing import Union
 
@@ -8,13 +7,15 @@ from dagster import (
     AssetSelection,
     DefaultSensorStatus,
     GraphDefinition,
+    MultiAssetSensorEvaluationContext,
     Optional,
     RunRequest,
-    SensorEvaluationContext,
-    asset_sensor,
     define_asset_job,
+    multi_asset_sensor,
 )
 
+from .dbt_manifest import load_dbt_manifest_index
+
 
 def generate_asset_and_job_from_graph(
     job_name: str,
@@ -42,32 +43,55 @@ def generate_asset_and_job_from_graph(
     return {"asset": asset, "asset_job": asset_job}
 
 
-def generate_dbt_downstream_asset_sensors(project):
+def generate_dbt_downstream_asset_sensors(project, sensor_name: Optional[str] = None):
+    """Creates a single sensor monitoring every source of a dbt project, which launches the
+    downstream job of each source whenever the source is materialized.
+
+    All sources are checked with one event log query per tick, and the sensor cursor tracks the
+    latest consumed materialization of each source individually.
+
+    Args:
+        project (str): dbt project folder under `dp_dbthub`
+        sensor_name (Optional[str], optional): Defaults to `<project>_downstream_sensor`.
+
+    Returns:
+        list: A list with the sensor, to be unpacked in the Definitions `sensors`. The downstream
+            jobs are attached to the sensor, so they don't need to be added separately.
+    """
     manifest_path = os.path.join("dp_dbthub", project, "target", "manifest.json")
-    with open(manifest_path, "r", encoding="utf8") as f:
-        manifest_json = json.load(f)
+    manifest_index = load_dbt_manifest_index(manifest_path)
 
-    asset_sensors = []
-    for _, source in manifest_json["sources"].items():
+    downstream_jobs_by_source_key = {}
+    for _, source in manifest_index["sources"].items():
         source_asset_key = [source["source_name"], source["schema"], source["name"]]
         # assumption: source asset key is always two elements following the schema ["src_landing", "src_<table>"]
         table_wo_prefix = source_asset_key[2][4:]
         selection_asset = ["src_rawmart", f"raw_{table_wo_prefix}"]
 
-        downstream_asset_job = define_asset_job(
+        downstream_jobs_by_source_key[AssetKey(source_asset_key)] = define_asset_job(
             name=f"{table_wo_prefix}_downstream_job",
             selection=AssetSelection.keys(AssetKey(selection_asset)).downstream(),
         )
 
-        @asset_sensor(
-            name=f"{table_wo_prefix}_sensor",
-            asset_key=AssetKey(source_asset_key),
-            job=downstream_asset_job,
-            default_status=DefaultSensorStatus.RUNNING,
-        )
-        def downstream_asset_sensor(context: SensorEvaluationContext, _):
-            yield RunRequest(run_key=context.cursor)
+    @multi_asset_sensor(
+        name=sensor_name or f"{project}_downstream_sensor",
+        monitored_assets=list(downstream_jobs_by_source_key.keys()),
+        jobs=list(downstream_jobs_by_source_key.values()),
+        default_status=DefaultSensorStatus.RUNNING,
+    )
+    def downstream_asset_sensor(context: MultiAssetSensorEvaluationContext):
+        records_by_key = context.latest_materialization_records_by_key()
+
+        run_requests = [
+            RunRequest(
+                run_key=f"{asset_key.to_user_string()}:{record.storage_id}",
+                job_name=downstream_jobs_by_source_key[asset_key].name,
+            )
+            for asset_key, record in records_by_key.items()
+            if record is not None
+        ]
 
-        asset_sensors.append(downstream_asset_sensor)
+        context.advance_cursor(records_by_key)
+        return run_requests
 
-    return asset_sensors
+    return [downstream_asset_sensor]
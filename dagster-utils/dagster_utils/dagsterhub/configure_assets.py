@@ -1,13 +1,16 @@
-import os
+from typing import Optional
 
-import yaml
+from dagster_utils.utils.config_loader import ConfigFolder
 
 
-def config_assets(assets, configs_folder):
-    confs = {}
-    for file in os.listdir(configs_folder):
-        with open(os.path.join(configs_folder, file), "r") as f:
-            confs[file] = yaml.safe_load(f.read())
+def config_assets(assets, configs_folder, snapshot_path: Optional[str] = None):
+    # Config files are named after the asset, only the ones referenced are parsed
+    confs = ConfigFolder(
+        configs_folder,
+        extensions=None,
+        key_fn=lambda filename: filename,
+        snapshot_path=snapshot_path,
+    )
 
     configured_assets = []
     for asset in assets:
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import pickle
+from typing import Optional
+
+from dagster import get_dagster_logger
+
+try:
+    import ijson
+except ImportError:  # streaming parse is optional, falls back to json.load
+    ijson = None
+
+logger = get_dagster_logger()
+
+MANIFEST_INDEX_VERSION = 2
+MANIFEST_INDEX_FILENAME = "manifest_index.pickle"
+SOURCE_FIELDS = ("source_name", "schema", "name")
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def load_dbt_manifest_index(
+    manifest_path: str,
+    cache_path: Optional[str] = None,
+) -> dict:
+    """Loads the parts of a dbt manifest.json needed to wire sources to dagster, caching them
+    in a compact pickle next to the manifest.
+
+    The cache is keyed by the manifest mtime and size, falling back to a content hash when those
+    change (e.g. the manifest was rewritten by an identical `dbt compile`), so a warm code
+    location load doesn't parse the manifest at all.
+
+    Args:
+        manifest_path (str): Path to the dbt manifest.json
+        cache_path (Optional[str], optional): Where to store the index. Defaults to
+            `manifest_index.pickle` in the manifest folder.
+
+    Returns:
+        dict: `sources`, mapping each source unique id to its `source_name`, `schema` and `name`.
+            The child map isn't indexed, nothing wiring sources to dagster reads it.
+    """
+    cache_path = cache_path or os.path.join(
+        os.path.dirname(manifest_path), MANIFEST_INDEX_FILENAME
+    )
+    stat = os.stat(manifest_path)
+
+    cached = _read_cached_index(cache_path)
+    if cached is not None:
+        if (cached["mtime_ns"], cached["size"]) == (stat.st_mtime_ns, stat.st_size):
+            return cached["index"]
+
+        manifest_hash = _hash_file(manifest_path)
+        if cached["sha256"] == manifest_hash:
+            _write_cached_index(cache_path, stat, manifest_hash, cached["index"])
+            return cached["index"]
+
+    # Hashed while parsing, so a cold load reads the manifest once
+    index, manifest_hash = _parse_manifest(manifest_path)
+    _write_cached_index(cache_path, stat, manifest_hash, index)
+
+    return index
+
+
+def _parse_manifest(manifest_path: str) -> tuple[dict, str]:
+    """Parses the manifest index, returning it with the manifest's sha256."""
+    with open(manifest_path, "rb") as f:
+        reader = _HashingReader(f)
+        if ijson is not None:
+            sources = {
+                unique_id: {field: source[field] for field in SOURCE_FIELDS}
+                for unique_id, source in ijson.kvitems(reader, "sources")
+            }
+        else:
+            sources = {
+                unique_id: {field: source[field] for field in SOURCE_FIELDS}
+                for unique_id, source in json.load(reader)["sources"].items()
+            }
+        # The parse may stop before the end of the file, which the hash still covers
+        for _ in iter(lambda: reader.read(HASH_CHUNK_SIZE), b""):
+            pass
+
+    logger.info(f"Built dbt manifest index with {len(sources)} sources")
+
+    return {"sources": sources}, reader.hexdigest()
+
+
+class _HashingReader:
+    """Binary file wrapper hashing what is read through it."""
+
+    def __init__(self, f):
+        self._f = f
+        self._sha = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._f.read(size)
+        self._sha.update(chunk)
+        return chunk
+
+    def hexdigest(self) -> str:
+        return self._sha.hexdigest()
+
+
+def _hash_file(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _read_cached_index(cache_path: str) -> Optional[dict]:
+    try:
+        with open(cache_path, "rb") as f:
+            cached = pickle.load(f)
+    except OSError:
+        return None
+    except Exception as e:
+        # Unpickling a corrupt or foreign file can raise about anything, it's rebuilt instead
+        logger.warning(f"Ignoring unreadable dbt manifest index {cache_path}: {e!r}")
+        return None
+
+    if not isinstance(cached, dict) or cached.get("version") != MANIFEST_INDEX_VERSION:
+        return None
+    return cached
+
+
+def _write_cached_index(cache_path: str, stat, manifest_hash: str, index: dict):
+    cached = {
+        "version": MANIFEST_INDEX_VERSION,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": manifest_hash,
+        "index": index,
+    }
+    # Write to a temp file first so concurrent code servers never read a partial index
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump(cached, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not write dbt manifest index to {cache_path}: {e}")
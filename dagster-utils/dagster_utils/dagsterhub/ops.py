@@ -1,10 +1,14 @@
 import io
+from typing import Optional
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv
 from dagster import (
     Config,
     DynamicPartitionsDefinition,
     Field,
+    In,
     OpExecutionContext,
     Out,
     job,
@@ -15,11 +19,22 @@ from dagster_utils.lib import (
     UtilsFileSystemOutputType,
     UtilsSinkInputType,
     UtilsWebAPIOutputType,
+    from_arrow_table,
+)
+
+from .partitions import (
+    DYNAMIC_PARTITIONS_BATCH_SIZE,
+    add_dynamic_partitions,
+    delete_dynamic_partitions,
+    sync_dynamic_partitions,
 )
 
 
 class WebAPIOutputToSinkInputConfig(Config):
     dest_asset: str
+    # One of "pandas", "arrow" or "polars". Arrow and Polars frames are built from the
+    # records by Arrow and written to parquet as is, without going through pandas
+    frame_type: str = "pandas"
 
 
 @op(out=Out(UtilsSinkInputType, io_manager_key="utils_s3_io_manager"))
@@ -27,28 +42,41 @@ def webapioutput_to_sinkinput(
     config: WebAPIOutputToSinkInputConfig,
     obj: UtilsWebAPIOutputType,
 ) -> UtilsSinkInputType:
+    if config.frame_type == "pandas":
+        data = pd.DataFrame(obj.data)
+    else:
+        data = from_arrow_table(pa.Table.from_pylist(obj.data), config.frame_type)
+
     return UtilsSinkInputType(
         load_to_snow=True,
         dest_asset=config.dest_asset,
-        data=pd.DataFrame(obj.data),
+        data=data,
     )
 
 
 class CSVToSinkInputConfig(Config):
     dest_asset: str
+    # One of "pandas", "arrow" or "polars". Arrow and Polars frames are parsed by the
+    # multithreaded Arrow CSV reader straight from the file's bytes
+    frame_type: str = "pandas"
 
 
 @op(out=Out(UtilsSinkInputType, io_manager_key="utils_s3_io_manager"))
 def csv_to_utilssinkinput(
-    config: WebAPIOutputToSinkInputConfig,
+    config: CSVToSinkInputConfig,
     csv_obj: UtilsFileSystemOutputType,
 ) -> UtilsSinkInputType:
-    source_data = csv_obj.content.decode("utf-8")
-    string_toread = io.StringIO()
-    string_toread.write(source_data)
-    # Read from start of file
-    string_toread.seek(0)
-    df = pd.read_csv(string_toread)
+    if config.frame_type == "pandas":
+        source_data = csv_obj.content.decode("utf-8")
+        string_toread = io.StringIO()
+        string_toread.write(source_data)
+        # Read from start of file
+        string_toread.seek(0)
+        df = pd.read_csv(string_toread)
+    else:
+        df = from_arrow_table(
+            pyarrow.csv.read_csv(io.BytesIO(csv_obj.content)), config.frame_type
+        )
 
     return UtilsSinkInputType(
         dest_asset=config.dest_asset,
@@ -73,19 +101,59 @@ def add_or_delete_dynamic_partitions(context: OpExecutionContext):
     )
 
     if context.op_config.get("partitions_to_add") is not None:
-        context.instance.add_dynamic_partitions(
+        add_dynamic_partitions(
+            context.instance,
             partitions.name,
             context.op_config.get("partitions_to_add"),
         )
 
     if context.op_config.get("partition_to_delete") is not None:
-        for partition in context.op_config.get("partition_to_delete"):
-            context.instance.delete_dynamic_partition(
-                partitions.name,
-                partition,
-            )
+        delete_dynamic_partitions(
+            context.instance,
+            partitions.name,
+            [context.op_config.get("partition_to_delete")],
+        )
 
 
 @job
 def add_or_delete_dynamic_partitions_job():
     add_or_delete_dynamic_partitions()
+
+
+class SyncDynamicPartitionsConfig(Config):
+    dynamic_partition_name: str
+    partitions: Optional[list[str]] = None
+    # Text file with one partition per line
+    partitions_file: Optional[str] = None
+    delete_missing: bool = True
+    batch_size: int = DYNAMIC_PARTITIONS_BATCH_SIZE
+
+
+@op(
+    ins={"partition_keys": In(Optional[list], default_value=None)},
+    description=(
+        "Makes a dynamic partitions definition hold exactly the given partitions, from the "
+        "config, a file and/or the `partition_keys` input, e.g. a pCloud folder listing."
+    ),
+)
+def sync_dynamic_partitions_op(
+    context: OpExecutionContext,
+    config: SyncDynamicPartitionsConfig,
+    partition_keys: Optional[list] = None,
+):
+    desired = list(config.partitions or [])
+    if config.partitions_file is not None:
+        with open(config.partitions_file, "r") as f:
+            desired.extend(line.strip() for line in f if line.strip())
+    desired.extend(partition_keys or [])
+
+    added, deleted = sync_dynamic_partitions(
+        context.instance,
+        config.dynamic_partition_name,
+        desired,
+        delete_missing=config.delete_missing,
+        batch_size=config.batch_size,
+    )
+    context.add_output_metadata(
+        {"Partitions added": len(added), "Partitions deleted": len(deleted)}
+    )
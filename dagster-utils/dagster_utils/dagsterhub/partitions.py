@@ -1,7 +1,11 @@
 from datetime import datetime
-from typing import Optional, Union
+from typing import Iterable, Optional, Union
 
-from dagster import TimeWindowPartitionsDefinition
+from dagster import DagsterInstance, TimeWindowPartitionsDefinition, get_dagster_logger
+
+logger = get_dagster_logger()
+
+DYNAMIC_PARTITIONS_BATCH_SIZE = 1000
 
 
 class QuarterlyPartitionsDefinition(TimeWindowPartitionsDefinition):
@@ -24,3 +28,63 @@ class QuarterlyPartitionsDefinition(TimeWindowPartitionsDefinition):
 
     def __str__(self) -> str:
         return f"Quarterly, starting {self.start.strftime(self.fmt)} {self.timezone}."
+
+
+def add_dynamic_partitions(
+    instance: DagsterInstance,
+    partitions_def_name: str,
+    partition_keys: Iterable[str],
+    batch_size: int = DYNAMIC_PARTITIONS_BATCH_SIZE,
+) -> None:
+    partition_keys = list(partition_keys)
+    for i in range(0, len(partition_keys), batch_size):
+        instance.add_dynamic_partitions(
+            partitions_def_name, partition_keys[i : i + batch_size]
+        )
+
+
+def delete_dynamic_partitions(
+    instance: DagsterInstance,
+    partitions_def_name: str,
+    partition_keys: Iterable[str],
+) -> None:
+    """Deletes partitions one at a time, Dagster only having a single-partition delete.
+    Partitions that don't exist are skipped."""
+    for partition_key in partition_keys:
+        instance.delete_dynamic_partition(partitions_def_name, partition_key)
+
+
+def sync_dynamic_partitions(
+    instance: DagsterInstance,
+    partitions_def_name: str,
+    partition_keys: Iterable[str],
+    delete_missing: bool = True,
+    batch_size: int = DYNAMIC_PARTITIONS_BATCH_SIZE,
+) -> tuple[list[str], list[str]]:
+    """Makes the partitions of a dynamic partitions definition match `partition_keys`, diffing
+    them against the existing partitions fetched once, then adding them in batches.
+
+    Args:
+        instance (DagsterInstance): Instance holding the partitions
+        partitions_def_name (str): Name of the dynamic partitions definition
+        partition_keys (Iterable[str]): Desired partitions
+        delete_missing (bool, optional): Delete the existing partitions that aren't desired.
+            Otherwise they are left alone and partitions are only added.
+        batch_size (int, optional): Partitions added per instance call.
+
+    Returns:
+        tuple[list[str], list[str]]: The partitions added and those deleted
+    """
+    existing = set(instance.get_dynamic_partitions(partitions_def_name))
+    desired = list(dict.fromkeys(partition_keys))
+
+    to_add = [key for key in desired if key not in existing]
+    to_delete = sorted(existing - set(desired)) if delete_missing else []
+
+    add_dynamic_partitions(instance, partitions_def_name, to_add, batch_size)
+    delete_dynamic_partitions(instance, partitions_def_name, to_delete)
+    logger.info(
+        f"Synced dynamic partitions {partitions_def_name}: {len(to_add)} added, "
+        f"{len(to_delete)} deleted"
+    )
+    return to_add, to_delete
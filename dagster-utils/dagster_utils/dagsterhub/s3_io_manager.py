@@ -1,17 +1,54 @@
 import io
+import json
 import pickle
-from typing import Union
+import time
+from typing import Optional, Union
 
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from botocore.exceptions import ClientError
 from dagster import (
     ConfigurableIOManager,
+    DagsterInvariantViolationError,
     InputContext,
     MetadataValue,
     OutputContext,
     get_dagster_logger,
 )
-from dagster_aws.s3.utils import construct_s3_client
 
-from dagster_utils.lib import UtilsSinkInputType, UtilsSnowflakeClient
+from dagster_utils.lib import (
+    UtilsChunkedSinkInputType,
+    UtilsS3Resource,
+    UtilsSinkInputType,
+    UtilsSnowflakeClient,
+    frame_nbytes,
+    frame_num_rows,
+    to_arrow_table,
+)
+from dagster_utils.utils import StepTracer, record_span, span, trace_generator
+
+from ._fingerprint import (
+    FINGERPRINT_METADATA_KEY,
+    FINGERPRINT_SIDECAR_SUFFIX,
+    fingerprint_bytes,
+    fingerprint_load,
+    fingerprint_object,
+)
+from ._handoff import HANDOFF_MAX_BYTES, HandoffRegistry
+from ._s3_parquet import (
+    PARQUET_MAX_FILE_BYTES,
+    PARQUET_ROW_GROUP_BYTES,
+    S3ParquetChunks,
+    parquet_parts_pattern,
+    write_parquet_tables_to_s3,
+    write_parquet_to_s3,
+)
+from ._write_behind import (
+    WRITE_BEHIND_MAX_BYTES,
+    WRITE_BEHIND_MAX_WORKERS,
+    WriteBehindUploader,
+)
 
 PICKLE_PROTOCOL = 5
 
@@ -21,20 +58,64 @@ logger = get_dagster_logger()
 class UtilsS3IOManager(ConfigurableIOManager):
     class Config:
         # This is ugly and a workaround, but IO Managers don't seem to be able to manage state
-        # Long-term solution would be to create an S3 Resource which can also be used as a lib
-        # Out of scope for now, don't foresee this use case coming up that soon.
+        # S3 clients live in UtilsS3Resource, only per-step bookkeeping is kept on the instance
         extra = "allow"
         frozen = False
 
     bucket: str
     s3_prefix: str = None
     utils_snow: UtilsSnowflakeClient
+    # Defaults to a UtilsS3Resource with default settings
+    utils_s3: Optional[UtilsS3Resource] = None
+    # Frames whose parquet is at most this many bytes are PUT straight into the landing table's
+    # stage instead of going through S3 and the external stage
+    snowflake_direct_load_max_bytes: Optional[int] = None
+    # Sink frames are streamed to S3 one row group of about this many in-memory bytes at a
+    # time, in parquet files split at about `parquet_max_file_bytes` for parallel COPYs
+    parquet_row_group_bytes: int = PARQUET_ROW_GROUP_BYTES
+    parquet_max_file_bytes: int = PARQUET_MAX_FILE_BYTES
+    # Pickles are uploaded on a background thread pool while the step carries on, and awaited
+    # once the step has handled its last output. Pending uploads hold at most
+    # `write_behind_max_bytes` of pickled data in memory
+    write_behind: bool = False
+    write_behind_max_workers: int = WRITE_BEHIND_MAX_WORKERS
+    write_behind_max_bytes: int = WRITE_BEHIND_MAX_BYTES
+    # Outputs are also kept pickled in memory, up to `handoff_max_bytes`, and unpickled by the
+    # steps of the same run reading them in this process, i.e. with the in-process executor,
+    # each getting its own copy instead of downloading it. They are still uploaded in the
+    # background, and a step only succeeds once its uploads have, like with `write_behind`,
+    # so steps of other processes and later runs always find them in S3
+    in_memory_handoff: bool = False
+    handoff_max_bytes: int = HANDOFF_MAX_BYTES
+    # Outputs are fingerprinted and the fingerprint is stored as metadata of the S3 object, so
+    # an output identical to the stored one is neither uploaded nor loaded to Snowflake again.
+    # Loaded outputs are only fingerprinted once their load has finished, in a sidecar object
+    skip_unchanged: bool = False
+
+    def teardown_after_execution(self, _):
+        # Async loads and uploads are normally awaited once a step has handled all its outputs,
+        # this only catches the ones left behind by steps failing before that
+        uploader = getattr(self, "_uploader", None)
+        if uploader is not None:
+            try:
+                if uploader.has_pending:
+                    uploader.flush()
+            finally:
+                uploader.shutdown()
+                self._uploader = None
+        if getattr(self, "_handoff", None) is not None:
+            self._handoff.clear()
+        if self.utils_snow.has_pending_loads:
+            self._wait_for_loads()
+        self._confirm_fingerprints()
+
+    @property
+    def s3_resource(self) -> UtilsS3Resource:
+        return self.utils_s3 or UtilsS3Resource()
 
     @property
     def s3(self):
-        if not hasattr(self, "_s3"):
-            self._s3 = construct_s3_client(max_attempts=5)
-        return self._s3
+        return self.s3_resource.client
 
     def _get_path(self, context: Union[InputContext, OutputContext]) -> str:
         if context.has_asset_key:
@@ -48,6 +129,68 @@ class UtilsS3IOManager(ConfigurableIOManager):
             final_path = path
         return "/".join(final_path)
 
+    def _is_last_output(self, context: OutputContext) -> bool:
+        """Marks the output as handled and returns whether it was the last one of its step
+        handled by this IO manager. Steps which may end without handling all of them, i.e.
+        with optional outputs, have each output treated as their last, so that their deferred
+        work never outlives them."""
+        try:
+            step = context.step_context.step
+            op_def = context.step_context.op_def
+        except DagsterInvariantViolationError:
+            # Built outside of a run, e.g. in tests
+            return True
+
+        io_manager_key = op_def.output_def_named(context.name).io_manager_key
+        step_outputs = [
+            step_output
+            for step_output in step.step_outputs
+            if op_def.output_def_named(step_output.name).io_manager_key
+            == io_manager_key
+        ]
+        if not all(step_output.is_required for step_output in step_outputs):
+            return True
+
+        if not hasattr(self, "_handled_outputs"):
+            self._handled_outputs = {}
+        step_id = (context.run_id, step.key)
+        handled = self._handled_outputs.setdefault(step_id, set())
+        handled.add(context.name)
+        if handled < {step_output.name for step_output in step_outputs}:
+            return False
+        del self._handled_outputs[step_id]
+        return True
+
+    @property
+    def uploader(self) -> WriteBehindUploader:
+        if getattr(self, "_uploader", None) is None:
+            self._uploader = WriteBehindUploader(
+                max_workers=self.write_behind_max_workers,
+                max_bytes=self.write_behind_max_bytes,
+            )
+        return self._uploader
+
+    @property
+    def has_pending_uploads(self) -> bool:
+        uploader = getattr(self, "_uploader", None)
+        return uploader is not None and uploader.has_pending
+
+    @property
+    def handoff(self) -> HandoffRegistry:
+        if getattr(self, "_handoff", None) is None:
+            self._handoff = HandoffRegistry(max_bytes=self.handoff_max_bytes)
+        return self._handoff
+
+    @staticmethod
+    def _get_run_id(context: Union[InputContext, OutputContext]) -> Optional[str]:
+        if isinstance(context, InputContext):
+            context = context.upstream_output
+        try:
+            return context.run_id if context is not None else None
+        except DagsterInvariantViolationError:
+            # Built outside of a run, e.g. in tests
+            return None
+
     def _uri_for_key(self, key):
         return f"s3://{self.bucket}/{key}"
 
@@ -56,57 +199,386 @@ class UtilsS3IOManager(ConfigurableIOManager):
             return None
 
         key = self._get_path(context)
-        context.log.debug(f"Loading S3 object from: {self._uri_for_key(key)}")
-        obj = pickle.loads(
-            self.s3.get_object(Bucket=self.bucket, Key=key)["Body"].read()
-        )
+        run_id = self._get_run_id(context)
+        pickled_obj = None
+        if self.in_memory_handoff and run_id is not None:
+            pickled_obj = self.handoff.get(run_id, key, None)
+            if pickled_obj is not None:
+                context.log.debug(f"Loading {key} from memory")
+
+        if pickled_obj is None:
+            if self.has_pending_uploads:
+                # The object may have been produced by an upstream step in this process
+                self.uploader.wait(key)
+            context.log.debug(f"Loading S3 object from: {self._uri_for_key(key)}")
+            pickled_obj = self.s3_resource.download_bytes(self.bucket, key)
+
+        obj = pickle.loads(pickled_obj)
+        if isinstance(obj, UtilsChunkedSinkInputType):
+            obj.chunks.s3 = self.s3
 
         return obj
 
     def handle_output(self, context: OutputContext, obj):
+        # Only collects spans while handling this output, not while Dagster has it suspended
+        tracer = StepTracer()
+        yield from trace_generator(self._handle_step_output(context, obj), tracer)
+        yield tracer.to_metadata()
+
+    def _handle_step_output(self, context: OutputContext, obj):
+        try:
+            yield from self._handle_output(context, obj)
+        except Exception:
+            # Earlier async loads awaited to free a load slot fail here too
+            self._unconfirmed_fingerprints.clear()
+            raise
+        is_last_output = self._is_last_output(context)
+        if is_last_output and self.has_pending_uploads:
+            # Downstream steps may run as soon as this one succeeds, in other processes,
+            # and failed background uploads fail the step they belong to
+            yield self.uploader.flush()
+        if is_last_output and self.utils_snow.has_pending_loads:
+            # Async Snowflake loads overlap with the step's other outputs, but must
+            # finish before the step does so that a failed load fails the step
+            yield self._wait_for_loads()
+        if is_last_output:
+            self._confirm_fingerprints()
+
+    def _handle_output(self, context: OutputContext, obj):
         key = self._get_path(context)
         path = self._uri_for_key(key)
+
+        if isinstance(obj, UtilsChunkedSinkInputType):
+            # Chunks can only be consumed once, so they can't be fingerprinted beforehand
+            yield from self._handle_chunked_output(context, key, path, obj)
+            return
+
+        pickled_obj, fingerprint = None, None
+        if self.skip_unchanged:
+            fingerprint, pickled_obj = self._fingerprint(obj)
+            if isinstance(obj, UtilsSinkInputType) and obj.load_to_snow:
+                fingerprint = fingerprint_load(
+                    fingerprint, self.utils_snow.get_load_config(context)
+                )
+            stored_fingerprint = self._get_stored_fingerprint(key)
+            yield {"Fingerprint": MetadataValue.text(fingerprint)}
+            if stored_fingerprint == fingerprint:
+                context.log.debug(f"S3 object at {path} is unchanged, skipping")
+                self._hand_over(context, key, obj, pickled_obj)
+                yield {
+                    "uri": MetadataValue.path(path),
+                    "Skipped: unchanged": MetadataValue.bool(True),
+                }
+                return
+            yield {"Skipped: unchanged": MetadataValue.bool(False)}
+
         context.log.debug(f"Writing S3 object at: {path}")
+        if pickled_obj is None:
+            pickled_obj = self._pickle(obj)
+        handoff_metadata = self._hand_over(context, key, obj, pickled_obj)
+        if handoff_metadata:
+            yield handoff_metadata
+
+        is_loaded = isinstance(obj, UtilsSinkInputType) and obj.load_to_snow
+        # The fingerprint of loaded outputs is only stored once the load is done, so that a
+        # failed load is retried by the next run. Until then the object has no fingerprint.
+        extra_args = {}
+        if fingerprint is not None and not is_loaded:
+            extra_args["Metadata"] = {FINGERPRINT_METADATA_KEY: fingerprint}
+        elif fingerprint is not None:
+            # An earlier load of the same pickle may have left one
+            self.s3.delete_object(
+                Bucket=self.bucket, Key=key + FINGERPRINT_SIDECAR_SUFFIX
+            )
 
-        pickled_obj = pickle.dumps(obj, PICKLE_PROTOCOL)
-        pickled_obj_bytes = io.BytesIO(pickled_obj)
-        self.s3.upload_fileobj(pickled_obj_bytes, self.bucket, key)
+        self._upload_pickle(key, pickled_obj, extra_args)
         yield {"uri": MetadataValue.path(path)}
 
         if isinstance(obj, UtilsSinkInputType):
             context.log.debug(f"Attempting snowflake upload")
             if obj.load_to_snow:
                 context.log.debug(f"Object should be uploaded to snowflake")
-                parquet_path = self._upload_df(obj, key)
+                data = obj.data
+                if not isinstance(data, pd.DataFrame):
+                    # Polars frames are written through Arrow, sharing their buffers
+                    data = to_arrow_table(data)
+                data = self.utils_snow.prepare_landing_frame(context, data)
+                yield {"Rows": MetadataValue.int(frame_num_rows(data))}
+                yield from self._load_to_snowflake(context, key, data)
+                if not self.utils_snow.async_loads:
+                    # Async loads are reported by the metadata of `_wait_for_loads`
+                    yield {"Loaded to snowflake": MetadataValue.bool(True)}
 
-                yield {
-                    "S3 parquet storage path": MetadataValue.path(
-                        f"s3://{self.bucket}/{parquet_path}"
+                if fingerprint is not None:
+                    self._unconfirmed_fingerprints[key] = fingerprint
+                    if not self.utils_snow.has_pending_loads:
+                        self._confirm_fingerprints()
+
+        else:
+            yield {"Loaded to snowflake": MetadataValue.bool(False)}
+
+    def _handle_chunked_output(
+        self,
+        context: OutputContext,
+        key: str,
+        path: str,
+        obj: UtilsChunkedSinkInputType,
+    ):
+        """Streams the chunks to S3 as parquet, then stores the output with its chunks
+        replaced by a reader of the parquet files, and loads these with a single COPY."""
+        rows = 0
+        loaded_at = pd.Timestamp.now(tz="UTC")
+
+        def tables():
+            nonlocal rows
+            for chunk in obj.chunks:
+                with span("Arrow convert"):
+                    table = to_arrow_table(chunk)
+                rows += table.num_rows
+                if obj.load_to_snow:
+                    table = self.utils_snow.prepare_landing_frame(
+                        context, table, loaded_at=loaded_at
                     )
-                }
-                yield {"Rows": MetadataValue.int(len(obj.data.index))}
+                yield table
 
-                yield from self.utils_snow.copy_into_landing_area(
-                    context,
-                    parquet_path,
+        context.log.debug(f"Writing parquet chunks at: {path}")
+        keys, arrow_schema = write_parquet_tables_to_s3(
+            self.s3,
+            self.bucket,
+            key,
+            tables(),
+            max_file_bytes=self.parquet_max_file_bytes,
+        )
+        logger.info(f"Parquet uploaded to S3 in {len(keys)} file(s) at {key}")
+
+        stored_obj = obj.copy(update={"chunks": S3ParquetChunks(self.bucket, keys)})
+        pickled_obj = self._pickle(stored_obj)
+        handoff_metadata = self._hand_over(context, key, stored_obj, pickled_obj)
+        if handoff_metadata:
+            yield handoff_metadata
+        self._upload_pickle(key, pickled_obj)
+        yield {"uri": MetadataValue.path(path), "Rows": MetadataValue.int(rows)}
+
+        if not keys:
+            context.log.warning(f"No chunks were produced for {key}, nothing to load")
+            yield {"Loaded to snowflake": MetadataValue.bool(False)}
+            return
+
+        parquet_path = keys[0] if len(keys) == 1 else parquet_parts_pattern(key)
+        yield {
+            "S3 parquet storage path": MetadataValue.path(
+                f"s3://{self.bucket}/{parquet_path}"
+            )
+        }
+        if obj.load_to_snow:
+            yield from self.utils_snow.copy_into_landing_area(
+                context, parquet_path, arrow_schema=arrow_schema
+            )
+        if not (obj.load_to_snow and self.utils_snow.async_loads):
+            yield {"Loaded to snowflake": MetadataValue.bool(obj.load_to_snow)}
+
+    def _upload_pickle(self, key: str, pickled_obj: bytes, extra_args=None):
+        extra_args = extra_args or {}
+        if self.write_behind or self.in_memory_handoff:
+            self.uploader.submit(
+                key,
+                len(pickled_obj),
+                self.s3_resource.upload_fileobj,
+                io.BytesIO(pickled_obj),
+                self.bucket,
+                key,
+                ExtraArgs=extra_args,
+            )
+        else:
+            with span("S3 upload", len(pickled_obj)):
+                self.s3_resource.upload_fileobj(
+                    io.BytesIO(pickled_obj), self.bucket, key, ExtraArgs=extra_args
                 )
-                yield {"Loaded to snowflake": MetadataValue.bool(True)}
 
+    def _wait_for_loads(self) -> dict:
+        try:
+            return self.utils_snow.wait_for_loads()
+        except Exception:
+            # Outputs whose load failed must not be skipped by the next run
+            self._unconfirmed_fingerprints.clear()
+            raise
+
+    def _pickle(self, obj) -> bytes:
+        with span("Pickle") as s:
+            pickled_obj = pickle.dumps(obj, PICKLE_PROTOCOL)
+            s.bytes = len(pickled_obj)
+        return pickled_obj
+
+    def _hand_over(
+        self, context: OutputContext, key: str, obj, pickled_obj: Optional[bytes]
+    ) -> dict:
+        run_id = self._get_run_id(context)
+        if not self.in_memory_handoff or run_id is None:
+            return {}
+        if pickled_obj is None:
+            pickled_obj = self._pickle(obj)
+        return {
+            "In-memory handoff": MetadataValue.bool(
+                self.handoff.put(run_id, key, pickled_obj)
+            )
+        }
+
+    def _fingerprint(self, obj) -> tuple[str, Optional[bytes]]:
+        """Fingerprint of the output, and its pickle if it had to be pickled to get it.
+        Pickling isn't counted in the fingerprinting time, it's recorded as its own span."""
+        start = time.perf_counter()
+        fingerprint = fingerprint_object(obj)
+        seconds = time.perf_counter() - start
+        if fingerprint is not None:
+            record_span("Fingerprint", seconds)
+            return fingerprint, None
+
+        pickled_obj = self._pickle(obj)
+        start = time.perf_counter()
+        fingerprint = fingerprint_bytes(pickled_obj)
+        seconds += time.perf_counter() - start
+        record_span("Fingerprint", seconds, len(pickled_obj))
+        return fingerprint, pickled_obj
+
+    def _get_stored_fingerprint(self, key: str) -> Optional[str]:
+        """Fingerprint of the stored object, None if it isn't stored or has none."""
+        if self.has_pending_uploads:
+            self.uploader.wait(key)
+        with span("S3 fingerprint"):
+            res = self._head_object(key)
+            if res is None:
+                return None
+            fingerprint = res.get("Metadata", {}).get(FINGERPRINT_METADATA_KEY)
+            if fingerprint is not None:
+                return fingerprint
+
+            try:
+                sidecar = self.s3.get_object(
+                    Bucket=self.bucket, Key=key + FINGERPRINT_SIDECAR_SUFFIX
+                )
+            except ClientError as e:
+                if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                    return None
+                raise
+            stored = json.loads(sidecar["Body"].read())
+        # The object may have been rewritten since, e.g. by a run not skipping unchanged outputs
+        if stored["etag"] != res["ETag"]:
+            return None
+        return stored["fingerprint"]
+
+    def _head_object(self, key: str) -> Optional[dict]:
+        try:
+            return self.s3.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return None
+            raise
+
+    @property
+    def _unconfirmed_fingerprints(self) -> dict:
+        if getattr(self, "_fingerprints_to_store", None) is None:
+            self._fingerprints_to_store = {}
+        return self._fingerprints_to_store
+
+    def _confirm_fingerprints(self):
+        """Stores the fingerprints of the outputs whose load has finished in their sidecar
+        objects, tied to the ETag of the pickle they were computed for."""
+        fingerprints = self._unconfirmed_fingerprints
+        while fingerprints:
+            key, fingerprint = fingerprints.popitem()
+            if self.has_pending_uploads:
+                self.uploader.wait(key)
+            with span("S3 fingerprint"):
+                res = self.s3.head_object(Bucket=self.bucket, Key=key)
+                self.s3.put_object(
+                    Bucket=self.bucket,
+                    Key=key + FINGERPRINT_SIDECAR_SUFFIX,
+                    Body=json.dumps({"fingerprint": fingerprint, "etag": res["ETag"]}),
+                )
+
+    def _load_to_snowflake(self, context: OutputContext, key: str, data):
+        if self._may_load_directly(data):
+            parquet_buffer, arrow_schema = self._encode_df(data)
+            if self._should_load_directly(parquet_buffer):
+                yield from self.utils_snow.put_into_landing_area(
+                    context,
+                    parquet_buffer,
+                    f"{key.split('/')[-1]}.parquet",
+                    arrow_schema=arrow_schema,
+                )
+                return
+            parquet_path = self._upload_parquet(parquet_buffer, key)
         else:
-            yield {"Loaded to snowflake": MetadataValue.bool(False)}
+            if isinstance(data, pa.Table):
+                arrow_schema = data.schema
+            else:
+                arrow_schema = pa.Schema.from_pandas(data, preserve_index=False)
+            parquet_path = self._upload_df(data, key, arrow_schema)
 
-    def _upload_df(self, obj, filekey):
-        remote_filepath = f"{filekey}.parquet"
+        yield {
+            "S3 parquet storage path": MetadataValue.path(
+                f"s3://{self.bucket}/{parquet_path}"
+            )
+        }
+        yield from self.utils_snow.copy_into_landing_area(
+            context,
+            parquet_path,
+            arrow_schema=arrow_schema,
+        )
 
-        out_buffer = io.BytesIO()
-        obj.data.to_parquet(out_buffer, index=False)
+    def _may_load_directly(self, df) -> bool:
+        # Only frames that are small in memory are encoded in memory to check their parquet size
+        # against the threshold, anything bigger is streamed to S3 straight away
+        return (
+            self.snowflake_direct_load_max_bytes is not None
+            and frame_nbytes(df) <= self.snowflake_direct_load_max_bytes
+        )
 
-        self.s3.put_object(
-            Bucket=self.bucket,
-            Key=remote_filepath,
-            Body=out_buffer.getvalue(),
+    def _should_load_directly(self, parquet_buffer: io.BytesIO) -> bool:
+        return (
+            self.snowflake_direct_load_max_bytes is not None
+            and parquet_buffer.getbuffer().nbytes
+            <= self.snowflake_direct_load_max_bytes
         )
 
+    def _encode_df(self, df) -> tuple[io.BytesIO, pa.Schema]:
+        with span("Parquet encode") as s:
+            table = to_arrow_table(df)
+            out_buffer = io.BytesIO()
+            pq.write_table(table, out_buffer)
+            s.bytes = out_buffer.tell()
+
+        out_buffer.seek(0)
+        return out_buffer, table.schema
+
+    def _upload_parquet(self, parquet_buffer: io.BytesIO, filekey: str) -> str:
+        remote_filepath = f"{filekey}.parquet"
+
+        with span("S3 parquet upload", parquet_buffer.getbuffer().nbytes):
+            self.s3.put_object(
+                Bucket=self.bucket,
+                Key=remote_filepath,
+                Body=parquet_buffer.getvalue(),
+            )
+
         logger.info(f"File uploaded to S3 with path {remote_filepath}")
 
         return remote_filepath
+
+    def _upload_df(self, df, filekey, schema: Optional[pa.Schema] = None) -> str:
+        """Streams the frame to S3 as parquet. Returns the key of the file, or a pattern
+        matching all files if it was split, for use in a COPY."""
+        keys = write_parquet_to_s3(
+            self.s3,
+            self.bucket,
+            filekey,
+            df,
+            row_group_bytes=self.parquet_row_group_bytes,
+            max_file_bytes=self.parquet_max_file_bytes,
+            schema=schema,
+        )
+        logger.info(f"Parquet uploaded to S3 in {len(keys)} file(s) at {filekey}")
+
+        if len(keys) == 1:
+            return keys[0]
+        return parquet_parts_pattern(filekey)
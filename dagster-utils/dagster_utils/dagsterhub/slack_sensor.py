@@ -1,7 +1,7 @@
 import os
+from functools import lru_cache
 
 from dagster import DefaultSensorStatus
-from dagster_slack import make_slack_on_run_failure_sensor
 
 
 def slack_message_fn(context) -> str:
@@ -17,10 +17,23 @@ sensor_status = (
     else DefaultSensorStatus.STOPPED
 )
 
-slack_on_run_failure = make_slack_on_run_failure_sensor(
-    channel="C03TT8ATCAW",
-    slack_token=os.getenv("SLACK_TOKEN"),
-    text_fn=slack_message_fn,
-    dagit_base_url="htts://dagster.mushlabs.cloud",
-    default_status=sensor_status,
-)
+
+@lru_cache(maxsize=None)
+def build_slack_on_run_failure_sensor():
+    """Builds the run failure sensor on first use, so that importing this module doesn't import
+    dagster_slack, and SLACK_TOKEN is read when the sensor is actually loaded."""
+    from dagster_slack import make_slack_on_run_failure_sensor
+
+    return make_slack_on_run_failure_sensor(
+        channel="C03TT8ATCAW",
+        slack_token=os.getenv("SLACK_TOKEN"),
+        text_fn=slack_message_fn,
+        dagit_base_url="htts://dagster.mushlabs.cloud",
+        default_status=sensor_status,
+    )
+
+
+def __getattr__(name: str):
+    if name == "slack_on_run_failure":
+        return build_slack_on_run_failure_sensor()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,5 +1,111 @@
+import json
+from collections import deque
+from typing import Optional
+
 import boto3
-from dagster import DefaultSensorStatus, RunRequest, SkipReason, sensor
+from dagster import (
+    DefaultSensorStatus,
+    RunRequest,
+    RunsFilter,
+    SensorEvaluationContext,
+    SkipReason,
+    sensor,
+)
+from dagster._core.storage.tags import RUN_KEY_TAG, SENSOR_NAME_TAG
+
+SQS_MAX_BATCH_SIZE = 10
+SQS_MESSAGE_GROUP_TAG = "sqs/message_group_id"
+
+
+class SQSSensorCursor:
+    """Sensor cursor tracking SQS messages by `MessageId`.
+
+    `pending` maps the ids of messages a RunRequest was emitted for to their latest receipt
+    handle; they are kept invisible in the queue until the run exists. `seen` is a rolling
+    window of ids whose runs were launched, so redeliveries are dropped instead of re-run.
+    """
+
+    def __init__(
+        self,
+        seen: Optional[list] = None,
+        pending: Optional[dict] = None,
+        dedup_window: int = 1000,
+    ):
+        self.seen = deque(seen or [], maxlen=dedup_window)
+        self.pending = pending or {}
+
+    @classmethod
+    def from_json(cls, cursor: Optional[str], dedup_window: int = 1000):
+        if not cursor:
+            return cls(dedup_window=dedup_window)
+        raw = json.loads(cursor)
+        return cls(raw.get("seen"), raw.get("pending"), dedup_window)
+
+    def to_json(self) -> str:
+        return json.dumps({"seen": list(self.seen), "pending": self.pending})
+
+    def mark_launched(self, message_id: str):
+        self.pending.pop(message_id, None)
+        self.seen.append(message_id)
+
+
+def _batched(items: list, size: int = SQS_MAX_BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _get_launched_message_ids(
+    context: SensorEvaluationContext,
+    sensor_name: str,
+    message_ids: list,
+) -> set:
+    runs = context.instance.get_runs(
+        filters=RunsFilter(
+            tags={SENSOR_NAME_TAG: sensor_name, RUN_KEY_TAG: message_ids},
+        )
+    )
+    return {run.tags.get(RUN_KEY_TAG) for run in runs}
+
+
+def _settle_pending_messages(
+    context: SensorEvaluationContext,
+    sqs,
+    queue_url: str,
+    sensor_name: str,
+    cursor: SQSSensorCursor,
+    visibility_timeout: int,
+):
+    """Deletes the messages whose runs were launched since the last tick, and extends the
+    visibility of the ones still waiting on the daemon."""
+    if not cursor.pending:
+        return
+
+    launched = _get_launched_message_ids(context, sensor_name, list(cursor.pending))
+    to_delete = [
+        {"Id": str(i), "ReceiptHandle": cursor.pending[message_id]}
+        for i, message_id in enumerate(cursor.pending)
+        if message_id in launched
+    ]
+    to_extend = [
+        {
+            "Id": str(i),
+            "ReceiptHandle": cursor.pending[message_id],
+            "VisibilityTimeout": visibility_timeout,
+        }
+        for i, message_id in enumerate(cursor.pending)
+        if message_id not in launched
+    ]
+
+    # Failures (e.g. stale receipt handles) are fine here: launched ids stay in `seen`, so a
+    # redelivered message is deleted on sight, and a pending one is re-requested with the same
+    # run_key, which the daemon deduplicates.
+    for batch in _batched(to_delete):
+        sqs.delete_message_batch(QueueUrl=queue_url, Entries=batch)
+    for batch in _batched(to_extend):
+        sqs.change_message_visibility_batch(QueueUrl=queue_url, Entries=batch)
+
+    for message_id in launched:
+        cursor.mark_launched(message_id)
 
 
 def generate_sqs_sensor(
@@ -8,30 +114,85 @@ def generate_sqs_sensor(
     queue_url: str,
     message_to_job: dict,
     interval: int = None,
+    max_messages: int = SQS_MAX_BATCH_SIZE,
+    visibility_timeout: int = 300,
+    dedup_window: int = 1000,
 ):
+    """Creates a sensor that launches a job for every SQS message whose body matches a key
+    in `message_to_job`.
+
+    Messages are deduplicated on their `MessageId`, which is also used as the run key. A
+    message is only deleted from the queue once the daemon has launched its run; until then
+    its visibility is extended on every tick. For FIFO queues, runs are tagged with the
+    message group id, so groups can be parallelised (or limited) with tag concurrency limits.
+
+    Args:
+        sensor_name (str): Name of the sensor
+        jobs (list): Jobs that can be targeted by the sensor
+        queue_url (str): URL of the SQS queue to poll
+        message_to_job (dict): Mapping of lowercase message body to job name
+        interval (int, optional): Minimum interval between sensor evaluations, in seconds.
+        max_messages (int, optional): Maximum messages received per tick, up to 10.
+        visibility_timeout (int, optional): Seconds a received message is hidden from other
+            consumers while its run is being launched. Defaults to 5 minutes.
+        dedup_window (int, optional): Number of launched message ids remembered in the
+            cursor to drop redeliveries. Defaults to 1000.
+    """
+    is_fifo = queue_url.endswith(".fifo")
+
     @sensor(
         name=sensor_name,
         minimum_interval_seconds=interval,
         jobs=jobs,
         default_status=DefaultSensorStatus.RUNNING,
     )
-    def sqs_sensor():
+    def sqs_sensor(context: SensorEvaluationContext):
         sqs = boto3.client("sqs")
+        cursor = SQSSensorCursor.from_json(context.cursor, dedup_window)
+
+        _settle_pending_messages(
+            context, sqs, queue_url, sensor_name, cursor, visibility_timeout
+        )
 
-        response = sqs.receive_message(QueueUrl=queue_url)
-        try:
-            message = response["Messages"][0]
+        receive_kwargs = {
+            "QueueUrl": queue_url,
+            "MaxNumberOfMessages": min(max_messages, SQS_MAX_BATCH_SIZE),
+            "VisibilityTimeout": visibility_timeout,
+        }
+        if is_fifo:
+            receive_kwargs["AttributeNames"] = ["MessageGroupId"]
+        messages = sqs.receive_message(**receive_kwargs).get("Messages", [])
+
+        run_requests = []
+        for message in messages:
+            message_id = message["MessageId"]
             receipt_handle = message["ReceiptHandle"]
-            message_body = message["Body"]
 
-            if message_body.lower() in message_to_job.keys():
+            if message_id in cursor.seen:
                 sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=receipt_handle)
-                return RunRequest(
-                    run_key=receipt_handle, job_name=message_to_job[message_body]
-                )
-            else:
-                return SkipReason("Message does not match any jobs in this repository")
-        except Exception:
+                continue
+
+            job_name = message_to_job.get(message["Body"].lower())
+            if job_name is None:
+                continue
+
+            tags = {}
+            group_id = message.get("Attributes", {}).get("MessageGroupId")
+            if group_id is not None:
+                tags[SQS_MESSAGE_GROUP_TAG] = group_id
+
+            cursor.pending[message_id] = receipt_handle
+            run_requests.append(
+                RunRequest(run_key=message_id, job_name=job_name, tags=tags)
+            )
+
+        context.update_cursor(cursor.to_json())
+
+        if run_requests:
+            return run_requests
+        elif messages:
+            return SkipReason("Message does not match any jobs in this repository")
+        else:
             return SkipReason("No new messages in SQS queue.")
 
     return sqs_sensor
@@ -1,7 +1,69 @@
-from ._base_middleware import *
-from ._types import *
-from .gmail import *
-from .gsheets import *
-from .pcloud import *
-from .pubchem import *
-from .snow import *
+# Clients are imported on first access rather than with the package, so importing one of them
+# doesn't pull in the dependencies of all the others (snowflake, sqlalchemy, boto3, ...)
+import importlib
+
+_LAZY_IMPORTS = {
+    "BaseGoogleAPI": "._base_middleware",
+    "BaseMiddleware": "._base_middleware",
+    "FRAME_TYPES": "._frames",
+    "frame_nbytes": "._frames",
+    "frame_num_rows": "._frames",
+    "from_arrow_table": "._frames",
+    "is_sink_frame": "._frames",
+    "to_arrow_table": "._frames",
+    "UtilsChunkedSinkInputType": "._types",
+    "UtilsFileSystemOutputType": "._types",
+    "UtilsSinkInputType": "._types",
+    "UtilsWebAPIOutputType": "._types",
+    "StubUtilsGMailClient": ".gmail",
+    "UtilsGMailClient": ".gmail",
+    "fetch_from_gmail": ".gmail",
+    "FetchFromGSheetsConfig": ".gsheets",
+    "StubUtilsGSheetsClient": ".gsheets",
+    "UtilsGSheetsClient": ".gsheets",
+    "fetch_from_gsheets": ".gsheets",
+    "fetch_from_gsheets_with_partition": ".gsheets",
+    "PCLOUD_BASE_URL": ".pcloud",
+    "PCLOUD_DATE_FORMAT": ".pcloud",
+    "FetchpCloudFolderNamesConfig": ".pcloud",
+    "FetchpCloudRootFolderConfig": ".pcloud",
+    "ReadpCloudFilesByIdConfig": ".pcloud",
+    "StubUtilspCloudClient": ".pcloud",
+    "UtilspCloudClient": ".pcloud",
+    "fetch_pcloud_folder_names": ".pcloud",
+    "fetch_pcloud_root_folder": ".pcloud",
+    "make_pcloud_file_schedule": ".pcloud",
+    "read_pcloud_files_by_id": ".pcloud",
+    "FetchPubChemCompoundByOutputName": ".pubchem",
+    "PubChemReturnParameters": ".pubchem",
+    "StubUtilsPubChemClient": ".pubchem",
+    "UtilsPubChemClient": ".pubchem",
+    "fetch_pubchem_compound_by_name": ".pubchem",
+    "LoadSlot": ".load_limiter",
+    "UtilsLoadLimiter": ".load_limiter",
+    "advisory_lock_key": ".load_limiter",
+    "UtilsS3Resource": ".s3",
+    "clear_s3_clients": ".s3",
+    "get_s3_client": ".s3",
+    "LANDING_LOADED_AT_COLUMN": ".snow",
+    "LANDING_PARTITION_COLUMN": ".snow",
+    "MockSFConn": ".snow",
+    "StubSnowflakeClient": ".snow",
+    "UtilsSnowflakeClient": ".snow",
+    "arrow_to_snowflake_type": ".snow",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
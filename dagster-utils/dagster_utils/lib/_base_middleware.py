@@ -1,4 +1,3 @@
-import urllib
 from abc import ABC, abstractmethod
 
 import requests
@@ -7,16 +6,27 @@ from pydantic import PrivateAttr
 
 import dagster_utils.utils as utils
 
+from ._google_auth import get_google_token_manager
+from ._transport import HttpTransport, get_http_transport
+
 logger = get_dagster_logger()
 
 
 class BaseMiddleware(ABC):
     _auth = PrivateAttr(None)
 
+    def _register_auth_config(self):
+        # Called from the resources' __init__, as pydantic doesn't chain to mixin initializers
+        utils.register_authentication(getattr(self, "auth_config", None))
+
+    def _fetch_auth(self):
+        utils.prefetch_registered_authentication(self.auth_config)
+        return utils.fetch_authentication(self.auth_config)
+
     def get_auth(self):
         if self.auth_config is not None:
-            if self._auth == PrivateAttr(None) or None:
-                self._auth = utils.fetch_authentication(self.auth_config)
+            if self._auth is None or self._auth == PrivateAttr(None):
+                self._auth = self._fetch_auth()
             return self._auth
         else:
             return None
@@ -24,25 +34,46 @@ class BaseMiddleware(ABC):
     @property
     def auth(self):
         if self.auth_config is not None:
-            if self._auth == PrivateAttr(None) or None:
-                self._auth = utils.fetch_authentication(self.auth_config)
+            if self._auth is None or self._auth == PrivateAttr(None):
+                self._auth = self._fetch_auth()
             return self._auth
         else:
             return None
 
+    @property
+    def transport(self) -> HttpTransport:
+        return get_http_transport()
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        return self.transport.request(method, url, **kwargs)
+
 
 class BaseGoogleAPI(ConfigurableResource, BaseMiddleware):
     _headers = PrivateAttr(None)
     _auth = PrivateAttr(None)
 
+    def __init__(self, **data):
+        super().__init__(**data)
+        self._register_auth_config()
+
     def setup_for_execution(self, _) -> None:
         self._auth = self.get_auth()
         self._headers = self.get_headers()
 
     def get_headers(self):
-        logger.warn(self.auth)
-        r = requests.post(
-            f"https://oauth2.googleapis.com/token?{urllib.parse.urlencode(self._auth)}"
-        )
-        logger.info("Generated Google access token")
-        return {"Authorization": f"Bearer {r.json()['access_token']}"}
+        token = get_google_token_manager(self._auth).get_token()
+        return {"Authorization": f"Bearer {token}"}
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Makes a request with a current access token, retrying once with a fresh token if
+        the request is rejected as unauthorized."""
+        self._headers = self.get_headers()
+        r = self.transport.request(method, url, headers=self._headers, **kwargs)
+
+        if r.status_code == 401 and self._auth is not None:
+            logger.info("Google access token rejected, refreshing")
+            get_google_token_manager(self._auth).invalidate()
+            self._headers = self.get_headers()
+            r = self.transport.request(method, url, headers=self._headers, **kwargs)
+
+        return r
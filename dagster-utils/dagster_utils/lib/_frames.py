@@ -0,0 +1,63 @@
+import importlib
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+
+FRAME_TYPES = ("pandas", "arrow", "polars")
+
+
+def is_polars_frame(data: Any) -> bool:
+    # Checked by module so Polars, an optional dependency, is never imported just to check
+    return type(data).__module__.split(".")[0] == "polars" and hasattr(data, "to_arrow")
+
+
+def is_sink_frame(data: Any) -> bool:
+    """Whether `data` can be loaded by a sink: a pandas DataFrame, an Arrow table or a Polars
+    DataFrame."""
+    return isinstance(data, (pd.DataFrame, pa.Table)) or is_polars_frame(data)
+
+
+def to_arrow_table(data: Any) -> pa.Table:
+    """Arrow table of a sink frame, or of an Arrow record batch. Arrow and Polars frames are
+    converted without copying their buffers, pandas frames lose their index."""
+    if isinstance(data, pa.Table):
+        return data
+    if isinstance(data, pa.RecordBatch):
+        return pa.Table.from_batches([data])
+    if isinstance(data, pd.DataFrame):
+        return pa.Table.from_pandas(data, preserve_index=False)
+    if is_polars_frame(data):
+        return data.to_arrow()
+    raise TypeError(
+        f"Expected a pandas DataFrame, an Arrow table or a Polars DataFrame, "
+        f"got {type(data).__name__}"
+    )
+
+
+def from_arrow_table(table: pa.Table, frame_type: str = "pandas") -> Any:
+    """Converts an Arrow table to a sink frame of `frame_type`, one of `FRAME_TYPES`."""
+    if frame_type == "pandas":
+        return table.to_pandas()
+    if frame_type == "arrow":
+        return table
+    if frame_type == "polars":
+        return importlib.import_module("polars").from_arrow(table)
+    raise ValueError(f"Frame type must be one of {FRAME_TYPES}, got {frame_type}")
+
+
+def frame_num_rows(data: Any) -> int:
+    if isinstance(data, pd.DataFrame):
+        return len(data.index)
+    if isinstance(data, pa.Table):
+        return data.num_rows
+    return data.height
+
+
+def frame_nbytes(data: Any) -> int:
+    """In-memory size of a sink frame's values, without the Python objects they may point to."""
+    if isinstance(data, pd.DataFrame):
+        return int(data.memory_usage(index=False, deep=False).sum())
+    if isinstance(data, pa.Table):
+        return data.nbytes
+    return int(data.estimated_size())
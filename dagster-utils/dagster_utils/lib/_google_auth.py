@@ -0,0 +1,104 @@
+import hashlib
+import json
+import threading
+import time
+
+from dagster import get_dagster_logger
+
+from ._transport import get_http_transport
+
+logger = get_dagster_logger()
+
+GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
+
+
+class GoogleTokenManager:
+    """Caches the Google OAuth access token for a set of credentials.
+
+    The token is reused until `expiry_margin` seconds before it expires, at which point callers
+    block on a refresh. Within `refresh_ahead` seconds of expiry, a refresh is started in the
+    background so callers normally never wait on the token endpoint.
+    """
+
+    def __init__(
+        self,
+        credentials: dict,
+        expiry_margin: int = 60,
+        refresh_ahead: int = 300,
+    ):
+        self._credentials = credentials
+        self.expiry_margin = expiry_margin
+        self.refresh_ahead = refresh_ahead
+
+        self._token = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_token(self) -> str:
+        now = time.monotonic()
+
+        if self._token is None or now >= self._expires_at - self.expiry_margin:
+            with self._lock:
+                if (
+                    self._token is None
+                    or time.monotonic() >= self._expires_at - self.expiry_margin
+                ):
+                    self._refresh()
+        elif now >= self._expires_at - self.refresh_ahead:
+            self._refresh_in_background()
+
+        return self._token
+
+    def invalidate(self) -> None:
+        """Drops the cached token, e.g. after a request was rejected with a 401."""
+        with self._lock:
+            self._token = None
+            self._expires_at = 0.0
+
+    def _refresh(self) -> None:
+        r = get_http_transport().request(
+            "POST", GOOGLE_TOKEN_URL, data=self._credentials
+        )
+        r.raise_for_status()
+        token_res = r.json()
+
+        self._token = token_res["access_token"]
+        self._expires_at = time.monotonic() + token_res.get("expires_in", 3600)
+        logger.info("Generated Google access token")
+
+    def _refresh_in_background(self) -> None:
+        # Only one refresh at a time, callers keep using the current token meanwhile
+        if not self._lock.acquire(blocking=False):
+            return
+
+        def _refresh_and_release():
+            try:
+                self._refresh()
+            except Exception as e:
+                logger.warning(f"Background refresh of Google access token failed: {e}")
+            finally:
+                self._lock.release()
+
+        threading.Thread(target=_refresh_and_release, daemon=True).start()
+
+
+_token_managers = {}
+_token_managers_lock = threading.Lock()
+
+
+def get_google_token_manager(credentials: dict) -> GoogleTokenManager:
+    """Returns the process-wide token manager for the given credentials, so every Google
+    resource using the same credentials shares one access token."""
+    key = hashlib.sha256(
+        json.dumps(credentials, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+    with _token_managers_lock:
+        if key not in _token_managers:
+            _token_managers[key] = GoogleTokenManager(credentials)
+        return _token_managers[key]
+
+
+def clear_google_token_managers() -> None:
+    with _token_managers_lock:
+        _token_managers.clear()
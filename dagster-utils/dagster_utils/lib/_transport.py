@@ -0,0 +1,178 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+from dagster import MetadataValue, get_dagster_logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from dagster_utils.utils import record_span
+
+logger = get_dagster_logger()
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HttpMetrics:
+    """Latency and bytes of the HTTP requests made while collecting."""
+
+    def __init__(self):
+        self.requests = []
+
+    def record(self, method: str, url: str, status: int, seconds: float, size: int):
+        self.requests.append(
+            {
+                "method": method,
+                "host": urlparse(url).netloc,
+                "status": status,
+                "seconds": seconds,
+                "bytes": size,
+            }
+        )
+
+    def to_metadata(self) -> dict:
+        if not self.requests:
+            return {"HTTP requests": MetadataValue.int(0)}
+
+        latencies = sorted(req["seconds"] for req in self.requests)
+        by_host = {}
+        for req in self.requests:
+            host = by_host.setdefault(req["host"], {"requests": 0, "bytes": 0})
+            host["requests"] += 1
+            host["bytes"] += req["bytes"]
+
+        return {
+            "HTTP requests": MetadataValue.int(len(self.requests)),
+            "HTTP time (s)": MetadataValue.float(round(sum(latencies), 3)),
+            "HTTP p50 latency (ms)": MetadataValue.float(
+                round(latencies[len(latencies) // 2] * 1000, 1)
+            ),
+            "HTTP max latency (ms)": MetadataValue.float(
+                round(latencies[-1] * 1000, 1)
+            ),
+            "HTTP bytes received": MetadataValue.int(
+                sum(req["bytes"] for req in self.requests)
+            ),
+            "HTTP requests by host": MetadataValue.json(by_host),
+        }
+
+
+_active_metrics = contextvars.ContextVar("dagster_utils_http_metrics", default=())
+
+
+@contextmanager
+def collect_http_metrics():
+    """Collects the metrics of every request made through the shared transport within the
+    context, e.g. to attach them as output metadata of the op making the requests."""
+    metrics = HttpMetrics()
+    token = _active_metrics.set(_active_metrics.get() + (metrics,))
+    try:
+        yield metrics
+    finally:
+        _active_metrics.reset(token)
+
+
+class HttpTransport:
+    """Pooled HTTP session with retries, timeouts and a per-host concurrency limit.
+
+    Args:
+        pool_maxsize (int, optional): Keep-alive connections kept per host.
+        max_concurrency_per_host (int, optional): In-flight requests allowed per host across
+            threads. Defaults to `pool_maxsize`.
+        max_retries (int, optional): Retries on connection errors and retryable statuses,
+            with exponential backoff honouring `Retry-After`.
+        backoff_factor (float, optional): Base of the exponential backoff, in seconds.
+        timeout (tuple, optional): Default (connect, read) timeout in seconds.
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = 16,
+        max_concurrency_per_host: Optional[int] = None,
+        max_retries: int = 5,
+        backoff_factor: float = 0.5,
+        timeout: tuple = (10, 120),
+    ):
+        self.timeout = timeout
+        self.max_concurrency_per_host = max_concurrency_per_host or pool_maxsize
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_maxsize,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._host_semaphores = {}
+        self._host_semaphores_lock = threading.Lock()
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._host_semaphores_lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(
+                    self.max_concurrency_per_host
+                )
+            return self._host_semaphores[host]
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+
+        with self._host_semaphore(url):
+            start = time.perf_counter()
+            r = self._send(method, url, **kwargs)
+            elapsed = time.perf_counter() - start
+
+        size = _response_size(r, kwargs.get("stream", False))
+        for metrics in _active_metrics.get():
+            metrics.record(method, url, r.status_code, elapsed, size)
+        record_span("HTTP", elapsed, size)
+
+        return r
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        return self.session.request(method, url, **kwargs)
+
+
+def _response_size(r: requests.Response, stream: bool) -> int:
+    # Reading the content of a streamed response would load the whole body in memory
+    if stream:
+        return int(r.headers.get("Content-Length") or 0)
+    return len(r.content)
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_http_transport() -> HttpTransport:
+    """Returns the process-wide transport, so all clients share one connection pool."""
+    global _transport
+
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HttpTransport()
+    return _transport
+
+
+def set_http_transport(transport: Optional[HttpTransport]) -> Optional[HttpTransport]:
+    """Replaces the process-wide transport, returning the previous one."""
+    global _transport
+
+    with _transport_lock:
+        previous, _transport = _transport, transport
+    return previous
@@ -1,8 +1,9 @@
-from typing import Optional
+from typing import Any, Iterable, Optional
 
-import pandas as pd
 from dagster import usable_as_dagster_type
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
+
+from ._frames import is_sink_frame
 
 
 @usable_as_dagster_type
@@ -34,9 +35,36 @@ class UtilsSinkInputType(BaseModel):
 
     """Represents the type that should be used to load data into a utils-defined sink.
     Setting `load_to_snow` to True will trigger the Snowflake IO Manager and save the data
-    into a Snowflake table"""
+    into a Snowflake table. `data` is a pandas DataFrame, a `pyarrow.Table` or a Polars
+    DataFrame, Arrow and Polars frames are written to parquet without going through pandas"""
+
+    dest_asset: str
+    load_to_snow: bool = False
+    data: Any
+    meta: Optional[dict]
+
+    @validator("data")
+    def _check_data(cls, v):
+        if not is_sink_frame(v):
+            raise TypeError(
+                "data must be a pandas DataFrame, a pyarrow Table or a Polars DataFrame"
+            )
+        return v
+
+
+@usable_as_dagster_type
+class UtilsChunkedSinkInputType(BaseModel):
+    class Config:
+        arbitrary_types_allowed = True
+
+    """Variant of `UtilsSinkInputType` whose data is an iterable of chunks, each a pandas,
+    Polars or Arrow frame or an Arrow record batch, so data larger than memory can be
+    produced chunk by chunk, e.g. from a generator. Chunks must share their columns and types.
+
+    The IO manager consumes the chunks once, storing them as parquet. Loaded back, `chunks`
+    reads the stored parquet one batch at a time."""
 
     dest_asset: str
     load_to_snow: bool = False
-    data: pd.DataFrame
+    chunks: Iterable
     meta: Optional[dict]
@@ -3,16 +3,20 @@ import json
 import os
 from typing import Optional
 
-import requests
 from dagster import Field, List, Out, get_dagster_logger, op
 
-from dagster_utils.utils import check, safeget
+from dagster_utils.utils import check, compile_path, safeget, trace_step
 
 from ._base_middleware import BaseGoogleAPI
+from ._transport import collect_http_metrics
 from ._types import UtilsFileSystemOutputType
 
 logger = get_dagster_logger()
 
+_get_message_parts = compile_path("payload", "parts")
+_get_attachment_id = compile_path("body", "attachmentId")
+_get_filename = compile_path("filename")
+
 
 # ###############################
 # DAGSTER SPECIFIC
@@ -32,7 +36,10 @@ logger = get_dagster_logger()
     out=Out(List[UtilsFileSystemOutputType]),
 )
 def fetch_from_gmail(context) -> List[UtilsFileSystemOutputType]:
-    return context.resources.gmail.fetch(context.op_config)
+    with trace_step() as tracer, collect_http_metrics() as http_metrics:
+        attachments = context.resources.gmail.fetch(context.op_config)
+    context.add_output_metadata({**tracer.to_metadata(), **http_metrics.to_metadata()})
+    return attachments
 
 
 # ###############################
@@ -81,10 +88,10 @@ class UtilsGMailClient(BaseGoogleAPI):
         message_id = check.str_param(message_id, "message_id")
         message_contents = self._messages_get(message_id=message_id)
         attachments_res = []
-        for part in safeget(message_contents, "payload", "parts"):
+        for part in _get_message_parts(message_contents):
             if self._is_attachment_part(part):
-                attachment_id = safeget(part, "body", "attachmentId")
-                attachment_filename = safeget(part, "filename")
+                attachment_id = _get_attachment_id(part)
+                attachment_filename = _get_filename(part)
                 attachment_contents = self._attachments_get(message_id, attachment_id)
                 attachments_res.append(
                     UtilsFileSystemOutputType(
@@ -106,10 +113,10 @@ class UtilsGMailClient(BaseGoogleAPI):
             f"Querying Google get messages API for message id {message_id} with parameters {json.dumps(queryparams)}"
         )
 
-        r = requests.get(
+        r = self._request(
+            "GET",
             f"{self.uri}/users/me/messages/{message_id}",
             params=queryparams,
-            headers=self._headers,
         )
 
         return r.json()
@@ -122,9 +129,9 @@ class UtilsGMailClient(BaseGoogleAPI):
             f"Querying Google get attachments API for message id {message_id} and attachment id {attachment_id}"
         )
 
-        r = requests.get(
+        r = self._request(
+            "GET",
             f"{self.uri}/users/me/messages/{message_id}/attachments/{attachment_id}",
-            headers=self._headers,
         )
 
         return r.json()
@@ -136,10 +143,10 @@ class UtilsGMailClient(BaseGoogleAPI):
             f"Querying Google modify messages API for message id {message_id} with params {json.dumps(json_body)}"
         )
 
-        r = requests.post(
+        r = self._request(
+            "POST",
             f"{self.uri}/users/me/messages/{message_id}/modify",
             json=json_body,
-            headers=self._headers,
         )
 
         return r.json()
@@ -147,10 +154,7 @@ class UtilsGMailClient(BaseGoogleAPI):
     def _is_attachment_part(self, part: dict) -> bool:
         part = check.dict_param(part, "part")
 
-        if (
-            part.get("filename", "") != ""
-            and safeget(part, "body", "attachmentId") != None
-        ):
+        if part.get("filename", "") != "" and _get_attachment_id(part) != None:
             return True
         else:
             return False
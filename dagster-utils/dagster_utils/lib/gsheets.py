@@ -1,12 +1,13 @@
 import os
 from typing import Optional
 
-import requests
 from dagster import Config, List, OpExecutionContext, Out, get_dagster_logger, op
 
+from dagster_utils.utils import trace_step
 from dagster_utils.utils.dicts import safeget
 
 from ._base_middleware import BaseGoogleAPI
+from ._transport import collect_http_metrics
 from ._types import UtilsFileSystemOutputType
 
 logger = get_dagster_logger()
@@ -33,7 +34,7 @@ class UtilsGSheetsClient(BaseGoogleAPI):
         if sheet_name:
             uri += f"sheet={sheet_name}"
 
-        r = requests.get(uri, headers=self._headers)
+        r = self._request("GET", uri)
 
         return UtilsFileSystemOutputType(
             filename=f"{key}.csv",
@@ -43,9 +44,9 @@ class UtilsGSheetsClient(BaseGoogleAPI):
     def fetch(self, options) -> list[UtilsFileSystemOutputType]:
         res = []
         for key, sheet_id in safeget(options, "sheet_mapping").items():
-            r = requests.get(
+            r = self._request(
+                "GET",
                 f"https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&",
-                headers=self._headers,
             )
 
             res.append(
@@ -77,10 +78,14 @@ class FetchFromGSheetsConfig(Config):
     out=Out(dagster_type=List[UtilsFileSystemOutputType]),
 )
 def fetch_from_gsheets(
+    context: OpExecutionContext,
     config: FetchFromGSheetsConfig,
     gsheets: UtilsGSheetsClient,
 ) -> List[UtilsFileSystemOutputType]:
-    return gsheets.fetch(config.dict())
+    with trace_step() as tracer, collect_http_metrics() as http_metrics:
+        sheets = gsheets.fetch(config.dict())
+    context.add_output_metadata({**tracer.to_metadata(), **http_metrics.to_metadata()})
+    return sheets
 
 
 @op(
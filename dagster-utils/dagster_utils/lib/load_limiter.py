@@ -0,0 +1,262 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from dagster import ConfigurableResource, InitResourceContext, get_dagster_logger
+from pydantic import PrivateAttr
+
+from dagster_utils.utils import record_span
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = get_dagster_logger()
+
+
+def advisory_lock_key(name: str) -> int:
+    """Postgres advisory locks are keyed by a signed 64-bit integer."""
+    digest = hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class _PostgresLocks:
+    """Advisory locks taken on a single connection, opened on first use and shared by the
+    loads of the process. Advisory locks belong to the session, so they're released if the
+    process dies.
+
+    A session can take the same advisory lock again, so the locks it holds are tracked here
+    and reported busy to the other loads of the process."""
+
+    def __init__(self, postgres_url: str):
+        self.postgres_url = postgres_url
+        self._conn = None
+        self._held = set()
+        self._lock = threading.Lock()
+
+    def try_lock(self, name: str) -> bool:
+        key = advisory_lock_key(name)
+        with self._lock:
+            if key in self._held:
+                return False
+            if self._conn is None:
+                import psycopg2
+
+                self._conn = psycopg2.connect(self.postgres_url)
+                self._conn.autocommit = True
+            try:
+                with self._conn.cursor() as cursor:
+                    cursor.execute("SELECT pg_try_advisory_lock(%s)", (key,))
+                    acquired = cursor.fetchone()[0]
+            except Exception:
+                # Reconnects on the next attempt, unless the session still holds locks
+                if not self._held:
+                    self._conn.close()
+                    self._conn = None
+                raise
+            if acquired:
+                self._held.add(key)
+            return acquired
+
+    def unlock(self, name: str) -> None:
+        key = advisory_lock_key(name)
+        with self._lock:
+            if key not in self._held:
+                return
+            self._held.discard(key)
+            with self._conn.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (key,))
+
+
+class _FileLocks:
+    """Locks on files of `lock_dir`, released when their descriptors are closed."""
+
+    def __init__(self, lock_dir: str):
+        if fcntl is None:
+            raise RuntimeError("Local load locks need fcntl, configure a postgres_url")
+        self.lock_dir = lock_dir
+        self._fds = {}
+        self._lock = threading.Lock()
+
+    def try_lock(self, name: str) -> bool:
+        path = os.path.join(self.lock_dir, f"{advisory_lock_key(name) & (2**64 - 1):x}")
+        with self._lock:
+            if name in self._fds:
+                return False
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return False
+            self._fds[name] = fd
+            return True
+
+    def unlock(self, name: str) -> None:
+        with self._lock:
+            fd = self._fds.pop(name, None)
+            if fd is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+
+class LoadSlot:
+    """Locks held by a load, see `UtilsLoadLimiter.acquire`."""
+
+    def __init__(self, locks, names: list[str], wait_seconds: float):
+        self.wait_seconds = wait_seconds
+        # Names of the locks held, the table's first
+        self.names = names
+        self._locks = locks
+
+    def release(self) -> None:
+        while self.names:
+            self._locks.unlock(self.names.pop())
+
+
+class UtilsLoadLimiter(ConfigurableResource):
+    """Caps the warehouse loads running at once across runs, and runs the loads of a table
+    one at a time so their DELETEs don't conflict.
+
+    Locks are Postgres advisory locks, in the instance's database unless `postgres_url` is
+    set, so they hold across the run workers of a deployment. The loads of a process share a
+    single connection. Instances without Postgres storage, e.g. local development, lock files
+    in `lock_dir` instead, which only hold on a single host. A warning is logged when that
+    falls back to the system's temporary directory, as loads of other hosts aren't limited.
+
+    Args:
+        max_concurrent_loads (int, optional): Loads running at once per warehouse.
+        postgres_url (Optional[str], optional): Database holding the locks.
+        lock_dir (Optional[str], optional): Directory of the lock files used without Postgres.
+            Defaults to the system's temporary directory.
+        poll_interval (float, optional): Seconds between attempts to acquire a busy lock.
+        timeout (Optional[float], optional): Seconds after which waiting for a slot raises a
+            TimeoutError. Defaults to waiting forever.
+
+    Examples:
+        .. code-block:: python
+
+            utils_snow = UtilsSnowflakeClient(
+                ...,
+                load_limiter=UtilsLoadLimiter(max_concurrent_loads=4),
+            )
+    """
+
+    max_concurrent_loads: int = 4
+    postgres_url: Optional[str] = None
+    lock_dir: Optional[str] = None
+    poll_interval: float = 0.5
+    timeout: Optional[float] = None
+
+    _instance_postgres_url = PrivateAttr(default=None)
+    _lock_store = PrivateAttr(default=None)
+
+    def setup_for_execution(self, context: InitResourceContext) -> None:
+        run_storage = getattr(context.instance, "run_storage", None)
+        self._instance_postgres_url = getattr(run_storage, "postgres_url", None)
+        self._lock_store = None
+
+    def _locks(self):
+        if self._lock_store is None:
+            postgres_url = self.postgres_url or self._instance_postgres_url
+            if postgres_url:
+                self._lock_store = _PostgresLocks(postgres_url)
+            elif self.lock_dir:
+                self._lock_store = _FileLocks(self.lock_dir)
+            else:
+                logger.warning(
+                    "Load locks fall back to lock files in the temporary directory, so only "
+                    "the loads of this host are limited. Use Postgres run storage, or set "
+                    "postgres_url or lock_dir."
+                )
+                self._lock_store = _FileLocks(tempfile.gettempdir())
+        return self._lock_store
+
+    @staticmethod
+    def _table_lock_name(table: str) -> str:
+        return f"dagster_utils:table:{table.upper()}"
+
+    def _slot_lock_names(self, warehouse: str) -> list[str]:
+        return [
+            f"dagster_utils:warehouse:{warehouse.upper()}:{i}"
+            for i in range(self.max_concurrent_loads)
+        ]
+
+    def acquire(self, warehouse: str, table: str) -> LoadSlot:
+        """Blocks until the table is free and the warehouse has a free slot, then holds both
+        until the returned slot is released. The wait is recorded as the "Load slot wait"
+        span."""
+        start = time.perf_counter()
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+
+        locks = self._locks()
+        load_slot = LoadSlot(locks, [], 0.0)
+        try:
+            load_slot.names.append(
+                self._wait_for_any(
+                    locks, [self._table_lock_name(table)], deadline, f"table {table}"
+                )
+            )
+            load_slot.names.append(
+                self._wait_for_any(
+                    locks,
+                    self._slot_lock_names(warehouse),
+                    deadline,
+                    f"warehouse {warehouse}",
+                )
+            )
+        except BaseException:
+            load_slot.release()
+            raise
+
+        wait_seconds = time.perf_counter() - start
+        record_span("Load slot wait", wait_seconds)
+        if wait_seconds > self.poll_interval:
+            logger.info(f"Waited {wait_seconds:.1f}s for a load slot for {table}")
+        load_slot.wait_seconds = wait_seconds
+        return load_slot
+
+    def try_acquire(self, warehouse: str, table: str) -> Optional[LoadSlot]:
+        """Like `acquire`, but returns None right away if the table or the warehouse is busy."""
+        locks = self._locks()
+        load_slot = LoadSlot(locks, [], 0.0)
+        try:
+            for names in [
+                [self._table_lock_name(table)],
+                self._slot_lock_names(warehouse),
+            ]:
+                name = next((name for name in names if locks.try_lock(name)), None)
+                if name is None:
+                    load_slot.release()
+                    return None
+                load_slot.names.append(name)
+        except BaseException:
+            load_slot.release()
+            raise
+        return load_slot
+
+    @contextmanager
+    def slot(self, warehouse: str, table: str):
+        """Holds a load slot for the enclosed block, see `acquire`."""
+        load_slot = self.acquire(warehouse, table)
+        try:
+            yield load_slot
+        finally:
+            load_slot.release()
+
+    def _wait_for_any(
+        self, locks, names: list[str], deadline: Optional[float], what: str
+    ) -> str:
+        """Polls until one of the named locks is taken on `locks`, returning its name."""
+        while True:
+            for name in names:
+                if locks.try_lock(name):
+                    return name
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out waiting for a load slot on {what}")
+            time.sleep(self.poll_interval)
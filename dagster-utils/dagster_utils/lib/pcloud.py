@@ -19,11 +19,19 @@ from dagster import (
     op,
     schedule,
 )
+from dagster._core.storage.pipeline_run import RunsFilter
+from dagster._core.storage.tags import (
+    ASSET_PARTITION_RANGE_END_TAG,
+    ASSET_PARTITION_RANGE_START_TAG,
+    RUN_KEY_TAG,
+    SCHEDULE_NAME_TAG,
+)
 from pydantic import PrivateAttr
 
-from dagster_utils.utils import check
+from dagster_utils.utils import check, trace_step
 
 from ._base_middleware import BaseMiddleware
+from ._transport import collect_http_metrics
 from ._types import UtilsFileSystemOutputType
 
 logger = get_dagster_logger()
@@ -51,6 +59,10 @@ class UtilspCloudClient(
         "type": "parameterStore",
     }
 
+    def __init__(self, **data):
+        super().__init__(**data)
+        self._register_auth_config()
+
     @property
     def headers(self):
         if not hasattr(self, "_headers"):
@@ -59,9 +71,7 @@ class UtilspCloudClient(
 
     @property
     def session(self):
-        if not hasattr(self, "_session"):
-            self._session = requests.Session()
-        return self._session
+        return self.transport.session
 
     @property
     def now(self):
@@ -77,7 +87,10 @@ class UtilspCloudClient(
         self.close_session()
 
     def close_session(self):
-        self.session.close()
+        """Drops the auth headers and clock cached for the session. Connections belong to the
+        shared transport pool and are kept alive for reuse by other clients."""
+        for attr in ("_headers", "_now"):
+            self.__dict__.pop(attr, None)
 
     def list_files_in_folder_id(self, folder_id, params={}) -> dict:
         folder_res = self._make_session_request(
@@ -114,6 +127,24 @@ class UtilspCloudClient(
 
         return folder_to_process
 
+    def list_year_folder_names(
+        self, root_folder_id, year: Optional[int] = None
+    ) -> list:
+        """Names of the folders to process under the year folder of the root folder, the
+        current year by default. Work in progress (WIP) folders are left out."""
+        pcloud_root_res = self.list_files_in_folder_id(
+            root_folder_id, {"recursive": True, "nofiles": True}
+        )["contents"]
+
+        year = str(year or self.now.year)
+        return [
+            folder["name"]
+            for item in pcloud_root_res
+            if item["name"] == year
+            for folder in item["contents"]
+            if "WIP" not in folder["name"].upper()
+        ]
+
     def _read_file_by_id(self, file_id: str):
         file_info = self._make_session_request(
             endpoint="stat",
@@ -164,9 +195,9 @@ class UtilspCloudClient(
     ) -> requests.Response:
         req_headers = self.headers if headers is None else headers
 
-        r = self.session.request(
-            method="GET",
-            url=f"{self.base_url}/{endpoint}",
+        r = self._request(
+            "GET",
+            f"{self.base_url}/{endpoint}",
             headers=req_headers,
             params=params,
         )
@@ -190,10 +221,14 @@ class ReadpCloudFilesByIdConfig(Config):
     out=Out(List[UtilsFileSystemOutputType]),
 )
 def read_pcloud_files_by_id(
+    context: OpExecutionContext,
     config: ReadpCloudFilesByIdConfig,
     pcloud: UtilspCloudClient,
 ) -> list:
-    return pcloud.read_files_by_id(config.file_ids)
+    with trace_step() as tracer, collect_http_metrics() as http_metrics:
+        files = pcloud.read_files_by_id(config.file_ids)
+    context.add_output_metadata({**tracer.to_metadata(), **http_metrics.to_metadata()})
+    return files
 
 
 class FetchpCloudRootFolderConfig(Config):
@@ -214,6 +249,24 @@ def fetch_pcloud_root_folder(
     return pcloud.fetch_folder_to_process(config.pcloud_root_folder, folder_name)
 
 
+class FetchpCloudFolderNamesConfig(Config):
+    pcloud_root_folder: str
+    year: Optional[int]
+
+
+@op(
+    description=str(
+        "Lists the names of the folders to process in a pCloud year folder, e.g. as the "
+        "partitions to sync with `sync_dynamic_partitions_op`."
+    ),
+)
+def fetch_pcloud_folder_names(
+    config: FetchpCloudFolderNamesConfig,
+    pcloud: UtilspCloudClient,
+) -> list:
+    return pcloud.list_year_folder_names(config.pcloud_root_folder, config.year)
+
+
 # SCHEDULING
 
 
@@ -227,6 +280,8 @@ def make_pcloud_file_schedule(
     run_config: Optional[dict] = None,
     dynamic_partitions_def: Optional[DynamicPartitionsDefinition] = None,
     multi_partition_spec: Optional[str] = None,
+    max_run_requests_per_tick: Optional[int] = None,
+    max_partitions_per_run: int = 1,
 ) -> ScheduleDefinition:
     """Creates a file schedule that will periodically poll pcloud for modified files.
     Based on a few assumptions:
@@ -248,17 +303,35 @@ def make_pcloud_file_schedule(
         dynamic_partitions_def (Optional[DynamicPartitionsDefinition], optional): If present, the
             schedule will add a dynamic partition before kicking off the run for that partition.
             Defaults to None.
+        max_run_requests_per_tick (Optional[int], optional): Caps the runs requested per tick,
+            e.g. when a new year of folders appears. The folders left over are requested on
+            the next ticks, as long as they are still found modified within `mins_diff`.
+            Defaults to no cap.
+        max_partitions_per_run (int, optional): With `dynamic_partitions_def`, folders whose
+            partitions are next to each other are requested together, up to this many per
+            run, as a partition range run. The job must be able to process partition ranges,
+            e.g. single-run backfill assets. Can't be combined with `multi_partition_spec`.
+            Defaults to a run per folder.
+
+    With either of the last two, folders that already have a run from this schedule, by run
+    key or within a partition range run, are left out before the runs are grouped and capped.
     """
-    now = datetime.now()
+    check.invariant(
+        max_partitions_per_run == 1
+        or (dynamic_partitions_def is not None and not multi_partition_spec),
+        "Partition range runs need a dynamic_partitions_def and no multi_partition_spec",
+    )
+    name = schedule_name if schedule_name else f"{job.name}_schedule"
+    skips_requested = (
+        max_run_requests_per_tick is not None or max_partitions_per_run > 1
+    )
 
-    def _get_mins_diff(date_str, pcloud_now=None):
-        if pcloud_now is not None:
-            now = pcloud_now
+    def _get_mins_diff(date_str, now):
         modified = datetime.strptime(date_str, PCLOUD_DATE_FORMAT).replace(tzinfo=None)
         return (now - modified).total_seconds() / 60
 
     @schedule(
-        name=schedule_name if schedule_name else f"{job.name}_schedule",
+        name=name,
         job=job,
         cron_schedule=cron_schedule,
     )
@@ -274,7 +347,7 @@ def make_pcloud_file_schedule(
         current_year_folder = [
             item["contents"]
             for item in folder_contents
-            if item["name"] == str(now.year)
+            if item["name"] == str(pcloud.now.year)
         ][0]
 
         folders_to_process = [
@@ -314,26 +387,116 @@ def make_pcloud_file_schedule(
                 dynamic_partitions_def.name,
                 folder_names,
             )
+            partition_keys = dynamic_partitions_def.get_partition_keys(
+                dynamic_partitions_store=context.instance
+            )
+            index = {key: i for i, key in enumerate(partition_keys)}
 
-            run_reqs = [
-                RunRequest(
-                    partition_key=f"{folder}|{multi_partition_spec}"
-                    if multi_partition_spec
-                    else folder,
-                    run_key=folder,
-                    run_config=run_config,
-                )
-                for folder in folder_names
+        if skips_requested and folder_names:
+            requested = _get_requested_folders(
+                context.instance,
+                folder_names,
+                partition_keys if max_partitions_per_run > 1 else None,
+            )
+            folder_names = [
+                folder for folder in folder_names if folder not in requested
             ]
+
+        if max_partitions_per_run > 1:
+            groups = _group_partition_ranges(index, folder_names)
         else:
-            run_reqs = [
-                RunRequest(run_key=folder, run_config=run_config)
-                for folder in folder_names
-            ]
+            groups = [[folder] for folder in folder_names]
+
+        if max_run_requests_per_tick is not None:
+            carried_over = sum(
+                len(group) for group in groups[max_run_requests_per_tick:]
+            )
+            groups = groups[:max_run_requests_per_tick]
+            if carried_over:
+                context.log.info(
+                    f"Carrying {carried_over} folders over to the next tick"
+                )
+
+        run_reqs = [_make_run_request(group) for group in groups]
 
         pcloud.close_session()
         return run_reqs
 
+    def _make_run_request(folders: list) -> RunRequest:
+        if dynamic_partitions_def is None:
+            return RunRequest(run_key=folders[0], run_config=run_config)
+        if len(folders) == 1:
+            return RunRequest(
+                partition_key=f"{folders[0]}|{multi_partition_spec}"
+                if multi_partition_spec
+                else folders[0],
+                run_key=folders[0],
+                run_config=run_config,
+            )
+        return RunRequest(
+            run_key=f"{folders[0]}...{folders[-1]}",
+            run_config=run_config,
+            tags={
+                ASSET_PARTITION_RANGE_START_TAG: folders[0],
+                ASSET_PARTITION_RANGE_END_TAG: folders[-1],
+            },
+        )
+
+    def _group_partition_ranges(index: dict, folder_names: list) -> list:
+        """Groups folders whose partitions are consecutive, in partition order, in groups of
+        up to `max_partitions_per_run`."""
+        groups = []
+        for folder in sorted(folder_names, key=index.__getitem__):
+            if (
+                groups
+                and len(groups[-1]) < max_partitions_per_run
+                and index[groups[-1][-1]] == index[folder] - 1
+            ):
+                groups[-1].append(folder)
+            else:
+                groups.append([folder])
+        return groups
+
+    def _get_requested_folders(
+        instance, folder_names: list, partition_keys: Optional[list]
+    ) -> set:
+        """Folders among `folder_names` that already have a run from this schedule, either
+        keyed by the folder or, with `partition_keys`, as part of a partition range run."""
+        runs = instance.get_runs(
+            filters=RunsFilter(
+                tags={SCHEDULE_NAME_TAG: name, RUN_KEY_TAG: folder_names}
+            )
+        )
+        requested = {run.tags.get(RUN_KEY_TAG) for run in runs}
+
+        if partition_keys:
+            # A range run covering a folder starts at most max_partitions_per_run - 1
+            # partitions before it
+            index = {key: i for i, key in enumerate(partition_keys)}
+            range_starts = {
+                partition_keys[i]
+                for folder in folder_names
+                for i in range(
+                    max(index[folder] - max_partitions_per_run + 1, 0),
+                    index[folder] + 1,
+                )
+            }
+            runs = instance.get_runs(
+                filters=RunsFilter(
+                    tags={
+                        SCHEDULE_NAME_TAG: name,
+                        ASSET_PARTITION_RANGE_START_TAG: sorted(range_starts),
+                    }
+                )
+            )
+            for run in runs:
+                start = index.get(run.tags[ASSET_PARTITION_RANGE_START_TAG])
+                end = index.get(run.tags.get(ASSET_PARTITION_RANGE_END_TAG))
+                if start is not None and end is not None:
+                    requested.update(partition_keys[start : end + 1])
+
+        return requested.intersection(folder_names)
+
     return pcloud_file_schedule
 
 
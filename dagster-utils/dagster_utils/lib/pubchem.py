@@ -2,16 +2,21 @@ import json
 import os
 
 import dagster._check as check
-import requests
 from dagster import Config, ConfigurableResource, get_dagster_logger, op
 from pydantic import Field
 
-from dagster_utils.utils.dicts import safeget
+from dagster_utils.utils import trace_step
+from dagster_utils.utils.dicts import compile_path
 
+from ._base_middleware import BaseMiddleware
+from ._transport import collect_http_metrics
 from ._types import UtilsWebAPIOutputType
 
 logger = get_dagster_logger()
 
+_get_compound_props = compile_path("PC_Compounds", 0, "props")
+_get_urn_name = compile_path("urn", "name")
+
 # ###############################
 # DAGSTER SPECIFIC
 # ###############################
@@ -40,10 +45,12 @@ def fetch_pubchem_compound_by_name(
     config: FetchPubChemCompoundByOutputName,
 ) -> UtilsWebAPIOutputType:
     pubchem_resource = context.resources.pubchem
-    obj = pubchem_resource.fetch_compounds_by_name(
-        compounds=config.compounds,
-        return_parameters=config.return_parameters,
-    )
+    with trace_step() as tracer, collect_http_metrics() as http_metrics:
+        obj = pubchem_resource.fetch_compounds_by_name(
+            compounds=config.compounds,
+            return_parameters=config.return_parameters,
+        )
+    context.add_output_metadata({**tracer.to_metadata(), **http_metrics.to_metadata()})
     return obj
 
 
@@ -52,7 +59,7 @@ def fetch_pubchem_compound_by_name(
 # ###############################
 
 
-class UtilsPubChemClient(ConfigurableResource):
+class UtilsPubChemClient(ConfigurableResource, BaseMiddleware):
     uri: str = "https://pubchem.ncbi.nlm.nih.gov/rest/pug"
     return_type: str = "JSON"
 
@@ -70,7 +77,7 @@ class UtilsPubChemClient(ConfigurableResource):
             logger.info(f"Fetching compound with name {compound_name}")
             compound_uri = self._build_pubchem_uri("name", [compound_name])
             compound_contents = self._call_pubchem_api(compound_uri)
-            props = safeget(compound_contents, "PC_Compounds", 0, "props")
+            props = _get_compound_props(compound_contents)
             if props is None:
                 not_found_compounds.append(compound_name)
             else:
@@ -92,7 +99,7 @@ class UtilsPubChemClient(ConfigurableResource):
         return f"{self.uri}/compound/{method}/{'/'.join(*args)}/{self.return_type}"
 
     def _call_pubchem_api(self, uri: str):
-        res = requests.get(uri).json()
+        res = self._request("GET", uri).json()
         return res
 
     def _extract_values_from_compound_contents(
@@ -106,7 +113,7 @@ class UtilsPubChemClient(ConfigurableResource):
                 prop
                 for prop in properties
                 if return_param.label == prop["urn"]["label"]
-                and return_param.name in [safeget(prop, "urn", "name"), None]
+                and return_param.name in [_get_urn_name(prop), None]
             ][0]
 
             value_key = list(filtered["value"].keys())[0]
@@ -0,0 +1,96 @@
+import io
+import threading
+from typing import Optional
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
+from dagster import ConfigurableResource
+
+_s3_clients = {}
+_s3_clients_lock = threading.Lock()
+
+
+def get_s3_client(
+    max_pool_connections: int = 50,
+    max_attempts: int = 10,
+    retry_mode: str = "adaptive",
+    region_name: Optional[str] = None,
+    endpoint_url: Optional[str] = None,
+):
+    """Returns the process-wide S3 client for the given settings, so every resource and op
+    using them shares one connection pool. boto3 clients are thread-safe once created."""
+    key = (max_pool_connections, max_attempts, retry_mode, region_name, endpoint_url)
+
+    with _s3_clients_lock:
+        if key not in _s3_clients:
+            _s3_clients[key] = boto3.session.Session().client(
+                "s3",
+                region_name=region_name,
+                endpoint_url=endpoint_url,
+                config=BotoConfig(
+                    max_pool_connections=max_pool_connections,
+                    retries={"max_attempts": max_attempts, "mode": retry_mode},
+                ),
+            )
+        return _s3_clients[key]
+
+
+def clear_s3_clients() -> None:
+    with _s3_clients_lock:
+        _s3_clients.clear()
+
+
+class UtilsS3Resource(ConfigurableResource):
+    """S3 client shared across the process, with managed transfers tuned for large objects.
+
+    Uploads and downloads above `multipart_threshold` bytes are split in `multipart_chunksize`
+    parts, transferred by up to `max_concurrency` threads. `max_pool_connections` should be at
+    least `max_concurrency` times the number of transfers running at once.
+
+    Examples:
+        .. code-block:: python
+
+            @op
+            def copy_report(s3: UtilsS3Resource):
+                data = s3.download_bytes("my-bucket", "reports/latest.csv")
+                s3.upload_fileobj(io.BytesIO(data), "my-bucket", "reports/archive.csv")
+    """
+
+    region_name: Optional[str] = None
+    endpoint_url: Optional[str] = None
+    max_pool_connections: int = 50
+    max_attempts: int = 10
+    retry_mode: str = "adaptive"
+    multipart_threshold: int = 16 * 1024**2
+    multipart_chunksize: int = 16 * 1024**2
+    max_concurrency: int = 10
+
+    @property
+    def client(self):
+        return get_s3_client(
+            max_pool_connections=self.max_pool_connections,
+            max_attempts=self.max_attempts,
+            retry_mode=self.retry_mode,
+            region_name=self.region_name,
+            endpoint_url=self.endpoint_url,
+        )
+
+    @property
+    def transfer_config(self) -> TransferConfig:
+        return TransferConfig(
+            multipart_threshold=self.multipart_threshold,
+            multipart_chunksize=self.multipart_chunksize,
+            max_concurrency=self.max_concurrency,
+        )
+
+    def upload_fileobj(self, fileobj, bucket: str, key: str, **kwargs) -> None:
+        self.client.upload_fileobj(
+            fileobj, bucket, key, Config=self.transfer_config, **kwargs
+        )
+
+    def download_bytes(self, bucket: str, key: str) -> bytes:
+        """Downloads an object into memory, fetching byte ranges in parallel when large."""
+        buffer = io.BytesIO()
+        self.client.download_fileobj(bucket, key, buffer, Config=self.transfer_config)
+        return buffer.getvalue()
@@ -1,26 +1,101 @@
+import re
+import time
+import uuid
+from typing import Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from dagster import (
     ConfigurableResource,
     MetadataValue,
-    Optional,
     OutputContext,
     get_dagster_logger,
 )
 from pydantic import PrivateAttr
 from snowflake.sqlalchemy import URL
-from sqlalchemy import create_engine
+from sqlalchemy import bindparam, create_engine, text
+
+from dagster_utils.utils import span
+
+from .load_limiter import UtilsLoadLimiter
 
 logger = get_dagster_logger()
 
+LANDING_PARTITION_COLUMN = "PARTITION"
+LANDING_LOADED_AT_COLUMN = "SOURCE_LOAD_AT"
+
+
+def arrow_to_snowflake_type(arrow_type: pa.DataType) -> str:
+    """Snowflake column type able to hold the values of an Arrow type, as written to parquet."""
+    if pa.types.is_dictionary(arrow_type):
+        return arrow_to_snowflake_type(arrow_type.value_type)
+    if pa.types.is_boolean(arrow_type):
+        return "BOOLEAN"
+    if pa.types.is_integer(arrow_type):
+        return "NUMBER(38, 0)"
+    if pa.types.is_floating(arrow_type):
+        return "FLOAT"
+    if pa.types.is_decimal(arrow_type):
+        return f"NUMBER({arrow_type.precision}, {arrow_type.scale})"
+    if pa.types.is_timestamp(arrow_type):
+        return "TIMESTAMP_TZ" if arrow_type.tz is not None else "TIMESTAMP_NTZ"
+    if pa.types.is_date(arrow_type):
+        return "DATE"
+    if pa.types.is_time(arrow_type):
+        return "TIME"
+    if pa.types.is_binary(arrow_type) or pa.types.is_large_binary(arrow_type):
+        return "BINARY"
+    if pa.types.is_list(arrow_type) or pa.types.is_large_list(arrow_type):
+        return "ARRAY"
+    if pa.types.is_struct(arrow_type) or pa.types.is_map(arrow_type):
+        return "OBJECT"
+    # Strings, and all-null columns whose type can't be known yet
+    return "VARCHAR"
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + str(name).upper().replace('"', '""') + '"'
+
 
 class UtilsSnowflakeClient(ConfigurableResource):
+    """Loads staged files into the Snowflake landing area.
+
+    With `async_loads`, the DELETE and COPY of a load are submitted together as an async
+    query and `copy_into_landing_area` returns right away, so a step can write its other
+    outputs while the warehouse works. Submitted loads are polled with exponential backoff,
+    from `poll_interval` up to `max_poll_interval` seconds, by `wait_for_loads`.
+
+    With `typed_columns`, frames are loaded into one typed column per frame column instead of a
+    single VARIANT `DATA` column. The landing table is created from the frame's Arrow schema,
+    new columns are added as they appear, and files are copied with `MATCH_BY_COLUMN_NAME`.
+
+    With a `load_limiter`, each load holds a slot of the warehouse and a lock on its table
+    from its DELETE until its COPY has finished, including async loads. A client never waits
+    for a slot while its own async loads hold some, these are awaited first, so steps can't
+    end up waiting on themselves or on each other.
+
+    Dagster 1.4 can't nest resources with teardown, so loads are flushed by the resource using
+    this one (e.g. `UtilsS3IOManager`) rather than on this resource's own teardown.
+    """
+
     stage: str = "ETLHUB_LOADS"
     account: str
     user: str
     password: str
     database: str
     warehouse: str
+    async_loads: bool = False
+    poll_interval: float = 1.0
+    max_poll_interval: float = 30.0
+    typed_columns: bool = False
+    load_limiter: Optional[UtilsLoadLimiter] = None
 
     _conn = PrivateAttr()
+    _pending_loads = PrivateAttr(default_factory=dict)
+    # Loads awaited to free their slots, reported by the next `wait_for_loads`
+    _finished_loads = PrivateAttr(default_factory=dict)
+    _landing_columns = PrivateAttr(default_factory=dict)
 
     def setup_for_execution(self, _):
         url = URL(
@@ -32,54 +107,380 @@ class UtilsSnowflakeClient(ConfigurableResource):
             timezone="UTC",
         )
         self._conn = create_engine(url).connect()
+        self._pending_loads = {}
+        self._finished_loads = {}
+
+    @property
+    def has_pending_loads(self) -> bool:
+        return bool(self._pending_loads or self._finished_loads)
 
-    def copy_into_landing_area(self, context: OutputContext, remote_filepath):
+    def _get_landing_table(self, context: OutputContext) -> tuple[str, str]:
         asset_key_path = context.asset_key.path
         schema = asset_key_path[-2] if len(asset_key_path) > 1 else "src_landing"
-        table = asset_key_path[-1]
+        return schema, asset_key_path[-1]
+
+    def get_load_config(self, context: OutputContext) -> dict:
+        """Settings deciding where and how an output is loaded, which an output must be loaded
+        again after any of them changed."""
+        schema, table = self._get_landing_table(context)
+        return {
+            "account": self.account,
+            "database": self.database,
+            "schema": schema,
+            "table": table,
+            "typed_columns": self.typed_columns,
+        }
+
+    def prepare_landing_frame(
+        self,
+        context: OutputContext,
+        df: Union[pd.DataFrame, pa.Table],
+        loaded_at: Optional[pd.Timestamp] = None,
+    ) -> Union[pd.DataFrame, pa.Table]:
+        """Adds the load columns the COPY fills in itself in VARIANT mode, since typed loads
+        match columns by name and can't transform the staged file. Pass `loaded_at` to give
+        all the chunks of a load the same load time."""
+        if not self.typed_columns:
+            return df
+
+        load_columns = {
+            LANDING_LOADED_AT_COLUMN: loaded_at or pd.Timestamp.now(tz="UTC")
+        }
+        if context.has_asset_partitions:
+            load_columns[LANDING_PARTITION_COLUMN] = context.asset_partition_key
+
+        if isinstance(df, pa.Table):
+            for name, value in load_columns.items():
+                scalar = pa.scalar(value)
+                df = df.append_column(
+                    name, pc.fill_null(pa.nulls(df.num_rows, scalar.type), scalar)
+                )
+            return df
+        return df.assign(**load_columns)
+
+    def copy_into_landing_area(
+        self,
+        context: OutputContext,
+        remote_filepath,
+        stage: Optional[str] = None,
+        arrow_schema: Optional[pa.Schema] = None,
+    ):
+        schema, table = self._get_landing_table(context)
         if context.has_asset_partitions:
             partition_key = context.asset_partition_key
             print(partition_key)
         else:
             partition_key = None
-        self._conn.execute(
-            self._get_landing_cleanup_statement(table, schema, partition_key)
-        )
-        self._conn.execute(
-            self._get_copy_into_statement(remote_filepath, table, schema, partition_key)
+
+        cleanup_statement = self._get_landing_cleanup_statement(
+            table, schema, partition_key
         )
+        if self.typed_columns:
+            if arrow_schema is None:
+                raise ValueError("Typed loads need the Arrow schema of the loaded file")
+            with span("Snowflake DDL"):
+                self._ensure_landing_table(schema, table, arrow_schema)
+            copy_statement = self._get_typed_copy_into_statement(
+                remote_filepath, table, schema, partition_key, stage
+            )
+        else:
+            copy_statement = self._get_copy_into_statement(
+                remote_filepath, table, schema, partition_key, stage
+            )
+
+        load_slot = self._acquire_load_slot(schema, table)
+        if load_slot is not None:
+            yield {
+                "Load slot wait (s)": MetadataValue.float(
+                    round(load_slot.wait_seconds, 3)
+                )
+            }
+
+        if self.async_loads:
+            try:
+                with span("Snowflake submit"):
+                    query_id = self._submit_async(
+                        self._get_load_block([cleanup_statement, copy_statement])
+                    )
+            except BaseException:
+                self._release_load_slot(load_slot)
+                raise
+            self._pending_loads[query_id] = {
+                "table": f"{schema}.{table}",
+                "submitted_at": time.monotonic(),
+                "load_slot": load_slot,
+            }
+            # Whether the load succeeded is only known once `wait_for_loads` returns
+            yield {
+                "Snowflake query id": MetadataValue.text(query_id),
+                "Snowflake load": MetadataValue.text("submitted"),
+            }
+        else:
+            try:
+                with span("Snowflake DELETE"):
+                    self._conn.execute(cleanup_statement)
+                with span("Snowflake COPY"):
+                    self._conn.execute(copy_statement)
+            finally:
+                self._release_load_slot(load_slot)
 
         yield {
             "Query": MetadataValue.text(self._get_select_statement(table, schema, None))
         }
 
+    def put_into_landing_area(
+        self,
+        context: OutputContext,
+        file_obj,
+        filename: str,
+        arrow_schema: Optional[pa.Schema] = None,
+    ):
+        """Uploads a file to the landing table's internal stage and copies it from there,
+        skipping the round trip through S3 and the external stage for small files.
+
+        Args:
+            context (OutputContext): Context of the output being loaded
+            file_obj (io.BytesIO): File contents
+            filename (str): Name of the file in the table stage, its extension is used as the
+                file format. Files with the same name are overwritten.
+            arrow_schema (Optional[pa.Schema], optional): Schema of the file, required with
+                `typed_columns`.
+        """
+        schema, table = self._get_landing_table(context)
+        table_stage = f"@{schema}.%{table}"
+
+        with span("Snowflake PUT", file_obj.getbuffer().nbytes):
+            self._put_file(file_obj, filename, table_stage)
+
+        yield {"Snowflake stage path": MetadataValue.text(f"{table_stage}/{filename}")}
+        yield from self.copy_into_landing_area(
+            context, filename, stage=table_stage, arrow_schema=arrow_schema
+        )
+
+    def wait_for_loads(self) -> dict:
+        """Blocks until every submitted load has finished, raising if any of them failed.
+
+        Returns:
+            dict: Metadata with the table, status and warehouse elapsed time of each load, by
+                query id
+        """
+        self._await_pending_loads()
+        loads, self._finished_loads = self._finished_loads, {}
+        return {"Snowflake loads": MetadataValue.json(loads)}
+
+    def _await_pending_loads(self) -> None:
+        """Polls every submitted load until it has finished. A failed load doesn't stop the
+        polling of the others, the first failure is raised once all of them are done and
+        the others are logged."""
+        pending = dict(self._pending_loads)
+        self._pending_loads = {}
+        running = set(pending)
+        failures = {}
+
+        delay = self.poll_interval
+        try:
+            with span("Snowflake wait"):
+                while running:
+                    still_running = set()
+                    for qid in [qid for qid in pending if qid in running]:
+                        try:
+                            if self._is_query_running(qid):
+                                still_running.add(qid)
+                                continue
+                        except Exception as e:
+                            failures[qid] = e
+                        self._release_load_slot(pending[qid].get("load_slot"))
+                    running = still_running
+                    if running:
+                        time.sleep(delay)
+                        delay = min(delay * 2, self.max_poll_interval)
+        finally:
+            # Given back even if the wait is interrupted, e.g. by the step being terminated
+            for load in pending.values():
+                self._release_load_slot(load.get("load_slot"))
+
+        loaded = [qid for qid in pending if qid not in failures]
+        elapsed = self._get_query_elapsed_seconds(loaded)
+        for query_id in loaded:
+            load = pending[query_id]
+            self._finished_loads[query_id] = {
+                "table": load["table"],
+                "status": "loaded",
+                "elapsed_s": elapsed.get(query_id),
+            }
+            logger.info(
+                f"Snowflake load {query_id} into {load['table']} finished after "
+                f"{time.monotonic() - load['submitted_at']:.1f}s"
+            )
+
+        if failures:
+            (first_qid, first_error), *others = failures.items()
+            for query_id, error in others:
+                logger.error(
+                    f"Snowflake load {query_id} into {pending[query_id]['table']} "
+                    f"failed: {error!r}"
+                )
+            raise first_error
+
+    def _acquire_load_slot(self, schema: str, table: str):
+        if self.load_limiter is None:
+            return None
+        warehouse, table = (
+            self.warehouse or "default",
+            f"{self.database}.{schema}.{table}",
+        )
+        if self._pending_loads:
+            load_slot = self.load_limiter.try_acquire(warehouse, table)
+            if load_slot is not None:
+                return load_slot
+            # Waiting while holding slots could wait forever, on our own loads or on those of
+            # steps waiting for ours
+            self._await_pending_loads()
+        return self.load_limiter.acquire(warehouse, table)
+
+    @staticmethod
+    def _release_load_slot(load_slot) -> None:
+        if load_slot is not None:
+            load_slot.release()
+
+    def _ensure_landing_table(
+        self, schema: str, table: str, arrow_schema: pa.Schema
+    ) -> None:
+        """Creates the landing table, or adds the columns it is missing. Columns are never
+        dropped or retyped, so older loads stay readable."""
+        key = (schema.upper(), table.upper())
+        columns = {
+            str(field.name).upper(): arrow_to_snowflake_type(field.type)
+            for field in arrow_schema
+        }
+
+        existing = self._landing_columns.get(key)
+        if existing is None:
+            column_defs = ", ".join(
+                f"{_quote_identifier(name)} {column_type}"
+                for name, column_type in columns.items()
+            )
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {schema}.{table} ({column_defs})"
+            )
+            existing = self._get_table_columns(schema, table)
+
+        missing = [name for name in columns if name not in existing]
+        if missing:
+            logger.info(f"Adding columns {', '.join(missing)} to {schema}.{table}")
+            self._conn.execute(
+                f"ALTER TABLE {schema}.{table} ADD COLUMN "
+                + ", ".join(
+                    f"{_quote_identifier(name)} {columns[name]}" for name in missing
+                )
+            )
+        self._landing_columns[key] = set(existing) | set(missing)
+
+    def _get_table_columns(self, schema: str, table: str) -> set[str]:
+        res = self._conn.execute(
+            text(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = :schema AND table_name = :table"
+            ).bindparams(schema=schema.upper(), table=table.upper())
+        )
+        return {row[0].upper() for row in res.fetchall()}
+
+    def _put_file(self, file_obj, filename: str, stage: str) -> None:
+        cursor = self._conn.connection.cursor()
+        cursor.execute(
+            f"PUT file://{filename} {stage} AUTO_COMPRESS=FALSE OVERWRITE=TRUE",
+            file_stream=file_obj,
+        )
+
+    def _submit_async(self, statement: str) -> str:
+        cursor = self._conn.connection.cursor()
+        cursor.execute_async(statement)
+        return cursor.sfqid
+
+    def _is_query_running(self, query_id: str) -> bool:
+        sf_conn = self._conn.connection
+        return sf_conn.is_still_running(
+            sf_conn.get_query_status_throw_if_error(query_id)
+        )
+
+    def _get_query_elapsed_seconds(self, query_ids: list[str]) -> dict:
+        if not query_ids:
+            return {}
+        res = self._conn.execute(
+            text(
+                "SELECT query_id, total_elapsed_time "
+                "FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY_BY_SESSION()) "
+                "WHERE query_id IN :query_ids"
+            ).bindparams(bindparam("query_ids", value=query_ids, expanding=True))
+        )
+        return {row[0]: row[1] / 1000 for row in res.fetchall()}
+
+    def _get_load_block(self, statements: list[str]) -> str:
+        """Wraps statements in an anonymous Snowflake Scripting block, so they run in order
+        as a single async query."""
+        body = "\n".join(
+            statement if statement.rstrip().endswith(";") else f"{statement};"
+            for statement in statements
+        )
+        return f"EXECUTE IMMEDIATE $$\nBEGIN\n{body}\nEND;\n$$"
+
+    @staticmethod
+    def _get_files_clause(remote_filepath: str) -> str:
+        # Patterns are either unanchored globs like `.*x.csv` or anchored regexes `^...$`
+        if "*" in remote_filepath or remote_filepath.endswith("$"):
+            return f"PATTERN = '{remote_filepath}'"
+        return f"FILES =('{remote_filepath}')"
+
+    @staticmethod
+    def _get_file_type(remote_filepath: str) -> str:
+        # The extension of a file, or the one a pattern like `^x[.]parquet$` ends with
+        return re.search(r"(\w+)\$?$", remote_filepath).group(1)
+
     def _get_copy_into_statement(
         self,
         remote_filepath: str,
         table: str,
         schema: str,
         partitions: None,
+        stage: Optional[str] = None,
     ):
-        if "*" in remote_filepath:
-            files = f"PATTERN = '{remote_filepath}'"
-        else:
-            files = f"FILES =('{remote_filepath}')"
+        stage = stage or f"@{schema}.{self.stage}"
+        files = self._get_files_clause(remote_filepath)
 
         if partitions is not None:
             return (
                 f"COPY INTO {schema}.{table}(DATA, PARTITION)\n"
-                f"FROM(SELECT $1, '{partitions}' FROM @{schema}.{self.stage})\n"
+                f"FROM(SELECT $1, '{partitions}' FROM {stage})\n"
                 f"{files}\n"
-                f"FILE_FORMAT = (type = '{remote_filepath.split('.')[-1]}')"
+                f"FILE_FORMAT = (type = '{self._get_file_type(remote_filepath)}')"
                 "FORCE=TRUE;"
             )
         else:
             return (
-                f"COPY INTO {schema}.{table}(DATA) FROM @{schema}.{self.stage}\n"
+                f"COPY INTO {schema}.{table}(DATA) FROM {stage}\n"
                 f"{files}\n"
-                f"FILE_FORMAT = (type = '{remote_filepath.split('.')[-1]}');"
+                f"FILE_FORMAT = (type = '{self._get_file_type(remote_filepath)}');"
             )
 
+    def _get_typed_copy_into_statement(
+        self,
+        remote_filepath: str,
+        table: str,
+        schema: str,
+        partitions: None,
+        stage: Optional[str] = None,
+    ):
+        stage = stage or f"@{schema}.{self.stage}"
+        files = self._get_files_clause(remote_filepath)
+
+        return (
+            f"COPY INTO {schema}.{table} FROM {stage}\n"
+            f"{files}\n"
+            f"FILE_FORMAT = (type = '{self._get_file_type(remote_filepath)}')\n"
+            "MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE"
+            + ("\nFORCE = TRUE;" if partitions is not None else ";")
+        )
+
     def _get_landing_cleanup_statement(
         self, table: str, schema: str, partitions=None
     ) -> str:
@@ -111,6 +512,9 @@ class UtilsSnowflakeClient(ConfigurableResource):
 
 
 class MockSFConn:
+    def __init__(self):
+        self.connection = self.MockSFRawConn()
+
     def execute(self, *args, **kwargs):
         return self.MockSFRes()
 
@@ -121,6 +525,35 @@ class MockSFConn:
         def fetchone(self, *args, **kwargs):
             return [1]
 
+        def fetchall(self, *args, **kwargs):
+            return []
+
+    class MockSFRawConn:
+        def __init__(self):
+            self.async_queries = {}
+            self.puts = {}
+
+        def cursor(self):
+            return MockSFConn.MockSFCursor(self)
+
+        def get_query_status_throw_if_error(self, query_id):
+            return "SUCCESS"
+
+        def is_still_running(self, status):
+            return False
+
+    class MockSFCursor:
+        def __init__(self, raw_conn):
+            self._raw_conn = raw_conn
+            self.sfqid = None
+
+        def execute(self, statement, file_stream=None):
+            self._raw_conn.puts[statement] = file_stream.getvalue()
+
+        def execute_async(self, statement):
+            self.sfqid = str(uuid.uuid4())
+            self._raw_conn.async_queries[self.sfqid] = statement
+
 
 class StubSnowflakeClient(UtilsSnowflakeClient):
     stage: str = None
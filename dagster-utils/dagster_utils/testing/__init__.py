@@ -0,0 +1,9 @@
+# Test helpers, kept out of `dagster_utils.lib` so they aren't part of the clients' API
+from ._cassette import (
+    CASSETTE_MODES,
+    Cassette,
+    CassetteMissError,
+    CassetteTransport,
+    interaction_key,
+    use_cassette,
+)
@@ -0,0 +1,163 @@
+import base64
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from dagster_utils.lib import _transport
+
+CASSETTE_MODES = ("replay", "record")
+
+
+class CassetteMissError(KeyError):
+    pass
+
+
+def interaction_key(method: str, url: str, params: Optional[dict] = None) -> str:
+    """Canonical key of a request: the method and URL, with the query string (including
+    `params`) sorted so the key doesn't depend on parameter order."""
+    prepared_url = requests.Request(method, url, params=params).prepare().url
+    scheme, netloc, path, query, _ = urlsplit(prepared_url)
+    query = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    return f"{method.upper()} {urlunsplit((scheme, netloc, path, query, ''))}"
+
+
+class Cassette:
+    """HTTP interactions recorded to a JSON file, replayed in place of real requests.
+
+    Args:
+        path (str): JSON file holding the interactions
+        mode (str, optional): `replay` serves responses from the file and fails on requests
+            that weren't recorded. `record` makes real requests and stores their responses,
+            saving the file when the cassette is ejected.
+        latency (float, optional): Seconds added to every replayed response.
+        bandwidth (Optional[float], optional): Bytes per second at which replayed bodies
+            are "downloaded". Defaults to unlimited.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "replay",
+        latency: float = 0.0,
+        bandwidth: Optional[float] = None,
+    ):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Cassette mode must be one of {CASSETTE_MODES}")
+
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self._lock = threading.Lock()
+
+        try:
+            with open(path, "r") as f:
+                self.interactions = json.load(f)["interactions"]
+        except FileNotFoundError:
+            if mode == "replay":
+                raise
+            self.interactions = {}
+
+    def play(self, method: str, url: str, params: Optional[dict] = None):
+        key = interaction_key(method, url, params)
+        try:
+            interaction = self.interactions[key]
+        except KeyError:
+            raise CassetteMissError(f"No recorded interaction for {key} in {self.path}")
+
+        if interaction["encoding"] == "base64":
+            content = base64.b64decode(interaction["body"])
+        else:
+            content = interaction["body"].encode(interaction["encoding"])
+
+        delay = self.latency
+        if self.bandwidth:
+            delay += len(content) / self.bandwidth
+        if delay > 0:
+            time.sleep(delay)
+
+        r = requests.Response()
+        r.status_code = interaction["status"]
+        r.headers = CaseInsensitiveDict(interaction["headers"])
+        r._content = content
+        r.url = url
+        r.encoding = "utf-8"
+        return r
+
+    def record(
+        self,
+        method: str,
+        url: str,
+        params: Optional[dict],
+        response: requests.Response,
+    ):
+        try:
+            body, encoding = response.content.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(response.content).decode(), "base64"
+
+        with self._lock:
+            self.interactions[interaction_key(method, url, params)] = {
+                "status": response.status_code,
+                "headers": {
+                    k: v
+                    for k, v in response.headers.items()
+                    if k.lower() == "content-type"
+                },
+                "body": body,
+                "encoding": encoding,
+            }
+
+    def save(self):
+        with open(self.path, "w") as f:
+            json.dump(
+                {"interactions": dict(sorted(self.interactions.items()))}, f, indent=2
+            )
+
+
+class CassetteTransport(_transport.HttpTransport):
+    """Transport replaying (or recording) requests from a cassette instead of the network."""
+
+    def __init__(self, cassette: Cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        if self.cassette.mode == "replay":
+            return self.cassette.play(method, url, kwargs.get("params"))
+
+        r = super()._send(method, url, **kwargs)
+        self.cassette.record(method, url, kwargs.get("params"), r)
+        return r
+
+
+@contextmanager
+def use_cassette(
+    path: str,
+    mode: str = "replay",
+    latency: float = 0.0,
+    bandwidth: Optional[float] = None,
+):
+    """Makes every client using the shared transport go through a cassette, e.g. to test or
+    benchmark the real clients against recorded traffic.
+
+    Examples:
+        .. code-block:: python
+
+            with use_cassette("pcloud.json", latency=0.05):
+                UtilspCloudClient().read_files_by_id(["some_id"])
+    """
+    cassette = Cassette(path, mode=mode, latency=latency, bandwidth=bandwidth)
+    previous = _transport.set_http_transport(CassetteTransport(cassette))
+    try:
+        yield cassette
+    finally:
+        _transport.set_http_transport(previous)
+        if mode == "record":
+            cassette.save()
@@ -1,5 +1,7 @@
 from .auth import *
 from .check import *
+from .config_loader import *
 from .date import *
 from .dicts import *
 from .misc import *
+from .tracing import *
@@ -1,14 +1,25 @@
 import json
 import os
+import threading
+import time
 
-import boto3
 from dagster import get_dagster_logger
 
 logger = get_dagster_logger()
 
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("DAGSTER_UTILS_AUTH_CACHE_TTL", 15 * 60))
+SSM_MAX_BATCH_SIZE = 10
+
+_auth_cache = {}
+_auth_cache_lock = threading.Lock()
+_registered_auths = {}
+_ssm_client = None
+
 
 def fetch_authentication(auth) -> dict:
-    """Fetches authentication dynamically calling a different function depending on type
+    """Fetches authentication dynamically calling a different function depending on type.
+    Fetched values are cached for the process for `AUTH_CACHE_TTL_SECONDS`, so resources sharing
+    a secret only resolve it once per step.
 
     Args:
         auth (AuthConfig): specifies the type and name of file where authentication is saved
@@ -16,6 +27,11 @@ def fetch_authentication(auth) -> dict:
     Raises:
         BaseException: Raises exception if auth located somewhere not supported
     """
+    cache_key = (auth["type"], auth["name"])
+    cached = _get_cached_authentication(cache_key)
+    if cached is not None:
+        return dict(cached)
+
     if auth["type"] == "local":
         fetched_auth = _fetch_local_auth(auth["name"])
     elif auth["type"] == "parameterStore":
@@ -23,7 +39,132 @@ def fetch_authentication(auth) -> dict:
     else:
         raise NameError("Authentication type not supported")
 
-    return fetched_auth
+    _cache_authentication(cache_key, fetched_auth)
+    return dict(fetched_auth)
+
+
+def prefetch_authentication(auths: list) -> None:
+    """Resolves several auth configs at once, so later `fetch_authentication` calls are served
+    from the cache. Parameter Store secrets are fetched with batched `get_parameters` calls.
+
+    Args:
+        auths (list[AuthConfig]): auth configs to resolve
+    """
+    parameter_names = sorted(
+        {
+            auth["name"]
+            for auth in auths
+            if auth["type"] == "parameterStore"
+            and _get_cached_authentication(("parameterStore", auth["name"])) is None
+        }
+    )
+
+    for i in range(0, len(parameter_names), SSM_MAX_BATCH_SIZE):
+        res = _get_ssm_client().get_parameters(
+            Names=parameter_names[i : i + SSM_MAX_BATCH_SIZE],
+            WithDecryption=True,
+        )
+        for parameter in res["Parameters"]:
+            _cache_authentication(
+                ("parameterStore", parameter["Name"]), json.loads(parameter["Value"])
+            )
+        if res.get("InvalidParameters"):
+            logger.warning(
+                f"Could not prefetch parameters {', '.join(res['InvalidParameters'])}"
+            )
+
+    for auth in auths:
+        if auth["type"] != "parameterStore":
+            fetch_authentication(auth)
+
+
+def register_authentication(auth) -> None:
+    """Records an auth config the process will need, so the first Parameter Store fetch
+    resolves it in the same batch as the others. Resources register their `auth_config` when
+    built, i.e. when the code location is loaded, before any of them fetches it.
+
+    Args:
+        auth (Optional[AuthConfig]): auth config to register, ignored if None
+    """
+    if auth is not None:
+        _registered_auths[(auth["type"], auth["name"])] = auth
+
+
+def prefetch_registered_authentication(auth) -> None:
+    """Called before fetching `auth`. If it is a Parameter Store secret that isn't cached, every
+    registered Parameter Store secret that isn't cached either is fetched along with it, so N
+    resources of a step make a single `get_parameters` call rather than N `get_parameter`
+    calls. Failures are logged, the secrets are then fetched one by one as before.
+
+    Args:
+        auth (Optional[AuthConfig]): auth config about to be fetched
+    """
+    if auth is None or auth["type"] != "parameterStore":
+        return
+    if _get_cached_authentication(("parameterStore", auth["name"])) is not None:
+        return
+
+    auths = [auth] + [
+        registered
+        for registered in _registered_auths.values()
+        if registered["type"] == "parameterStore"
+    ]
+    try:
+        prefetch_authentication(auths)
+    except Exception as e:
+        logger.warning(f"Could not prefetch Parameter Store secrets: {e}")
+
+
+def prefetch_definitions_authentication(defs) -> None:
+    """Prefetches the `auth_config` of every top-level resource of a Definitions object.
+
+    Args:
+        defs (Definitions): Definitions whose resources should be resolved
+    """
+    auths = []
+    for resource_def in defs.get_repository_def().get_top_level_resources().values():
+        field = resource_def.config_schema.as_field()
+        if not field.default_provided or not isinstance(field.default_value, dict):
+            continue
+        auth = field.default_value.get("auth_config")
+        if auth is not None:
+            auths.append(auth)
+
+    prefetch_authentication(auths)
+
+
+def clear_authentication_cache() -> None:
+    global _ssm_client
+
+    with _auth_cache_lock:
+        _auth_cache.clear()
+        _registered_auths.clear()
+        _ssm_client = None
+
+
+def _get_cached_authentication(cache_key: tuple):
+    cached = _auth_cache.get(cache_key)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+    return None
+
+
+def _cache_authentication(cache_key: tuple, value: dict) -> None:
+    with _auth_cache_lock:
+        _auth_cache[cache_key] = (time.monotonic() + AUTH_CACHE_TTL_SECONDS, value)
+
+
+def _get_ssm_client():
+    global _ssm_client
+
+    if _ssm_client is None:
+        # boto3 is slow to import and only needed for Parameter Store secrets
+        import boto3
+
+        with _auth_cache_lock:
+            if _ssm_client is None:
+                _ssm_client = boto3.client("ssm")
+    return _ssm_client
 
 
 def _fetch_local_auth(name: str) -> dict:
@@ -32,6 +173,6 @@ def _fetch_local_auth(name: str) -> dict:
 
 
 def _fetch_parameter_store_auth(name: str) -> dict:
-    ssm = boto3.client("ssm")
+    ssm = _get_ssm_client()
     parameter = ssm.get_parameter(Name=name, WithDecryption=True)["Parameter"]["Value"]
     return json.loads(parameter)
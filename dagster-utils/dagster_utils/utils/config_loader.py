@@ -0,0 +1,146 @@
+import collections.abc
+import copy
+import json
+import os
+import threading
+from typing import Callable, Optional
+
+import yaml
+
+__all__ = [
+    "ConfigFolder",
+    "clear_yaml_cache",
+    "compile_config_snapshot",
+    "load_yaml_file",
+]
+
+try:
+    from yaml import CSafeLoader as YAMLSafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as YAMLSafeLoader
+
+_yaml_cache = {}
+_yaml_cache_lock = threading.Lock()
+
+
+def _file_signature(path: str) -> tuple:
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_yaml_file(path: str):
+    """Parses a YAML file with the libyaml loader when available. Results are cached for the
+    lifetime of the process and invalidated when the file mtime or size changes.
+
+    The returned object is shared between callers and should not be mutated.
+    """
+    path = os.path.abspath(path)
+    signature = _file_signature(path)
+
+    cached = _yaml_cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with open(path, "rb") as f:
+        value = yaml.load(f, Loader=YAMLSafeLoader)
+
+    with _yaml_cache_lock:
+        _yaml_cache[path] = (signature, value)
+    return value
+
+
+def clear_yaml_cache():
+    with _yaml_cache_lock:
+        _yaml_cache.clear()
+
+
+def _strip_extension(filename: str) -> str:
+    return filename.split(".")[0]
+
+
+class ConfigFolder(collections.abc.Mapping):
+    """Read-only mapping of the config files in a folder, parsed lazily on first access.
+
+    Each access returns a copy of the parsed file, so callers can mutate it without affecting
+    the process-wide cache.
+
+    Args:
+        path (str): Folder containing the config files
+        extensions (Optional[tuple], optional): Only files with these extensions are included.
+            Pass None to include every file. Defaults to (".yaml",).
+        key_fn (Callable, optional): Maps a filename to its key in the mapping. Defaults to the
+            filename without extension.
+        snapshot_path (Optional[str], optional): JSON snapshot written by
+            `compile_config_snapshot`. Entries whose file hasn't changed since the snapshot
+            was taken are read from it instead of parsing the YAML.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        extensions: Optional[tuple] = (".yaml",),
+        key_fn: Callable[[str], str] = _strip_extension,
+        snapshot_path: Optional[str] = None,
+    ):
+        self.path = path
+        self._filenames = {
+            key_fn(filename): filename
+            for filename in sorted(os.listdir(path))
+            if extensions is None or filename.endswith(extensions)
+        }
+        self._snapshot = _read_snapshot(snapshot_path)
+
+    def __getitem__(self, key):
+        filepath = os.path.join(self.path, self._filenames[key])
+
+        snapshot_entry = self._snapshot.get(self._filenames[key])
+        if snapshot_entry is not None and tuple(
+            snapshot_entry["signature"]
+        ) == _file_signature(filepath):
+            return copy.deepcopy(snapshot_entry["value"])
+
+        return copy.deepcopy(load_yaml_file(filepath))
+
+    def __iter__(self):
+        return iter(self._filenames)
+
+    def __len__(self):
+        return len(self._filenames)
+
+
+def _read_snapshot(snapshot_path: Optional[str]) -> dict:
+    if snapshot_path is None or not os.path.exists(snapshot_path):
+        return {}
+    with open(snapshot_path, "r") as f:
+        return json.load(f)
+
+
+def compile_config_snapshot(
+    path: str,
+    snapshot_path: str,
+    extensions: Optional[tuple] = (".yaml",),
+) -> str:
+    """Parses every config file in a folder and stores the results in a single JSON file, which
+    `ConfigFolder` can load much faster than the individual YAML files.
+    Files changed after the snapshot was compiled are still read from disk, as are files whose
+    contents don't survive a JSON round trip (e.g. dates or non-string keys).
+    """
+    folder = ConfigFolder(path, extensions=extensions, key_fn=lambda filename: filename)
+    snapshot = {}
+    for filename in folder:
+        value = folder[filename]
+        try:
+            if json.loads(json.dumps(value)) != value:
+                continue
+        except (TypeError, ValueError):
+            continue
+
+        snapshot[filename] = {
+            "signature": _file_signature(os.path.join(path, filename)),
+            "value": value,
+        }
+
+    with open(snapshot_path, "w") as f:
+        json.dump(snapshot, f)
+
+    return snapshot_path
@@ -1,4 +1,5 @@
-from typing import Union
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Union
 
 
 def safeget(dct: dict, *keys) -> Union[dict, None]:
@@ -22,6 +23,97 @@ def build_dict_from_nested_properties(dict, info_location) -> dict[str, str]:
     }
 
 
+# Paths are few and fixed in practice, the bound only guards against paths built from data
+COMPILED_PATHS_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=COMPILED_PATHS_CACHE_SIZE)
+def compile_path(*keys) -> Callable[[Any], Any]:
+    """Compiles the keys of a nested path into a getter, returning the same as
+    `safeget(dct, *keys)` without walking the keys in a Python loop on every call.
+
+    Getters are cached by path, so compiling a path again is cheap.
+
+    Examples:
+        .. code-block:: python
+
+            get_attachment_id = compile_path("body", "attachmentId")
+            attachment_ids = [get_attachment_id(part) for part in parts]
+    """
+    if not keys:
+        return lambda dct: dct
+
+    # Paths of up to three keys, i.e. nearly all of them, get a closure over their keys doing
+    # a single chained subscript, longer ones walk their keys
+    if len(keys) == 1:
+        (k0,) = keys
+
+        def getter(dct):
+            try:
+                return dct[k0]
+            except KeyError:
+                return None
+
+    elif len(keys) == 2:
+        k0, k1 = keys
+
+        def getter(dct):
+            try:
+                return dct[k0][k1]
+            except KeyError:
+                return None
+
+    elif len(keys) == 3:
+        k0, k1, k2 = keys
+
+        def getter(dct):
+            try:
+                return dct[k0][k1][k2]
+            except KeyError:
+                return None
+
+    else:
+
+        def getter(dct):
+            try:
+                for key in keys:
+                    dct = dct[key]
+            except KeyError:
+                return None
+            return dct
+
+    return getter
+
+
+def compile_paths(info_location: dict) -> Callable[[dict], dict]:
+    """Compiles the paths of `build_dict_from_nested_properties` once, the returned function
+    builds the same dict from each record it is called with."""
+    getters = [
+        (property, compile_path(*location))
+        for property, location in info_location.items()
+    ]
+
+    def build(dct: dict) -> dict:
+        return {property: getter(dct) for property, getter in getters}
+
+    return build
+
+
+def extract_columns(records: Iterable[dict], info_location: dict) -> dict[str, list]:
+    """Extracts nested paths column-wise, each column being the values of its path in every
+    record, in order, e.g. to build a DataFrame without going through a dict per record.
+
+    Args:
+        records (Iterable[dict]): records to extract from
+        info_location (dict): column names to the keys of their path in a record
+    """
+    records = records if isinstance(records, (list, tuple)) else list(records)
+    return {
+        property: list(map(compile_path(*location), records))
+        for property, location in info_location.items()
+    }
+
+
 def translate_dict(dict, properties_dict):
     return {translated: dict.get(prop) for prop, translated in properties_dict.items()}
 
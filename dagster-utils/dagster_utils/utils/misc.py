@@ -1,16 +1,13 @@
-import os
+from typing import Optional
 
-import yaml
+from .config_loader import ConfigFolder
 
 
 def logical_xor(*args):
     return sum([bool(arg) for arg in args]) == 1
 
 
-def load_confs(path):
-    confs = {}
-    for filename in os.listdir(path):
-        if filename.endswith(".yaml"):
-            with open(os.path.join(path, filename)) as f:
-                confs[filename.split(".")[0]] = yaml.safe_load(f)
-    return confs
+def load_confs(path, snapshot_path: Optional[str] = None) -> dict:
+    """Returns the `.yaml` files in `path`, keyed by filename without extension. Parsed files
+    are cached across calls, the returned dict holds copies that are safe to mutate."""
+    return dict(ConfigFolder(path, snapshot_path=snapshot_path))
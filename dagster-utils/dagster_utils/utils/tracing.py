@@ -0,0 +1,213 @@
+import contextvars
+import os
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from dagster import MetadataValue, get_dagster_logger
+
+__all__ = [
+    "Span",
+    "StepTracer",
+    "get_peak_rss",
+    "record_span",
+    "span",
+    "trace_generator",
+    "trace_step",
+]
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+logger = get_dagster_logger()
+
+# e.g. "localhost:8125", spans are then also sent as StatsD timers to a local agent
+STATSD_ADDRESS = os.getenv("DAGSTER_UTILS_STATSD_ADDRESS")
+STATSD_PREFIX = os.getenv("DAGSTER_UTILS_STATSD_PREFIX", "dagster_utils")
+
+
+class Span:
+    """A timed phase of a step. Set `bytes` within the span to report its throughput."""
+
+    def __init__(self, name: str, nbytes: Optional[int] = None):
+        self.name = name
+        self.bytes = nbytes
+        self.seconds = 0.0
+
+
+class StepTracer:
+    """Durations and bytes of the spans recorded while tracing, aggregated by span name.
+    Spans can be recorded from other threads, e.g. by background uploads."""
+
+    def __init__(self):
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, nbytes: Optional[int] = None):
+        with self._lock:
+            phase = self.phases.setdefault(
+                name, {"count": 0, "seconds": 0.0, "bytes": None}
+            )
+            phase["count"] += 1
+            phase["seconds"] += seconds
+            if nbytes is not None:
+                phase["bytes"] = (phase["bytes"] or 0) + nbytes
+
+    def to_metadata(self, peak_rss: bool = True) -> dict:
+        metadata = {}
+        with self._lock:
+            phases = {name: dict(phase) for name, phase in self.phases.items()}
+        for name, phase in phases.items():
+            metadata[f"{name} time (s)"] = MetadataValue.float(
+                round(phase["seconds"], 3)
+            )
+            if phase["count"] > 1:
+                metadata[f"{name} count"] = MetadataValue.int(phase["count"])
+            if phase["bytes"] is not None:
+                metadata[f"{name} bytes"] = MetadataValue.int(phase["bytes"])
+                if phase["seconds"] > 0:
+                    metadata[f"{name} throughput (MB/s)"] = MetadataValue.float(
+                        round(phase["bytes"] / phase["seconds"] / 1024**2, 2)
+                    )
+
+        peak_rss_bytes = get_peak_rss() if peak_rss else None
+        if peak_rss_bytes is not None:
+            metadata["Peak RSS (MB)"] = MetadataValue.float(
+                round(peak_rss_bytes / 1024**2, 1)
+            )
+        return metadata
+
+
+_active_tracers = contextvars.ContextVar("dagster_utils_step_tracers", default=())
+
+
+@contextmanager
+def trace_step():
+    """Collects every span recorded within the context, e.g. to attach the per-phase timings
+    as metadata of the output being handled.
+
+    Examples:
+        .. code-block:: python
+
+            with trace_step() as tracer:
+                with span("Parquet encode") as s:
+                    buffer = encode(df)
+                    s.bytes = len(buffer)
+            context.add_output_metadata(tracer.to_metadata())
+    """
+    tracer = StepTracer()
+    token = _active_tracers.set(_active_tracers.get() + (tracer,))
+    try:
+        yield tracer
+    finally:
+        _active_tracers.reset(token)
+
+
+def trace_generator(gen, tracer: StepTracer):
+    """Runs a generator with `tracer` collecting its spans, like `trace_step` would, but only
+    while the generator runs. While it is suspended at a yield, the spans of its caller aren't
+    collected, e.g. those of the other outputs of a step.
+
+    Examples:
+        .. code-block:: python
+
+            def handle_output(self, context, obj):
+                tracer = StepTracer()
+                yield from trace_generator(self._handle_output(context, obj), tracer)
+                yield tracer.to_metadata()
+    """
+    try:
+        while True:
+            token = _active_tracers.set(_active_tracers.get() + (tracer,))
+            try:
+                item = next(gen)
+            except StopIteration as e:
+                return e.value
+            finally:
+                _active_tracers.reset(token)
+            yield item
+    finally:
+        gen.close()
+
+
+@contextmanager
+def span(name: str, nbytes: Optional[int] = None, tracers: Optional[tuple] = None):
+    """Times the enclosed block and records it on the active tracers and exporters.
+    Spans are recorded even if the block raises, so failed steps still show where time went.
+    Pass `tracers` to record on those instead of the active ones, e.g. from worker threads.
+    """
+    s = Span(name, nbytes)
+    otel_span = _start_otel_span(name)
+    start = time.perf_counter()
+    try:
+        yield s
+    finally:
+        s.seconds = time.perf_counter() - start
+        if otel_span is not None:
+            if s.bytes is not None:
+                otel_span.set_attribute("bytes", s.bytes)
+            otel_span.end()
+        record_span(name, s.seconds, s.bytes, tracers)
+
+
+def record_span(
+    name: str,
+    seconds: float,
+    nbytes: Optional[int] = None,
+    tracers: Optional[tuple] = None,
+) -> None:
+    """Records an already timed phase, for code that measures its own durations."""
+    for tracer in _active_tracers.get() if tracers is None else tracers:
+        tracer.record(name, seconds, nbytes)
+    _send_statsd(name, seconds, nbytes)
+
+
+def get_peak_rss() -> Optional[int]:
+    """Peak resident set size of the process in bytes, None where it can't be measured."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _start_otel_span(name: str):
+    # Without a configured SDK the OpenTelemetry API hands out no-op spans, so this is cheap
+    # unless an exporter (e.g. to a local collector) was set up by the deployment.
+    if otel_trace is None:
+        return None
+    return otel_trace.get_tracer("dagster_utils").start_span(name)
+
+
+_statsd_socket = None
+
+
+def _send_statsd(name: str, seconds: float, nbytes: Optional[int]) -> None:
+    global _statsd_socket
+
+    if not STATSD_ADDRESS:
+        return
+
+    metric = STATSD_PREFIX + "." + name.lower().replace(" ", "_")
+    lines = [f"{metric}.time:{seconds * 1000:.3f}|ms"]
+    if nbytes is not None:
+        lines.append(f"{metric}.bytes:{nbytes}|c")
+
+    host, port = STATSD_ADDRESS.rsplit(":", 1)
+    try:
+        if _statsd_socket is None:
+            _statsd_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        _statsd_socket.sendto("\n".join(lines).encode("utf-8"), (host, int(port)))
+    except OSError as e:
+        # Metrics are best effort, never fail a step because the agent is down
+        logger.debug(f"Could not send span {name} to StatsD: {e}")
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import pickle
+
+import pytest
+from dagster import (
+    AssetKey,
+    AssetMaterialization,
+    Definitions,
+    Output,
+    asset,
+    build_multi_asset_sensor_context,
+    instance_for_test,
+    job,
+    op,
+)
+
+from dagster_utils.dagsterhub import dbt_manifest, generate_dbt_downstream_asset_sensors
+
+MANIFEST = {
+    "metadata": {"dbt_version": "1.5.0"},
+    "nodes": {"model.dp.raw_foo": {"name": "raw_foo", "raw_code": "select 1"}},
+    "sources": {
+        "source.dp.src_landing.src_foo": {
+            "source_name": "src_landing",
+            "schema": "landing",
+            "name": "src_foo",
+            "description": "a" * 1000,
+        }
+    },
+    "child_map": {
+        "source.dp.src_landing.src_foo": ["model.dp.raw_foo"],
+        "model.dp.raw_foo": [],
+    },
+}
+
+EXPECTED_INDEX = {
+    "sources": {
+        "source.dp.src_landing.src_foo": {
+            "source_name": "src_landing",
+            "schema": "landing",
+            "name": "src_foo",
+        }
+    },
+}
+
+
+@pytest.fixture
+def manifest_path(tmp_path):
+    target = tmp_path / "dp_dbthub" / "my_project" / "target"
+    target.mkdir(parents=True)
+    path = target / "manifest.json"
+    path.write_text(json.dumps(MANIFEST))
+    yield str(path)
+
+
+@pytest.fixture(params=["ijson", "json"])
+def parser(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(dbt_manifest, "ijson", None)
+    elif dbt_manifest.ijson is None:
+        pytest.skip("ijson not installed")
+
+
+def test_load_dbt_manifest_index(manifest_path, parser):
+    assert dbt_manifest.load_dbt_manifest_index(manifest_path) == EXPECTED_INDEX
+    assert os.path.exists(
+        os.path.join(os.path.dirname(manifest_path), "manifest_index.pickle")
+    )
+
+
+def test_load_dbt_manifest_index_reads_manifest_once(manifest_path, parser, mocker):
+    hash_file = mocker.spy(dbt_manifest, "_hash_file")
+
+    dbt_manifest.load_dbt_manifest_index(manifest_path)
+
+    hash_file.assert_not_called()
+    with open(manifest_path, "rb") as f:
+        expected_hash = hashlib.sha256(f.read()).hexdigest()
+    cached = dbt_manifest._read_cached_index(
+        os.path.join(os.path.dirname(manifest_path), "manifest_index.pickle")
+    )
+    assert cached["sha256"] == expected_hash
+
+
+def test_load_dbt_manifest_index_uses_cache(manifest_path, mocker):
+    dbt_manifest.load_dbt_manifest_index(manifest_path)
+    parse = mocker.spy(dbt_manifest, "_parse_manifest")
+
+    assert dbt_manifest.load_dbt_manifest_index(manifest_path) == EXPECTED_INDEX
+    parse.assert_not_called()
+
+    # Rewritten but identical manifest is matched by its hash
+    os.utime(manifest_path, ns=(0, 0))
+    assert dbt_manifest.load_dbt_manifest_index(manifest_path) == EXPECTED_INDEX
+    parse.assert_not_called()
+
+
+def test_load_dbt_manifest_index_rebuilds_on_change(manifest_path):
+    dbt_manifest.load_dbt_manifest_index(manifest_path)
+
+    manifest = json.loads(json.dumps(MANIFEST))
+    manifest["sources"]["source.dp.src_landing.src_foo"]["name"] = "src_bar"
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+
+    index = dbt_manifest.load_dbt_manifest_index(manifest_path)
+    assert index["sources"]["source.dp.src_landing.src_foo"]["name"] == "src_bar"
+
+
+def test_generate_dbt_downstream_asset_sensors(manifest_path, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    sensors = generate_dbt_downstream_asset_sensors("my_project")
+
+    assert [sensor.name for sensor in sensors] == ["my_project_downstream_sensor"]
+    assert [job.name for job in sensors[0].jobs] == ["foo_downstream_job"]
+
+
+def test_dbt_downstream_sensor_requests_runs_per_source(
+    manifest_path, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    source_key = AssetKey(["src_landing", "landing", "src_foo"])
+
+    @op
+    def materialize_source():
+        yield AssetMaterialization(source_key)
+        yield Output(None)
+
+    @job
+    def source_job():
+        materialize_source()
+
+    @asset(key=["src_rawmart", "raw_foo"])
+    def raw_foo():
+        return 1
+
+    [sensor] = generate_dbt_downstream_asset_sensors("my_project")
+    defs = Definitions(assets=[raw_foo], sensors=[sensor], jobs=[source_job])
+
+    with instance_for_test() as instance:
+        source_job.execute_in_process(instance=instance)
+        context = build_multi_asset_sensor_context(
+            monitored_assets=[source_key], instance=instance, definitions=defs
+        )
+        [run_request] = sensor(context)
+        assert run_request.job_name == "foo_downstream_job"
+
+        # The consumed materialization is not requested again
+        context = build_multi_asset_sensor_context(
+            monitored_assets=[source_key],
+            instance=instance,
+            definitions=defs,
+            cursor=context.cursor,
+        )
+        assert list(sensor(context) or []) == []
+
+
+@pytest.mark.parametrize(
+    "contents",
+    [
+        b"not a pickle",
+        pickle.dumps(["a", "list"]),
+        # Classes that can't be found, e.g. written by another package version
+        b"cbuiltins\nno_such_builtin\n.",
+        b"cno_such_module\nIndex\n.",
+    ],
+)
+def test_load_dbt_manifest_index_rebuilds_unreadable_cache(manifest_path, contents):
+    cache_path = os.path.join(os.path.dirname(manifest_path), "manifest_index.pickle")
+    with open(cache_path, "wb") as f:
+        f.write(contents)
+
+    assert dbt_manifest.load_dbt_manifest_index(manifest_path) == EXPECTED_INDEX
+    assert dbt_manifest._read_cached_index(cache_path)["index"] == EXPECTED_INDEX
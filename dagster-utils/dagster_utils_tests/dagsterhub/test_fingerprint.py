@@ -0,0 +1,26 @@
+import pandas as pd
+
+from dagster_utils.dagsterhub._fingerprint import fingerprint_frame, fingerprint_object
+from dagster_utils.lib import UtilsSinkInputType
+
+
+def test_fingerprint_frame():
+    df = pd.DataFrame({"foo": ["bar", "baz"], "n": [1, 2]})
+
+    assert fingerprint_frame(df) == fingerprint_frame(df.copy())
+    assert fingerprint_frame(df) != fingerprint_frame(df.astype({"n": "float64"}))
+    assert fingerprint_frame(df) != fingerprint_frame(df.rename(columns={"n": "m"}))
+    assert fingerprint_frame(pd.DataFrame({"foo": [["bar"]]})) is None
+
+
+def test_fingerprint_object():
+    def sink(**kwargs):
+        return UtilsSinkInputType(
+            **{"dest_asset": "foo", "data": pd.DataFrame({"n": [1]}), **kwargs}
+        )
+
+    assert fingerprint_object(sink()) == fingerprint_object(sink())
+    assert fingerprint_object(sink()) != fingerprint_object(sink(load_to_snow=True))
+    assert fingerprint_object(sink()) != fingerprint_object(sink(meta={"page": 2}))
+    assert fingerprint_object(sink(data=pd.DataFrame({"n": [[1]]}))) is None
+    assert fingerprint_object("foo") is None
@@ -0,0 +1,38 @@
+import pytest
+
+from dagster_utils.dagsterhub._handoff import HandoffRegistry
+
+
+def test_handoff_registry_evicts_least_recently_used():
+    registry = HandoffRegistry(max_bytes=10)
+    registry.put("run", "a", b"AAAA")
+    registry.put("run", "b", b"BBBB")
+    assert registry.get("run", "a") == b"AAAA"
+
+    registry.put("run", "c", b"CCCC")
+    assert registry.get("run", "b", None) is None
+    assert registry.get("run", "a") == b"AAAA"
+    assert registry.get("run", "c") == b"CCCC"
+    assert registry.nbytes == 8
+
+
+def test_handoff_registry_rejects_oversized_objects():
+    registry = HandoffRegistry(max_bytes=10)
+    registry.put("run", "a", b"AAAA")
+
+    assert not registry.put("run", "a", b"A" * 11)
+    assert len(registry) == 0
+    with pytest.raises(KeyError):
+        registry.get("run", "a")
+
+
+def test_handoff_registry_is_run_scoped():
+    registry = HandoffRegistry()
+    registry.put("run_1", "a", b"1")
+    registry.put("run_2", "a", b"2")
+    assert registry.get("run_1", "a") == b"1"
+
+    registry.clear("run_1")
+    assert registry.get("run_1", "a", None) is None
+    assert registry.get("run_2", "a") == b"2"
+    assert registry.nbytes == 1
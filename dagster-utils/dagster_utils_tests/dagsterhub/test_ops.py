@@ -1,8 +1,19 @@
 import pandas as pd
-from dagster import build_op_context
+import pyarrow as pa
+from dagster import DagsterInstance, build_op_context, instance_for_test
 
-from dagster_utils.dagsterhub.ops import webapioutput_to_sinkinput
-from dagster_utils.lib import UtilsWebAPIOutputType
+from dagster_utils.dagsterhub import delete_dynamic_partitions, sync_dynamic_partitions
+from dagster_utils.dagsterhub.ops import (
+    add_or_delete_dynamic_partitions,
+    csv_to_utilssinkinput,
+    sync_dynamic_partitions_op,
+    webapioutput_to_sinkinput,
+)
+from dagster_utils.lib import (
+    UtilsFileSystemOutputType,
+    UtilsWebAPIOutputType,
+    to_arrow_table,
+)
 
 
 def test_webapi_to_sinkinput():
@@ -15,3 +26,102 @@ def test_webapi_to_sinkinput():
         assert res.load_to_snow
         assert res.dest_asset == "my_asset"
         assert all(pd.DataFrame([{"foo": "bar"}, {"foo": "baz"}]) == res.data)
+
+
+def test_webapi_to_sinkinput_arrow():
+    with build_op_context(
+        config={"dest_asset": "my_asset", "frame_type": "arrow"}
+    ) as context:
+        res = webapioutput_to_sinkinput(
+            context,
+            obj=UtilsWebAPIOutputType(data=[{"foo": "bar"}, {"foo": "baz"}]),
+        )
+
+        assert res.data.equals(pa.table({"foo": ["bar", "baz"]}))
+
+
+def test_csv_to_sinkinput():
+    csv_obj = UtilsFileSystemOutputType(filename="f.csv", content=b"foo,n\nbar,1\n")
+    for frame_type in ["pandas", "arrow"]:
+        with build_op_context(
+            config={"dest_asset": "my_asset", "frame_type": frame_type}
+        ) as context:
+            res = csv_to_utilssinkinput(context, csv_obj=csv_obj)
+
+        assert res.dest_asset == "my_asset"
+        assert to_arrow_table(res.data).equals(pa.table({"foo": ["bar"], "n": [1]}))
+
+
+def test_sync_dynamic_partitions(tmp_path):
+    instance = DagsterInstance.ephemeral()
+    instance.add_dynamic_partitions("mock", ["a", "b", "c"])
+
+    calls = []
+    add = instance.add_dynamic_partitions
+    instance.add_dynamic_partitions = lambda *args: calls.append(args) or add(*args)
+
+    added, deleted = sync_dynamic_partitions(
+        instance, "mock", ["b", "c", "d", "e", "f", "d"], batch_size=2
+    )
+    assert added == ["d", "e", "f"]
+    assert deleted == ["a"]
+    assert len(calls) == 2
+    assert sorted(instance.get_dynamic_partitions("mock")) == ["b", "c", "d", "e", "f"]
+
+    added, deleted = sync_dynamic_partitions(
+        instance, "mock", ["g"], delete_missing=False
+    )
+    assert (added, deleted) == (["g"], [])
+    assert len(instance.get_dynamic_partitions("mock")) == 6
+
+
+def test_delete_dynamic_partitions():
+    with instance_for_test() as instance:
+        instance.add_dynamic_partitions("mock", ["a", "b", "c"])
+        instance.add_dynamic_partitions("other", ["a"])
+
+        delete_dynamic_partitions(instance, "mock", ["a", "c", "missing"])
+
+        assert instance.get_dynamic_partitions("mock") == ["b"]
+        assert not instance.has_dynamic_partition("mock", "a")
+        assert instance.get_dynamic_partitions("other") == ["a"]
+
+
+def test_sync_dynamic_partitions_op(tmp_path):
+    instance = DagsterInstance.ephemeral()
+    instance.add_dynamic_partitions("mock", ["old"])
+    partitions_file = tmp_path / "partitions.txt"
+    partitions_file.write_text("from_file\n\n")
+
+    with build_op_context(
+        instance=instance,
+        config={
+            "dynamic_partition_name": "mock",
+            "partitions": ["from_config"],
+            "partitions_file": str(partitions_file),
+        },
+    ) as context:
+        sync_dynamic_partitions_op(context, partition_keys=["from_input"])
+
+    assert sorted(instance.get_dynamic_partitions("mock")) == [
+        "from_config",
+        "from_file",
+        "from_input",
+    ]
+
+
+def test_add_or_delete_dynamic_partitions():
+    instance = DagsterInstance.ephemeral()
+    instance.add_dynamic_partitions("mock", ["keep", "some_partition"])
+
+    with build_op_context(
+        instance=instance,
+        config={
+            "dynamic_partition_name": "mock",
+            "partitions_to_add": ["new"],
+            "partition_to_delete": "some_partition",
+        },
+    ) as context:
+        add_or_delete_dynamic_partitions(context)
+
+    assert sorted(instance.get_dynamic_partitions("mock")) == ["keep", "new"]
@@ -1,8 +1,29 @@
+import io
+import pickle
+from types import SimpleNamespace
+
 import pandas as pd
-from dagster import AssetKey, DagsterType, build_input_context, build_output_context
+import pyarrow as pa
+import pytest
+from dagster import (
+    AssetKey,
+    AssetOut,
+    DagsterType,
+    Output,
+    asset,
+    build_input_context,
+    build_output_context,
+    materialize,
+    multi_asset,
+)
 
 from dagster_utils.dagsterhub import UtilsS3IOManager
-from dagster_utils.lib import StubSnowflakeClient, UtilsSinkInputType
+from dagster_utils.lib import (
+    StubSnowflakeClient,
+    UtilsChunkedSinkInputType,
+    UtilsS3Resource,
+    UtilsSinkInputType,
+)
 
 
 def test_utils_s3_io_manager(mock_s3_bucket, mock_s3_resource, aws_creds):
@@ -84,3 +105,677 @@ def test_utils_s3_io_manager_load_to_snow_partitioned(
     [i for i in manager.handle_output(out_context, out)]
     assert manager.load_input(in_context).dest_asset == out.dest_asset
     assert manager.load_input(in_context).data.equals(out.data)
+
+
+def test_utils_s3_io_manager_tracing_metadata(
+    mock_s3_bucket, mock_s3_resource, aws_creds
+):
+    manager = UtilsS3IOManager(
+        bucket="test-bucket",
+        utils_snow=StubSnowflakeClient(),
+    )
+
+    out = UtilsSinkInputType(
+        load_to_snow=True,
+        dest_asset="my_cool_asset",
+        data=pd.DataFrame({"foo": "bar", "baz": "qux"}, index=[0]),
+    )
+    out_context = build_output_context(
+        asset_key=out.dest_asset,
+        step_key="some_key",
+        name="some_name",
+    )
+    metadata = {}
+    for entry in manager.handle_output(out_context, out):
+        metadata.update(entry)
+
+    for phase in [
+        "Pickle",
+        "S3 upload",
+        "Parquet encode",
+        "S3 parquet upload",
+        "Snowflake DELETE",
+        "Snowflake COPY",
+    ]:
+        assert f"{phase} time (s)" in metadata
+    assert metadata["S3 upload bytes"] == metadata["Pickle bytes"]
+    assert "Peak RSS (MB)" in metadata
+
+
+def test_utils_s3_io_manager_async_loads_wait_on_last_output(
+    mock_s3_bucket, mock_s3_resource, aws_creds
+):
+    @multi_asset(outs={"first": AssetOut(), "second": AssetOut()})
+    def two_loads():
+        for name in ["first", "second"]:
+            yield Output(
+                UtilsSinkInputType(
+                    load_to_snow=True,
+                    dest_asset=name,
+                    data=pd.DataFrame({"foo": "bar"}, index=[0]),
+                ),
+                output_name=name,
+            )
+
+    result = materialize(
+        [two_loads],
+        resources={
+            "io_manager": UtilsS3IOManager(
+                bucket="test-bucket",
+                utils_snow=StubSnowflakeClient(async_loads=True),
+            )
+        },
+    )
+    assert result.success
+
+    first, second = [
+        event.materialization.metadata
+        for event in result.get_asset_materialization_events()
+    ]
+    assert "Snowflake loads" not in first
+    # Submitted loads are only reported loaded once they have finished
+    for metadata in [first, second]:
+        assert metadata["Snowflake load"].value == "submitted"
+        assert "Loaded to snowflake" not in metadata
+    loads = second["Snowflake loads"].value
+    assert set(loads) == {
+        first["Snowflake query id"].value,
+        second["Snowflake query id"].value,
+    }
+    assert {load["status"] for load in loads.values()} == {"loaded"}
+
+
+def test_utils_s3_io_manager_async_loads_optional_outputs(
+    mock_s3_bucket, mock_s3_resource, aws_creds
+):
+    @multi_asset(
+        outs={
+            "first": AssetOut(is_required=False),
+            "second": AssetOut(is_required=False),
+        },
+        can_subset=True,
+    )
+    def optional_loads():
+        yield Output(
+            UtilsSinkInputType(
+                load_to_snow=True,
+                dest_asset="first",
+                data=pd.DataFrame({"foo": "bar"}, index=[0]),
+            ),
+            output_name="first",
+        )
+
+    result = materialize(
+        [optional_loads],
+        resources={
+            "io_manager": UtilsS3IOManager(
+                bucket="test-bucket",
+                utils_snow=StubSnowflakeClient(async_loads=True),
+            )
+        },
+    )
+    assert result.success
+
+    # The step may not emit its other output, so the load is awaited within the step
+    [first] = [
+        event.materialization.metadata
+        for event in result.get_asset_materialization_events()
+    ]
+    assert set(first["Snowflake loads"].value) == {first["Snowflake query id"].value}
+
+
+def test_utils_s3_io_manager_forgets_handled_steps():
+    manager = UtilsS3IOManager(
+        bucket="test-bucket",
+        utils_snow=StubSnowflakeClient(),
+    )
+
+    def output_context(name):
+        # build_output_context can't build contexts with a step
+        step_outputs = [
+            SimpleNamespace(name=output_name, is_required=True)
+            for output_name in ["first", "second", "elsewhere"]
+        ]
+        output_defs = {
+            "first": SimpleNamespace(io_manager_key="io_manager"),
+            "second": SimpleNamespace(io_manager_key="io_manager"),
+            "elsewhere": SimpleNamespace(io_manager_key="other_io_manager"),
+        }
+        return SimpleNamespace(
+            name=name,
+            run_id="run",
+            step_context=SimpleNamespace(
+                step=SimpleNamespace(key="step", step_outputs=step_outputs),
+                op_def=SimpleNamespace(output_def_named=output_defs.__getitem__),
+            ),
+        )
+
+    assert not manager._is_last_output(output_context("first"))
+    # Outputs handled by other IO managers aren't waited for
+    assert manager._is_last_output(output_context("second"))
+    assert manager._handled_outputs == {}
+
+
+def test_utils_s3_io_manager_teardown_waits_for_loads(
+    mock_s3_bucket, mock_s3_resource, aws_creds
+):
+    manager = UtilsS3IOManager(
+        bucket="test-bucket",
+        utils_snow=StubSnowflakeClient(async_loads=True),
+    )
+    utils_snow = manager.utils_snow
+    list(
+        utils_snow.copy_into_landing_area(
+            build_output_context(asset_key="my_table"), "file.parquet"
+        )
+    )
+
+    manager.teardown_after_execution(None)
+    assert not utils_snow.has_pending_loads
+
+
+@pytest.mark.parametrize(
+    "direct_load_max_bytes,loaded_directly",
+    [(None, False), (0, False), (10**6, True)],
+)
+def test_utils_s3_io_manager_direct_load(
+    mock_s3_bucket, mock_s3_resource, aws_creds, direct_load_max_bytes, loaded_directly
+):
+    manager = UtilsS3IOManager(
+        bucket="test-bucket",
+        utils_snow=StubSnowflakeClient(),
+        snowflake_direct_load_max_bytes=direct_load_max_bytes,
+    )
+
+    out = UtilsSinkInputType(
+        load_to_snow=True,
+        dest_asset="my_cool_asset",
+        data=pd.DataFrame({"foo": "bar", "baz": "qux"}, index=[0]),
+    )
+    out_context = build_output_context(
+        asset_key=out.dest_asset,
+        step_key="some_key",
+        name="some_name",
+    )
+    metadata = {}
+    for entry in manager.handle_output(out_context, out):
+        metadata.update(entry)
+
+    s3_keys = [
+        obj["Key"]
+        for obj in mock_s3_resource.list_objects_v2(Bucket="test-bucket")["Contents"]
+    ]
+    assert ("my_cool_asset.parquet" in s3_keys) is not loaded_directly
+    assert ("Snowflake stage path" in metadata) is loaded_directly
+    assert metadata["Loaded to snowflake"].value is True
+
+
+def test_utils_s3_io_manager_typed_columns(mock_s3_bucket, mock_s3_resource, aws_creds):
+    manager = UtilsS3IOManager(
+        bucket="test-bucket",
+        utils_snow=StubSnowflakeClient(typed_columns=True),
+    )
+
+    out = UtilsSinkInputType(
+        load_to_snow=True,
+        dest_asset="my_cool_asset",
+        data=pd.DataFrame({"foo": "bar", "baz": "qux"}, index=[0]),
+    )
+    out_context = build_output_context(
+        asset_key=out.dest_asset,
+        step_key="some_key",
+        name="some_name",
+    )
+    [i for i in manager.handle_output(out_context, out)]
+
+    parquet = mock_s3_resource.get_object(
+        Bucket="test-bucket", Key="my_cool_asset.parquet"
+    )["Body"].read()
+    df = pd.read_parquet(io.BytesIO(parquet))
+    assert list(df.columns) == ["foo", "baz", "SOURCE_LOAD_AT"]
+
+
+def test_utils_s3_io_manager_split_parquet(mock_s3_bucket, mock_s3_resource, aws_creds):
+    manager = UtilsS3IOManager(
+        bucket="test-bucket",
+        utils_snow=StubSnowflakeClient(),
+        parquet_row_group_bytes=1,
+        parquet_max_file_bytes=1,
+    )
+
+    out = UtilsSinkInputType(
+        load_to_snow=True,
+        dest_asset="my_cool_asset",
+        data=pd.DataFrame({"foo": ["bar", "baz", "qux"]}),
+    )
+    out_context = build_output_context(
+        asset_key=out.dest_asset,
+        step_key="some_key",
+        name="some_name",
+    )
+    metadata = {}
+    for entry in manager.handle_output(out_context, out):
+        metadata.update(entry)
+
+    s3_keys = [
+        obj["Key"]
+        for obj in mock_s3_resource.list_objects_v2(Bucket="test-bucket")["Contents"]
+    ]
+    assert sorted(key for key in s3_keys if key.endswith(".parquet")) == [
+        "my_cool_asset.parquet",
+        "my_cool_asset.part-00001.parquet",
+        "my_cool_asset.part-00002.parquet",
+    ]
+    assert metadata["S3 parquet storage path"].value == (
+        "s3://test-bucket/^my_cool_asset([.]part-[0-9]+)?[.]parquet$"
+    )
+
+
+def test_utils_s3_io_manager_uses_s3_resource(
+    mock_s3_bucket, mock_s3_resource, aws_creds
+):
+    manager = UtilsS3IOManager(
+        bucket="test-bucket",
+        utils_snow=StubSnowflakeClient(),
+        utils_s3=UtilsS3Resource(max_pool_connections=7),
+    )
+
+    assert manager.s3.meta.config.max_pool_connections == 7
+    assert (
+        UtilsS3IOManager(bucket="test-bucket", utils_snow=StubSnowflakeClient()).s3
+        is UtilsS3Resource().client
+    )
+
+
+def test_utils_s3_io_manager_write_behind(mock_s3_bucket, mock_s3_resource, aws_creds):
+    @multi_asset(outs={"first": AssetOut(), "second": AssetOut()})
+    def two_outputs():
+        yield Output("foo", output_name="first")
+        yield Output("bar", output_name="second")
+
+    result = materialize(
+        [two_outputs],
+        resources={
+            "io_manager": UtilsS3IOManager(
+                bucket="test-bucket",
+                utils_snow=StubSnowflakeClient(),
+                write_behind=True,
+            )
+        },
+    )
+    assert result.success
+
+    first, second = [
+        event.materialization.metadata
+        for event in result.get_asset_materialization_events()
+    ]
+    assert "Write-behind uploads" not in first
+    assert second["Write-behind uploads"].value == 2
+    assert second["S3 write-behind upload count"].value == 2
+    s3_keys = [
+        obj["Key"]
+        for obj in mock_s3_resource.list_objects_v2(Bucket="test-bucket")["Contents"]
+    ]
+    assert sorted(s3_keys) == ["first", "second"]
+
+
+def test_utils_s3_io_manager_write_behind_failure(
+    mock_s3_bucket, mock_s3_resource, aws_creds
+):
+    manager = UtilsS3IOManager(
+        bucket="missing-bucket",
+        utils_snow=StubSnowflakeClient(),
+        write_behind=True,
+    )
+
+    out_context = build_output_context(name="abc", step_key="123")
+    with pytest.raises(RuntimeError, match="Background upload"):
+        [i for i in manager.handle_output(out_context, "my_string")]
+    manager.teardown_after_execution(None)
+
+
+def test_utils_s3_io_manager_in_memory_handoff(
+    mock_s3_bucket, mock_s3_resource, aws_creds, monkeypatch
+):
+    @asset
+    def asset_one():
+        return {"value": "one"}
+
+    @asset
+    def asset_two(asset_one):
+        return asset_one["value"] + "two"
+
+    def download_bytes(*args, **kwargs):
+        raise AssertionError("Input should be handed over in memory")
+
+    monkeypatch.setattr(UtilsS3Resource, "download_bytes", download_bytes)
+    result = materialize(
+        [asset_one, asset_two],
+        resources={
+            "io_manager": UtilsS3IOManager(
+                bucket="test-bucket",
+                utils_snow=StubSnowflakeClient(),
+                in_memory_handoff=True,
+            )
+        },
+    )
+    assert result.success
+    assert result.output_for_node("asset_two") == "onetwo"
+
+    s3_keys = [
+        obj["Key"]
+        for obj in mock_s3_resource.list_objects_v2(Bucket="test-bucket")["Contents"]
+    ]
+    assert sorted(s3_keys) == ["asset_one", "asset_two"]
+
+
+def test_utils_s3_io_manager_in_memory_handoff_hands_out_copies(
+    mock_s3_bucket, mock_s3_resource, aws_creds
+):
+    @asset
+    def asset_one():
+        return {"values": ["one"]}
+
+    @asset
+    def asset_two(asset_one):
+        asset_one["values"].append("two")
+        return asset_one["values"]
+
+    @asset
+    def asset_three(asset_one, asset_two):
+        return asset_one["values"]
+
+    result = materialize(
+        [asset_one, asset_two, asset_three],
+        resources={
+            "io_manager": UtilsS3IOManager(
+                bucket="test-bucket",
+                utils_snow=StubSnowflakeClient(),
+                in_memory_handoff=True,
+            )
+        },
+    )
+    assert result.success
+    assert result.output_for_node("asset_three") == ["one"]
+
+
+def test_utils_s3_io_manager_in_memory_handoff_persists_before_step_ends(
+    mock_s3_bucket, mock_s3_resource, aws_creds, monkeypatch
+):
+    manager = UtilsS3IOManager(
+        bucket="test-bucket",
+        utils_snow=StubSnowflakeClient(),
+        in_memory_handoff=True,
+    )
+
+    def handle(key, obj):
+        context = build_output_context(asset_key=key, run_id="run")
+        return [i for i in manager.handle_output(context, obj)]
+
+    # Steps of other processes may read the output as soon as the step has succeeded
+    handle("abc", "foo")
+    assert not manager.has_pending_uploads
+    body = mock_s3_resource.get_object(Bucket="test-bucket", Key="abc")["Body"]
+    assert pickle.loads(body.read()) == "foo"
+
+    def failing_upload_fileobj(self, *args, **kwargs):
+        raise ValueError("S3 is down")
+
+    monkeypatch.setattr(UtilsS3Resource, "upload_fileobj", failing_upload_fileobj)
+    with pytest.raises(RuntimeError, match="upload of def failed"):
+        handle("def", "bar")
+
+
+def test_utils_s3_io_manager_in_memory_handoff_over_budget(
+    mock_s3_bucket, mock_s3_resource, aws_creds
+):
+    @asset
+    def asset_one():
+        return "one"
+
+    @asset
+    def asset_two(asset_one):
+        return asset_one + "two"
+
+    result = materialize(
+        [asset_one, asset_two],
+        resources={
+            "io_manager": UtilsS3IOManager(
+                bucket="test-bucket",
+                utils_snow=StubSnowflakeClient(),
+                in_memory_handoff=True,
+                handoff_max_bytes=1,
+            )
+        },
+    )
+    assert result.success
+    assert result.output_for_node("asset_two") == "onetwo"
+    [one, _] = [
+        event.materialization.metadata
+        for event in result.get_asset_materialization_events()
+    ]
+    assert one["In-memory handoff"].value is False
+
+
+def test_utils_s3_io_manager_skip_unchanged(
+    mock_s3_bucket, mock_s3_resource, aws_creds
+):
+    manager = UtilsS3IOManager(
+        bucket="test-bucket",
+        utils_snow=StubSnowflakeClient(),
+        skip_unchanged=True,
+    )
+
+    def handle(obj):
+        metadata = {}
+        for entry in manager.handle_output(
+            build_output_context(name="abc", step_key="123"), obj
+        ):
+            metadata.update(entry)
+        return metadata
+
+    first, second, third = handle("foo"), handle("foo"), handle("bar")
+    assert first["Skipped: unchanged"].value is False
+    assert second["Skipped: unchanged"].value is True
+    assert "S3 upload time (s)" not in second
+    assert third["Skipped: unchanged"].value is False
+    assert first["Fingerprint"] == second["Fingerprint"] != third["Fingerprint"]
+    # Fingerprinted from the pickle, recorded as a single span
+    assert "Fingerprint count" not in first
+    assert first["Fingerprint bytes"].value > 0
+
+    body = mock_s3_resource.get_object(
+        Bucket="test-bucket", Key="storage/__EPHEMERAL_RUN_ID/123/abc"
+    )
+    assert body["Metadata"]["fingerprint"] == third["Fingerprint"].value
+
+
+def test_utils_s3_io_manager_skip_unchanged_load(
+    mock_s3_bucket, mock_s3_resource, aws_creds, monkeypatch
+):
+    manager = UtilsS3IOManager(
+        bucket="test-bucket",
+        utils_snow=StubSnowflakeClient(),
+        skip_unchanged=True,
+    )
+
+    def handle(df):
+        out = UtilsSinkInputType(load_to_snow=True, dest_asset="my_cool_asset", data=df)
+        metadata = {}
+        for entry in manager.handle_output(
+            build_output_context(asset_key=out.dest_asset, name="some_name"), out
+        ):
+            metadata.update(entry)
+        return metadata
+
+    def failing_copy(*args, **kwargs):
+        raise RuntimeError("COPY failed")
+        yield
+
+    df = pd.DataFrame({"foo": ["bar", "baz"], "n": [1, 2]})
+    with monkeypatch.context() as m:
+        m.setattr(StubSnowflakeClient, "copy_into_landing_area", failing_copy)
+        with pytest.raises(RuntimeError, match="COPY failed"):
+            handle(df)
+    stored = mock_s3_resource.list_objects_v2(Bucket="test-bucket")["Contents"]
+    assert "my_cool_asset.fingerprint" not in [obj["Key"] for obj in stored]
+
+    loaded = handle(df)
+    assert loaded["Skipped: unchanged"].value is False
+    assert "Snowflake COPY time (s)" in loaded
+    # The pickle isn't rewritten to store the fingerprint
+    stored = mock_s3_resource.head_object(Bucket="test-bucket", Key="my_cool_asset")
+    assert "fingerprint" not in stored["Metadata"]
+
+    skipped = handle(df.copy())
+    assert skipped["Skipped: unchanged"].value is True
+    assert "Snowflake COPY time (s)" not in skipped
+    assert "Loaded to snowflake" not in skipped
+
+    assert handle(df.assign(n=[1, 3]))["Skipped: unchanged"].value is False
+    assert handle(df.assign(n=[1, 3]))["Skipped: unchanged"].value is True
+
+    # Rewritten without fingerprint, e.g. by a run not skipping unchanged outputs
+    mock_s3_resource.put_object(Bucket="test-bucket", Key="my_cool_asset", Body=b"")
+    assert handle(df.assign(n=[1, 3]))["Skipped: unchanged"].value is False
+
+
+def test_utils_s3_io_manager_skip_unchanged_load_config(
+    mock_s3_bucket, mock_s3_resource, aws_creds
+):
+    def handle(utils_snow):
+        manager = UtilsS3IOManager(
+            bucket="test-bucket", utils_snow=utils_snow, skip_unchanged=True
+        )
+        out = UtilsSinkInputType(
+            load_to_snow=True,
+            dest_asset="my_cool_asset",
+            data=pd.DataFrame({"foo": ["bar", "baz"], "n": [1, 2]}),
+        )
+        metadata = {}
+        for entry in manager.handle_output(
+            build_output_context(asset_key=["src_landing", "my_cool_asset"]), out
+        ):
+            metadata.update(entry)
+        return metadata["Skipped: unchanged"].value
+
+    assert handle(StubSnowflakeClient()) is False
+    assert handle(StubSnowflakeClient()) is True
+    # Unchanged data is loaded again into the new landing table layout
+    assert handle(StubSnowflakeClient(typed_columns=True)) is False
+    assert handle(StubSnowflakeClient(typed_columns=True)) is True
+    assert handle(StubSnowflakeClient(typed_columns=True, database="OTHER")) is False
+
+
+def test_utils_s3_io_manager_skip_unchanged_failed_reload(
+    mock_s3_bucket, mock_s3_resource, aws_creds, monkeypatch
+):
+    def handle(df, skip_unchanged=True):
+        manager = UtilsS3IOManager(
+            bucket="test-bucket",
+            utils_snow=StubSnowflakeClient(),
+            skip_unchanged=skip_unchanged,
+        )
+        out = UtilsSinkInputType(load_to_snow=True, dest_asset="my_cool_asset", data=df)
+        metadata = {}
+        for entry in manager.handle_output(
+            build_output_context(asset_key=out.dest_asset, name="some_name"), out
+        ):
+            metadata.update(entry)
+        return metadata
+
+    def failing_copy(*args, **kwargs):
+        raise RuntimeError("COPY failed")
+        yield
+
+    df = pd.DataFrame({"foo": ["bar", "baz"], "n": [1, 2]})
+    handle(df)
+    handle(df.assign(n=[1, 3]), skip_unchanged=False)
+    # The same pickle as the first load, whose sidecar is still there
+    with monkeypatch.context() as m:
+        m.setattr(StubSnowflakeClient, "copy_into_landing_area", failing_copy)
+        with pytest.raises(RuntimeError, match="COPY failed"):
+            handle(df)
+    assert handle(df)["Skipped: unchanged"].value is False
+
+
+def test_utils_s3_io_manager_chunked_sink(mock_s3_bucket, mock_s3_resource, aws_creds):
+    manager = UtilsS3IOManager(
+        bucket="test-bucket",
+        utils_snow=StubSnowflakeClient(typed_columns=True, stage="ETLHUB_LOADS"),
+        parquet_max_file_bytes=1,
+    )
+
+    def chunks():
+        yield pd.DataFrame({"foo": ["a", "b"], "n": [1, 2]})
+        yield pa.RecordBatch.from_pydict({"foo": ["c"], "n": [3]})
+        yield pa.table({"foo": ["d"], "n": [4]})
+
+    out = UtilsChunkedSinkInputType(
+        load_to_snow=True, dest_asset="my_cool_asset", chunks=chunks()
+    )
+    out_context = build_output_context(asset_key=out.dest_asset, name="some_name")
+    in_context = build_input_context(
+        upstream_output=out_context,
+        asset_key=AssetKey(out.dest_asset),
+        dagster_type=DagsterType(
+            type_check_fn=lambda _, x: True,
+            name="mock_io_dagster_type_test",
+        ),
+    )
+    metadata = {}
+    for entry in manager.handle_output(out_context, out):
+        metadata.update(entry)
+
+    assert metadata["Rows"].value == 4
+    assert metadata["Loaded to snowflake"].value is True
+    assert metadata["S3 parquet storage path"].value == (
+        "s3://test-bucket/^my_cool_asset([.]part-[0-9]+)?[.]parquet$"
+    )
+    assert "Snowflake COPY time (s)" in metadata
+
+    loaded = manager.load_input(in_context)
+    assert loaded.dest_asset == out.dest_asset
+    df = pa.Table.from_batches(list(loaded.chunks)).to_pandas()
+    assert list(df.columns) == ["foo", "n", "SOURCE_LOAD_AT"]
+    assert df["foo"].tolist() == ["a", "b", "c", "d"]
+    assert df["SOURCE_LOAD_AT"].nunique() == 1
+
+
+@pytest.mark.parametrize("direct_load_max_bytes", [None, 10**6])
+def test_utils_s3_io_manager_arrow_sink(
+    mock_s3_bucket, mock_s3_resource, aws_creds, direct_load_max_bytes
+):
+    manager = UtilsS3IOManager(
+        bucket="test-bucket",
+        utils_snow=StubSnowflakeClient(typed_columns=True, stage="ETLHUB_LOADS"),
+        snowflake_direct_load_max_bytes=direct_load_max_bytes,
+    )
+
+    out = UtilsSinkInputType(
+        load_to_snow=True,
+        dest_asset="my_cool_asset",
+        data=pa.table({"foo": ["bar", "baz"], "n": [1, 2]}),
+    )
+    out_context = build_output_context(asset_key=out.dest_asset, name="some_name")
+    in_context = build_input_context(
+        upstream_output=out_context,
+        asset_key=AssetKey(out.dest_asset),
+        dagster_type=DagsterType(
+            type_check_fn=lambda _, x: True,
+            name="mock_io_dagster_type_test",
+        ),
+    )
+    metadata = {}
+    for entry in manager.handle_output(out_context, out):
+        metadata.update(entry)
+
+    assert metadata["Rows"].value == 2
+    assert metadata["Loaded to snowflake"].value is True
+    assert manager.load_input(in_context).data.equals(out.data)
+    if direct_load_max_bytes is None:
+        parquet = mock_s3_resource.get_object(
+            Bucket="test-bucket", Key="my_cool_asset.parquet"
+        )["Body"].read()
+        df = pd.read_parquet(io.BytesIO(parquet))
+        assert list(df.columns) == ["foo", "n", "SOURCE_LOAD_AT"]
@@ -0,0 +1,160 @@
+import io
+import os
+import pickle
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from dagster_utils.dagsterhub._s3_parquet import (
+    S3MultipartWriter,
+    S3ParquetChunks,
+    parquet_part_key,
+    parquet_parts_pattern,
+    row_group_rows,
+    write_parquet_tables_to_s3,
+    write_parquet_to_s3,
+)
+
+
+def _df(rows: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "id": np.arange(rows),
+            "value": np.random.default_rng(0).random(rows),
+            "label": ["foo"] * rows,
+        }
+    )
+
+
+def _read(s3, key) -> pd.DataFrame:
+    body = s3.get_object(Bucket="test-bucket", Key=key)["Body"].read()
+    return pd.read_parquet(io.BytesIO(body))
+
+
+def test_multipart_writer(mock_s3_bucket, mock_s3_resource):
+    data = os.urandom(11 * 1024**2)
+    writer = S3MultipartWriter(
+        mock_s3_resource, "test-bucket", "multi", part_size=5 * 1024**2
+    )
+    writer.write(data[:1000])
+    writer.write(data[1000:])
+    writer.complete()
+
+    assert len(writer._parts) == 3
+    assert (
+        mock_s3_resource.get_object(Bucket="test-bucket", Key="multi")["Body"].read()
+        == data
+    )
+
+
+def test_multipart_writer_small_object(mock_s3_bucket, mock_s3_resource):
+    writer = S3MultipartWriter(mock_s3_resource, "test-bucket", "small")
+    writer.write(b"data")
+    writer.complete()
+
+    assert writer._upload_id is None
+    assert (
+        mock_s3_resource.get_object(Bucket="test-bucket", Key="small")["Body"].read()
+        == b"data"
+    )
+
+
+def test_row_group_rows():
+    df = _df(1000)
+    assert row_group_rows(df, 24 * 100) == 100
+    assert row_group_rows(df, 1) == 1
+    assert row_group_rows(df.iloc[:0], 1000) == 1
+
+
+def test_write_parquet_to_s3_row_groups(mock_s3_bucket, mock_s3_resource):
+    df = _df(1000)
+    keys = write_parquet_to_s3(
+        mock_s3_resource, "test-bucket", "asset", df, row_group_bytes=24 * 100
+    )
+
+    assert keys == ["asset.parquet"]
+    body = mock_s3_resource.get_object(Bucket="test-bucket", Key=keys[0])["Body"]
+    assert pq.ParquetFile(io.BytesIO(body.read())).num_row_groups == 10
+    assert _read(mock_s3_resource, keys[0]).equals(df)
+
+
+def test_write_parquet_to_s3_splits_files(mock_s3_bucket, mock_s3_resource):
+    df = _df(1000)
+    keys = write_parquet_to_s3(
+        mock_s3_resource,
+        "test-bucket",
+        "my/asset",
+        df,
+        row_group_bytes=24 * 100,
+        max_file_bytes=1,
+    )
+
+    assert keys == [parquet_part_key("my/asset", i) for i in range(10)]
+    assert keys[:2] == ["my/asset.parquet", "my/asset.part-00001.parquet"]
+    assert pd.concat(
+        [_read(mock_s3_resource, key) for key in keys], ignore_index=True
+    ).equals(df)
+
+    pattern = parquet_parts_pattern("my/asset")
+    assert all(re.search(pattern, key) for key in keys)
+    for other_key in [
+        "my/asset_other.parquet",
+        "my/assetXparquet",
+        "other_prefix/my/asset.parquet",
+        "my/asset.parquet.bak",
+        "my/asset.part-00001.parquet.bak",
+    ]:
+        assert not re.search(pattern, other_key)
+
+    # Objects that only look like parts are left alone by the cleanup
+    mock_s3_resource.put_object(
+        Bucket="test-bucket", Key="my/asset.part-00001.parquet.bak", Body=b""
+    )
+
+    # A smaller rewrite removes the parts it no longer needs
+    keys = write_parquet_to_s3(mock_s3_resource, "test-bucket", "my/asset", df)
+    assert keys == ["my/asset.parquet"]
+    remaining = mock_s3_resource.list_objects_v2(Bucket="test-bucket")["Contents"]
+    assert [obj["Key"] for obj in remaining] == [
+        "my/asset.parquet",
+        "my/asset.part-00001.parquet.bak",
+    ]
+
+
+def test_write_parquet_to_s3_empty_frame(mock_s3_bucket, mock_s3_resource):
+    df = _df(0)
+    keys = write_parquet_to_s3(mock_s3_resource, "test-bucket", "empty", df)
+
+    assert keys == ["empty.parquet"]
+    assert list(_read(mock_s3_resource, keys[0]).columns) == ["id", "value", "label"]
+
+
+def test_write_parquet_tables_to_s3(mock_s3_bucket, mock_s3_resource):
+    df = _df(300)
+    tables = (
+        pa.Table.from_pandas(df.iloc[start : start + 100], preserve_index=False)
+        for start in range(0, 300, 100)
+    )
+    keys, schema = write_parquet_tables_to_s3(
+        mock_s3_resource, "test-bucket", "chunks", tables, max_file_bytes=1
+    )
+
+    assert keys == [parquet_part_key("chunks", i) for i in range(3)]
+    assert schema.names == ["id", "value", "label"]
+
+    chunks = pickle.loads(pickle.dumps(S3ParquetChunks("test-bucket", keys)))
+    chunks.s3 = mock_s3_resource
+    for _ in range(2):
+        assert pa.Table.from_batches(list(chunks)).to_pandas().equals(df)
+
+
+def test_write_parquet_tables_to_s3_no_tables(mock_s3_bucket, mock_s3_resource):
+    keys, schema = write_parquet_tables_to_s3(
+        mock_s3_resource, "test-bucket", "chunks", iter([])
+    )
+
+    assert keys == [] and schema is None
+    assert list(S3ParquetChunks("test-bucket", keys, mock_s3_resource)) == []
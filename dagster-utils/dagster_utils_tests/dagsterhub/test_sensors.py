@@ -1,6 +1,16 @@
+import json
+
 import boto3
 import pytest
-from dagster import RunRequest, SkipReason, job, op
+from dagster import (
+    RunRequest,
+    SkipReason,
+    build_sensor_context,
+    instance_for_test,
+    job,
+    op,
+)
+from dagster._core.storage.tags import RUN_KEY_TAG, SENSOR_NAME_TAG
 
 from dagster_utils.dagsterhub import generate_sqs_sensor
 
@@ -17,6 +27,8 @@ def some_job():
 
 @pytest.fixture
 def mock_sqs(monkeypatch):
+    calls = {"delete": [], "extend": []}
+
     class MockSQSClient:
         def __init__(self, *args, **kwargs):
             pass
@@ -25,27 +37,106 @@ def mock_sqs(monkeypatch):
             if kwargs["QueueUrl"] == "example.com":
                 return {}
             elif kwargs["QueueUrl"] == "foobar":
-                return {"Messages": [{"ReceiptHandle": "foo", "Body": "bar"}]}
+                return {
+                    "Messages": [
+                        {"MessageId": "msg-1", "ReceiptHandle": "foo", "Body": "bar"}
+                    ]
+                }
+            elif kwargs["QueueUrl"] == "foobar.fifo":
+                return {
+                    "Messages": [
+                        {
+                            "MessageId": "msg-1",
+                            "ReceiptHandle": "foo",
+                            "Body": "Bar",
+                            "Attributes": {"MessageGroupId": "group-a"},
+                        }
+                    ]
+                }
 
         def delete_message(self, *args, **kwargs):
+            calls["delete"].append(kwargs["ReceiptHandle"])
+            return {}
+
+        def delete_message_batch(self, *args, **kwargs):
+            calls["delete"] += [entry["ReceiptHandle"] for entry in kwargs["Entries"]]
+            return {}
+
+        def change_message_visibility_batch(self, *args, **kwargs):
+            calls["extend"] += [entry["ReceiptHandle"] for entry in kwargs["Entries"]]
             return {}
 
     monkeypatch.setattr(boto3, "client", MockSQSClient)
+    yield calls
+
+
+@pytest.fixture
+def instance():
+    with instance_for_test() as instance:
+        yield instance
 
 
-def test_generate_sqs_sensor_returns_skipreason(mock_sqs):
+def test_generate_sqs_sensor_returns_skipreason(mock_sqs, instance):
     sensor = generate_sqs_sensor("foo", [some_job], "example.com", {})
 
-    assert sensor() == SkipReason("No new messages in SQS queue.")
+    context = build_sensor_context(instance=instance)
+    assert sensor(context) == SkipReason("No new messages in SQS queue.")
 
 
-def test_generate_sqs_sensor_message_no_match(mock_sqs):
+def test_generate_sqs_sensor_message_no_match(mock_sqs, instance):
     sensor = generate_sqs_sensor("foo", [some_job], "foobar", {})
 
-    assert sensor() == SkipReason("Message does not match any jobs in this repository")
+    context = build_sensor_context(instance=instance)
+    assert sensor(context) == SkipReason(
+        "Message does not match any jobs in this repository"
+    )
+
+
+def test_generate_sqs_sensor_yields_runrequest(mock_sqs, instance):
+    sensor = generate_sqs_sensor("foo", [some_job], "foobar", {"bar": "bla"})
+
+    context = build_sensor_context(instance=instance)
+    assert sensor(context) == [RunRequest(run_key="msg-1", job_name="bla")]
+    # Message is kept in the queue until its run is launched
+    assert mock_sqs["delete"] == []
+    assert json.loads(context.cursor)["pending"] == {"msg-1": "foo"}
 
 
-def test_generate_sqs_sensor_yields_runrequest(mock_sqs):
+def test_generate_sqs_sensor_extends_visibility_until_launched(mock_sqs, instance):
     sensor = generate_sqs_sensor("foo", [some_job], "foobar", {"bar": "bla"})
 
-    assert sensor() == RunRequest(run_key="foo", job_name="bla")
+    cursor = json.dumps({"seen": [], "pending": {"msg-1": "old-handle"}})
+    context = build_sensor_context(instance=instance, cursor=cursor)
+    assert sensor(context) == [RunRequest(run_key="msg-1", job_name="bla")]
+    assert mock_sqs["extend"] == ["old-handle"]
+    assert mock_sqs["delete"] == []
+
+
+def test_generate_sqs_sensor_deletes_launched_and_dedups(mock_sqs, instance):
+    sensor = generate_sqs_sensor("foo", [some_job], "foobar", {"bar": "bla"})
+    some_job.execute_in_process(
+        instance=instance,
+        tags={SENSOR_NAME_TAG: "foo", RUN_KEY_TAG: "msg-1"},
+    )
+
+    cursor = json.dumps({"seen": [], "pending": {"msg-1": "old-handle"}})
+    context = build_sensor_context(instance=instance, cursor=cursor)
+    assert sensor(context) == SkipReason(
+        "Message does not match any jobs in this repository"
+    )
+    # Launched message is deleted, and its redelivery is dropped
+    assert mock_sqs["delete"] == ["old-handle", "foo"]
+    assert json.loads(context.cursor) == {"seen": ["msg-1"], "pending": {}}
+
+
+def test_generate_sqs_sensor_fifo_tags_message_group(mock_sqs, instance):
+    sensor = generate_sqs_sensor("foo", [some_job], "foobar.fifo", {"bar": "bla"})
+
+    context = build_sensor_context(instance=instance)
+    assert sensor(context) == [
+        RunRequest(
+            run_key="msg-1",
+            job_name="bla",
+            tags={"sqs/message_group_id": "group-a"},
+        )
+    ]
@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+from dagster_utils.dagsterhub._write_behind import WriteBehindUploader
+
+
+def test_write_behind_bounds_in_flight_bytes():
+    uploader = WriteBehindUploader(max_workers=4, max_bytes=10)
+    release = threading.Event()
+    seen = []
+
+    def upload():
+        seen.append(uploader.in_flight_bytes)
+        release.wait(5)
+
+    uploader.submit("a", 6, upload)
+    blocked = threading.Thread(target=uploader.submit, args=("b", 6, upload))
+    blocked.start()
+    blocked.join(0.2)
+    assert blocked.is_alive()
+
+    release.set()
+    blocked.join(5)
+    metadata = uploader.flush()
+    uploader.shutdown()
+
+    assert max(seen) <= 10
+    assert metadata["Write-behind uploads"].value == 2
+    assert metadata["Write-behind bytes"].value == 12
+    # Upload timings are reported too, though they ran on worker threads
+    assert metadata["S3 write-behind upload count"].value == 2
+    assert metadata["S3 write-behind upload bytes"].value == 12
+    assert metadata["S3 write-behind upload time (s)"].value > 0
+    assert uploader.in_flight_bytes == 0
+
+
+def test_write_behind_lets_oversized_upload_through():
+    uploader = WriteBehindUploader(max_bytes=1)
+    uploader.submit("a", 100, lambda: None)
+    uploader.flush()
+    uploader.shutdown()
+
+
+def test_write_behind_keeps_order_per_key():
+    uploader = WriteBehindUploader(max_workers=4)
+    started = threading.Event()
+    calls = []
+
+    def first():
+        started.wait(5)
+        calls.append("first")
+
+    uploader.submit("a", 1, first)
+    uploader.submit("a", 1, calls.append, "second")
+    started.set()
+    uploader.flush()
+    uploader.shutdown()
+
+    assert calls == ["first", "second"]
+
+
+def test_write_behind_flush_reports_uploads_since_last_flush():
+    uploader = WriteBehindUploader()
+    uploader.submit("a", 1, lambda: None)
+    uploader.flush()
+    uploader.submit("b", 2, lambda: None)
+    metadata = uploader.flush()
+    uploader.shutdown()
+
+    assert "S3 write-behind upload count" not in metadata
+    assert metadata["S3 write-behind upload bytes"].value == 2
+
+
+def test_write_behind_flush_raises_failures():
+    uploader = WriteBehindUploader()
+
+    def fail():
+        raise ValueError("boom")
+
+    uploader.submit("a", 1, fail)
+    uploader.submit("b", 1, lambda: None)
+    with pytest.raises(RuntimeError, match="a failed") as e:
+        uploader.flush()
+    uploader.shutdown()
+
+    assert isinstance(e.value.__cause__, ValueError)
+    assert not uploader.has_pending
@@ -9,3 +9,4 @@ def mock_fetch_auth(monkeypatch):
         return {"access_token": ""}
 
     monkeypatch.setattr(utils, "fetch_authentication", mock_fetch_authentication)
+    monkeypatch.setattr(utils, "prefetch_registered_authentication", lambda auth: None)
@@ -0,0 +1,126 @@
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+import requests
+
+from dagster_utils.lib import (
+    PubChemReturnParameters,
+    UtilsFileSystemOutputType,
+    UtilsGMailClient,
+    UtilsGSheetsClient,
+    UtilspCloudClient,
+    UtilsPubChemClient,
+    UtilsWebAPIOutputType,
+    _google_auth,
+)
+from dagster_utils.testing import CassetteMissError, use_cassette
+
+CASSETTES_DIR = os.path.join(os.path.dirname(__file__), "_cassettes")
+
+
+@pytest.fixture(autouse=True)
+def clear_google_tokens():
+    _google_auth.clear_google_token_managers()
+    yield
+    _google_auth.clear_google_token_managers()
+
+
+def test_pcloud_read_files_by_id(mock_fetch_auth):
+    with use_cassette(os.path.join(CASSETTES_DIR, "pcloud.json")):
+        res = UtilspCloudClient().read_files_by_id(["some_id"])
+
+    assert res == [
+        UtilsFileSystemOutputType(
+            filename="some_name",
+            content=b"some file content",
+            meta={
+                "file_size": 2,
+                "content_type": "some-content-type",
+                "created_at": datetime(2022, 10, 19, 7, 56, 33, tzinfo=timezone.utc),
+                "last_modified": datetime(2022, 10, 19, 7, 56, 33, tzinfo=timezone.utc),
+            },
+        )
+    ]
+
+
+def test_pubchem_fetch_compounds_by_name():
+    with use_cassette(os.path.join(CASSETTES_DIR, "pubchem.json")):
+        res = UtilsPubChemClient().fetch_compounds_by_name(
+            compounds=["glucose"],
+            return_parameters=[
+                PubChemReturnParameters(
+                    label="Molecular Weight", alias="molecular_weight"
+                ),
+            ],
+        )
+
+    assert res == UtilsWebAPIOutputType(
+        data=[{"compound_name": "glucose", "molecular_weight": "180.16"}]
+    )
+
+
+def test_gmail_extract_attachments(mock_fetch_auth):
+    resource = UtilsGMailClient()
+
+    with use_cassette(os.path.join(CASSETTES_DIR, "google.json")):
+        resource.setup_for_execution(None)
+        res = resource.fetch({"function": {"name": "extract_attachments", "args": {}}})
+
+    assert res == [
+        UtilsFileSystemOutputType(
+            filename="some attachment.xml",
+            content=b"\xff\xfeI\x00'\x00m\x00 \x00a\x00 \x00f\x00u\x00n\x00 \x00g\x00u\x00y\x00",
+        )
+    ]
+
+
+def test_gsheets_fetch(mock_fetch_auth):
+    resource = UtilsGSheetsClient()
+
+    with use_cassette(os.path.join(CASSETTES_DIR, "google.json")):
+        resource.setup_for_execution(None)
+        res = resource.fetch({"sheet_mapping": {"some_key": "some_id"}})
+
+    assert res == [
+        UtilsFileSystemOutputType(
+            filename="some_key.csv",
+            content=b"my;cool;csv\n1;2;3\n1;2;3",
+        )
+    ]
+
+
+def test_cassette_simulates_latency_and_bandwidth(mock_fetch_auth):
+    with use_cassette(
+        os.path.join(CASSETTES_DIR, "pcloud.json"), latency=0.05, bandwidth=100
+    ):
+        start = time.perf_counter()
+        UtilspCloudClient().read_files_by_id(["some_id"])
+        elapsed = time.perf_counter() - start
+
+    # 4 requests, with a bit over 200 bytes of bodies
+    assert elapsed >= 4 * 0.05 + 2
+
+
+def test_cassette_miss_raises(mock_fetch_auth):
+    with use_cassette(os.path.join(CASSETTES_DIR, "pcloud.json")):
+        with pytest.raises(CassetteMissError):
+            UtilspCloudClient().read_files_by_id(["other_id"])
+
+
+def test_cassette_records(tmp_path, mocker):
+    recorded = requests.Response()
+    recorded.status_code = 200
+    recorded._content = b"{}"
+    mocker.patch.object(requests.Session, "request", return_value=recorded)
+    cassette_path = str(tmp_path / "cassette.json")
+
+    with use_cassette(cassette_path, mode="record"):
+        UtilsPubChemClient().fetch_compounds_by_name(["foo"], [])
+    mocker.stopall()
+
+    with use_cassette(cassette_path):
+        res = UtilsPubChemClient().fetch_compounds_by_name(["foo"], [])
+
+    assert res == UtilsWebAPIOutputType(data=[])
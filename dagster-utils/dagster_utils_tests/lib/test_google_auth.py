@@ -0,0 +1,114 @@
+import time
+
+import pytest
+import requests
+
+from dagster_utils.lib import UtilsGSheetsClient, _google_auth, _transport
+
+CREDENTIALS = {"client_id": "foo", "client_secret": "bar", "refresh_token": "baz"}
+
+
+class MockResponse:
+    def __init__(self, status_code=200, json_body=None, content=b""):
+        self.status_code = status_code
+        self._json = json_body
+        self.content = content
+
+    def json(self):
+        return self._json
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(self.status_code)
+
+
+@pytest.fixture
+def mock_transport(monkeypatch):
+    handlers = {}
+
+    def mock_request(self, method, url, **kwargs):
+        return handlers[url](method, url, **kwargs)
+
+    monkeypatch.setattr(_transport.HttpTransport, "request", mock_request)
+    yield handlers
+
+
+@pytest.fixture
+def mock_token_endpoint(mock_transport):
+    _google_auth.clear_google_token_managers()
+    calls = []
+
+    def mock_post(method, url, data=None, **kwargs):
+        calls.append(data)
+        return MockResponse(
+            json_body={"access_token": f"token-{len(calls)}", "expires_in": 3600}
+        )
+
+    mock_transport[_google_auth.GOOGLE_TOKEN_URL] = mock_post
+    yield calls
+    _google_auth.clear_google_token_managers()
+
+
+def test_token_is_cached_and_shared(mock_token_endpoint):
+    manager = _google_auth.get_google_token_manager(CREDENTIALS)
+
+    assert manager.get_token() == "token-1"
+    assert manager.get_token() == "token-1"
+    assert _google_auth.get_google_token_manager(dict(CREDENTIALS)) is manager
+    assert mock_token_endpoint == [CREDENTIALS]
+
+
+def test_token_is_refreshed_when_expired(mock_token_endpoint):
+    manager = _google_auth.get_google_token_manager(CREDENTIALS)
+    manager.get_token()
+
+    manager._expires_at = time.monotonic() + manager.expiry_margin - 1
+
+    assert manager.get_token() == "token-2"
+
+
+def test_token_is_refreshed_ahead_in_background(mock_token_endpoint, monkeypatch):
+    background_refreshes = []
+
+    class MockThread:
+        def __init__(self, target, daemon=None):
+            self.target = target
+
+        def start(self):
+            background_refreshes.append(self.target)
+
+    monkeypatch.setattr(_google_auth.threading, "Thread", MockThread)
+    manager = _google_auth.get_google_token_manager(CREDENTIALS)
+    manager.get_token()
+
+    manager._expires_at = time.monotonic() + manager.refresh_ahead - 1
+
+    # Current token is still served while the refresh is in flight
+    assert manager.get_token() == "token-1"
+    assert manager.get_token() == "token-1"
+    assert len(background_refreshes) == 1
+
+    background_refreshes[0]()
+    assert manager.get_token() == "token-2"
+
+
+def test_request_retries_unauthorized_with_new_token(
+    mock_token_endpoint, mock_transport
+):
+    requested_headers = []
+
+    def mock_request(method, url, headers=None, **kwargs):
+        requested_headers.append(headers["Authorization"])
+        status_code = 401 if len(requested_headers) == 1 else 200
+        return MockResponse(status_code=status_code, content=b"a;b\n1;2")
+
+    mock_transport[
+        "https://docs.google.com/spreadsheets/d/some_id/gviz/tq?tqx=out:csv&"
+    ] = mock_request
+    gsheets = UtilsGSheetsClient(auth_config=None)
+    gsheets._auth = CREDENTIALS
+
+    res = gsheets.fetch_sheet_from_id("some_key", "some_id")
+
+    assert res.content == b"a;b\n1;2"
+    assert requested_headers == ["Bearer token-1", "Bearer token-2"]
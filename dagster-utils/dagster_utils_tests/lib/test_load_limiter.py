@@ -0,0 +1,153 @@
+import logging
+import tempfile
+import threading
+import time
+
+import psycopg2
+import pytest
+
+from dagster_utils.lib import UtilsLoadLimiter, advisory_lock_key
+
+
+def _limiter(tmp_path, **kwargs):
+    return UtilsLoadLimiter(lock_dir=str(tmp_path), poll_interval=0.01, **kwargs)
+
+
+def _acquire_in_thread(limiter, warehouse, table):
+    acquired = []
+    thread = threading.Thread(
+        target=lambda: acquired.append(limiter.acquire(warehouse, table))
+    )
+    thread.start()
+    return thread, acquired
+
+
+def test_load_limiter_caps_loads_per_warehouse(tmp_path):
+    limiter = _limiter(tmp_path, max_concurrent_loads=2)
+    first = limiter.acquire("wh", "db.s.a")
+    second = limiter.acquire("wh", "db.s.b")
+
+    thread, acquired = _acquire_in_thread(limiter, "wh", "db.s.c")
+    thread.join(0.2)
+    assert not acquired
+
+    # Other warehouses have their own slots
+    limiter.acquire("other_wh", "db.s.d").release()
+
+    first.release()
+    thread.join(5)
+    assert acquired and acquired[0].wait_seconds > 0
+    second.release()
+    acquired[0].release()
+
+
+def test_load_limiter_serializes_loads_of_a_table(tmp_path):
+    limiter = _limiter(tmp_path, max_concurrent_loads=4)
+
+    with limiter.slot("wh", "db.s.a") as slot:
+        assert slot.wait_seconds < 1
+        thread, acquired = _acquire_in_thread(limiter, "wh", "DB.S.A")
+        thread.join(0.2)
+        assert not acquired
+
+    thread.join(5)
+    assert acquired
+    acquired[0].release()
+
+
+def test_load_limiter_timeout(tmp_path):
+    limiter = _limiter(tmp_path, max_concurrent_loads=1, timeout=0.05)
+
+    with limiter.slot("wh", "db.s.a"):
+        start = time.monotonic()
+        with pytest.raises(TimeoutError, match="warehouse wh"):
+            limiter.acquire("wh", "db.s.b")
+        assert time.monotonic() - start < 1
+
+    # The table lock taken before timing out was given back
+    limiter.acquire("wh", "db.s.b").release()
+
+
+def test_load_limiter_try_acquire(tmp_path):
+    limiter = _limiter(tmp_path, max_concurrent_loads=1)
+
+    with limiter.slot("wh", "db.s.a"):
+        assert limiter.try_acquire("wh", "db.s.a") is None
+        assert limiter.try_acquire("wh", "db.s.b") is None
+
+    slot = limiter.try_acquire("wh", "db.s.b")
+    assert slot is not None and slot.wait_seconds == 0
+    slot.release()
+    # Nothing was left locked by the failed attempts
+    limiter.acquire("wh", "db.s.a").release()
+
+
+def test_load_limiter_postgres_shares_a_connection(monkeypatch):
+    connections = []
+    # Table lock of the first load, busy then free, and its slot, then the second load's
+    results = [False, True, True, True, True]
+
+    class FakeCursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def execute(self, statement, params):
+            self.statement = statement
+
+        def fetchone(self):
+            if "unlock" in self.statement:
+                return (True,)
+            return (results.pop(0),)
+
+    class FakeConnection:
+        closed = False
+
+        def cursor(self):
+            return FakeCursor()
+
+        def close(self):
+            self.closed = True
+
+    def connect(url):
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(psycopg2, "connect", connect)
+    limiter = UtilsLoadLimiter(
+        postgres_url="postgresql://db", max_concurrent_loads=2, poll_interval=0.01
+    )
+
+    first = limiter.acquire("wh", "db.s.a")
+    second = limiter.acquire("wh", "db.s.b")
+    assert len(connections) == 1 and not results
+    assert first.names[1] != second.names[1]
+    # The session could take its own locks again, they're busy for the process too
+    assert limiter.try_acquire("wh", "db.s.a") is None
+
+    first.release()
+    second.release()
+    results.extend([True, True])
+    limiter.acquire("wh", "db.s.c").release()
+    assert len(connections) == 1 and not connections[0].closed
+
+
+def test_load_limiter_warns_about_host_local_locks(monkeypatch, tmp_path, caplog):
+    monkeypatch.setattr(tempfile, "gettempdir", lambda: str(tmp_path))
+    with caplog.at_level(logging.WARNING):
+        UtilsLoadLimiter().acquire("wh", "db.s.a").release()
+    assert "only the loads of this host are limited" in caplog.text
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING):
+        _limiter(tmp_path).acquire("wh", "db.s.a").release()
+    assert "only the loads of this host are limited" not in caplog.text
+
+
+def test_advisory_lock_key():
+    key = advisory_lock_key("dagster_utils:table:DB.S.A")
+    assert key == advisory_lock_key("dagster_utils:table:DB.S.A")
+    assert -(2**63) <= key < 2**63
+    assert key != advisory_lock_key("dagster_utils:table:DB.S.B")
@@ -1,6 +1,7 @@
 import os
 from datetime import timezone
 
+import pytest
 from dagster import build_op_context, build_schedule_context, job
 
 from dagster_utils.lib.pcloud import *
@@ -8,6 +9,24 @@ from dagster_utils.lib.pcloud import *
 STUBS_DIR = os.path.join(os.path.dirname(__file__), "_stub", "pcloud")
 
 
+def _launch_runs(instance, schedule_name, run_requests):
+    """Stores the runs a schedule tick would have launched."""
+    from dagster._core.storage.pipeline_run import DagsterRun
+    from dagster._core.storage.tags import RUN_KEY_TAG, SCHEDULE_NAME_TAG
+
+    for run_request in run_requests:
+        instance.add_run(
+            DagsterRun(
+                job_name="my_job",
+                tags={
+                    SCHEDULE_NAME_TAG: schedule_name,
+                    RUN_KEY_TAG: run_request.run_key,
+                    **run_request.tags,
+                },
+            )
+        )
+
+
 def test_read_pcloud_files_by_id(mock_fetch_auth):
     with build_op_context(
         config={"file_ids": ["some_id"]},
@@ -93,3 +112,211 @@ def test_make_pcloud_schedule_with_dynamic_partitions():
                 partition_key="some_folder",
             )
         ]
+
+
+def test_fetch_pcloud_folder_names(mock_fetch_auth):
+    with build_op_context(
+        config={"pcloud_root_folder": "123456", "year": 2023},
+        resources={"pcloud": StubUtilspCloudClient(stubs_dir=STUBS_DIR)},
+    ) as context:
+        assert fetch_pcloud_folder_names(context) == ["some_folder"]
+
+    pcloud = StubUtilspCloudClient(stubs_dir=STUBS_DIR)
+    assert pcloud.list_year_folder_names("123456") == ["some_folder"]
+    assert pcloud.list_year_folder_names("123456", 2021) == []
+
+
+def test_make_pcloud_schedule_carries_over_run_requests():
+    from dagster import instance_for_test
+
+    @op
+    def my_op():
+        return 1
+
+    @job
+    def my_job():
+        my_op()
+
+    file_schedule_definition = make_pcloud_file_schedule(
+        job=my_job,
+        cron_schedule="* * * * *",
+        root_folder_id="223456",
+        run_config={"resources": {}},
+        subfolder_to_process="log_mock",
+        schedule_name="carry_over_schedule",
+        max_run_requests_per_tick=2,
+    )
+
+    run_keys = []
+    with instance_for_test() as instance:
+        for _ in range(3):
+            with build_schedule_context(
+                instance=instance,
+                resources={"pcloud": StubUtilspCloudClient(stubs_dir=STUBS_DIR)},
+            ) as context:
+                run_requests = file_schedule_definition(context)
+            run_keys.append([r.run_key for r in run_requests])
+            _launch_runs(instance, "carry_over_schedule", run_requests)
+
+    # Folders past the cap are requested on the next tick, and folders with runs aren't
+    # requested again
+    assert run_keys == [["folder_a", "folder_b"], ["folder_c"], []]
+
+
+def test_make_pcloud_schedule_carry_over_without_runs():
+    from dagster import instance_for_test
+
+    @op
+    def my_op():
+        return 1
+
+    @job
+    def my_job():
+        my_op()
+
+    file_schedule_definition = make_pcloud_file_schedule(
+        job=my_job,
+        cron_schedule="* * * * *",
+        root_folder_id="223456",
+        run_config={"resources": {}},
+        subfolder_to_process="log_mock",
+        schedule_name="carry_over_schedule",
+        max_run_requests_per_tick=2,
+    )
+
+    run_keys = []
+    with instance_for_test() as instance:
+        for _ in range(2):
+            with build_schedule_context(
+                instance=instance,
+                resources={"pcloud": StubUtilspCloudClient(stubs_dir=STUBS_DIR)},
+            ) as context:
+                run_keys.append([r.run_key for r in file_schedule_definition(context)])
+
+    # Evaluating a tick doesn't mark folders as requested until their runs exist
+    assert run_keys == [["folder_a", "folder_b"], ["folder_a", "folder_b"]]
+
+
+def test_make_pcloud_schedule_with_partition_ranges():
+    from dagster import DynamicPartitionsDefinition, instance_for_test
+    from dagster._core.storage.tags import (
+        ASSET_PARTITION_RANGE_END_TAG,
+        ASSET_PARTITION_RANGE_START_TAG,
+    )
+
+    my_partitions_def = DynamicPartitionsDefinition(name="mock_ranges")
+
+    @op
+    def my_op():
+        return 1
+
+    @job(partitions_def=my_partitions_def)
+    def my_job():
+        my_op()
+
+    file_schedule_definition = make_pcloud_file_schedule(
+        job=my_job,
+        cron_schedule="* * * * *",
+        root_folder_id="223456",
+        dynamic_partitions_def=my_partitions_def,
+        run_config={"resources": {}},
+        subfolder_to_process="log_mock",
+        max_partitions_per_run=2,
+    )
+
+    with instance_for_test() as instance:
+        with build_schedule_context(
+            instance=instance,
+            resources={"pcloud": StubUtilspCloudClient(stubs_dir=STUBS_DIR)},
+        ) as context:
+            assert file_schedule_definition(context) == [
+                RunRequest(
+                    run_key="folder_a...folder_b",
+                    run_config={"resources": {}},
+                    tags={
+                        ASSET_PARTITION_RANGE_START_TAG: "folder_a",
+                        ASSET_PARTITION_RANGE_END_TAG: "folder_b",
+                    },
+                ),
+                RunRequest(
+                    run_key="folder_c",
+                    run_config={"resources": {}},
+                    partition_key="folder_c",
+                ),
+            ]
+
+        assert instance.get_dynamic_partitions("mock_ranges") == [
+            "folder_a",
+            "folder_b",
+            "folder_c",
+        ]
+
+
+def test_make_pcloud_schedule_partition_ranges_are_requested_once():
+    from dagster import DynamicPartitionsDefinition, instance_for_test
+
+    my_partitions_def = DynamicPartitionsDefinition(name="mock_ranges_once")
+
+    @op
+    def my_op():
+        return 1
+
+    @job(partitions_def=my_partitions_def)
+    def my_job():
+        my_op()
+
+    file_schedule_definition = make_pcloud_file_schedule(
+        job=my_job,
+        cron_schedule="* * * * *",
+        root_folder_id="223456",
+        dynamic_partitions_def=my_partitions_def,
+        run_config={"resources": {}},
+        subfolder_to_process="log_mock",
+        schedule_name="ranges_once_schedule",
+        max_run_requests_per_tick=1,
+        max_partitions_per_run=2,
+    )
+
+    run_keys = []
+    with instance_for_test() as instance:
+        for _ in range(3):
+            with build_schedule_context(
+                instance=instance,
+                resources={"pcloud": StubUtilspCloudClient(stubs_dir=STUBS_DIR)},
+            ) as context:
+                run_requests = file_schedule_definition(context)
+            run_keys.append([r.run_key for r in run_requests])
+            _launch_runs(instance, "ranges_once_schedule", run_requests)
+
+    # The carried over folder isn't grouped again with a folder of the first range
+    assert run_keys == [["folder_a...folder_b"], ["folder_c"], []]
+
+
+def test_make_pcloud_schedule_partition_ranges_need_dynamic_partitions():
+    @op
+    def my_op():
+        return 1
+
+    @job
+    def my_job():
+        my_op()
+
+    with pytest.raises(Exception, match="Partition range runs"):
+        make_pcloud_file_schedule(
+            job=my_job,
+            cron_schedule="* * * * *",
+            root_folder_id="223456",
+            max_partitions_per_run=2,
+        )
+
+
+def test_close_session_drops_cached_state(mock_fetch_auth):
+    pcloud = UtilspCloudClient()
+
+    with pcloud:
+        first_now = pcloud.now
+        assert pcloud.headers
+
+    assert "_now" not in pcloud.__dict__
+    assert "_headers" not in pcloud.__dict__
+    assert pcloud.now >= first_now
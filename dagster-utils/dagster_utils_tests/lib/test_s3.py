@@ -0,0 +1,57 @@
+import io
+import os
+
+import pytest
+
+from dagster_utils.lib import s3
+from dagster_utils.lib.s3 import UtilsS3Resource, get_s3_client
+
+
+@pytest.fixture(autouse=True)
+def clear_clients():
+    s3.clear_s3_clients()
+    yield
+    s3.clear_s3_clients()
+
+
+def test_client_shared_per_settings():
+    assert UtilsS3Resource().client is UtilsS3Resource().client
+    assert UtilsS3Resource().client is get_s3_client()
+    assert (
+        UtilsS3Resource(max_pool_connections=10).client is not UtilsS3Resource().client
+    )
+
+
+def test_client_config():
+    config = UtilsS3Resource(max_pool_connections=64, max_attempts=3).client.meta.config
+
+    assert config.max_pool_connections == 64
+    assert config.retries["mode"] == "adaptive"
+    # botocore counts the initial attempt on top of the retries
+    assert config.retries["total_max_attempts"] == 4
+
+
+def test_transfer_config():
+    config = UtilsS3Resource(
+        multipart_threshold=8 * 1024**2,
+        multipart_chunksize=6 * 1024**2,
+        max_concurrency=4,
+    ).transfer_config
+
+    assert config.multipart_threshold == 8 * 1024**2
+    assert config.multipart_chunksize == 6 * 1024**2
+    assert config.max_concurrency == 4
+
+
+def test_upload_download_multipart(mock_s3_bucket, mock_s3_resource):
+    resource = UtilsS3Resource(
+        multipart_threshold=5 * 1024**2, multipart_chunksize=5 * 1024**2
+    )
+    data = os.urandom(12 * 1024**2)
+
+    resource.upload_fileobj(io.BytesIO(data), "test-bucket", "large")
+
+    assert resource.download_bytes("test-bucket", "large") == data
+    head = mock_s3_resource.head_object(Bucket="test-bucket", Key="large")
+    # Multipart uploads have an ETag suffixed with the number of parts
+    assert head["ETag"].strip('"').endswith("-3")
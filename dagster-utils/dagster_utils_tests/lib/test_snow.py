@@ -0,0 +1,296 @@
+import io
+from types import SimpleNamespace
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from dagster import build_output_context
+
+from dagster_utils.lib import StubSnowflakeClient, UtilsLoadLimiter, snow
+
+
+def _async_client(**kwargs):
+    client = StubSnowflakeClient(async_loads=True, **kwargs)
+    client.setup_for_execution(None)
+    return client
+
+
+def test_copy_into_landing_area_sync():
+    client = StubSnowflakeClient()
+    client.setup_for_execution(None)
+    context = build_output_context(asset_key=["src_landing", "my_table"])
+
+    metadata = list(client.copy_into_landing_area(context, "path/file.parquet"))
+
+    assert metadata == [
+        {"Query": snow.MetadataValue.text("SELECT * FROM src_landing.my_table")}
+    ]
+    assert not client.has_pending_loads
+
+
+def test_copy_into_landing_area_async():
+    client = _async_client()
+    context = build_output_context(asset_key=["src_landing", "my_table"])
+
+    metadata = list(client.copy_into_landing_area(context, "path/file.parquet"))
+    query_id = metadata[0]["Snowflake query id"].value
+
+    assert client.has_pending_loads
+    statement = client._conn.connection.async_queries[query_id]
+    assert statement.startswith("EXECUTE IMMEDIATE $$")
+    assert statement.index("DELETE FROM src_landing.my_table") < statement.index(
+        "COPY INTO src_landing.my_table"
+    )
+
+    loads = client.wait_for_loads()["Snowflake loads"].value
+    assert metadata[0]["Snowflake load"].value == "submitted"
+    assert loads == {
+        query_id: {
+            "table": "src_landing.my_table",
+            "status": "loaded",
+            "elapsed_s": None,
+        }
+    }
+    assert not client.has_pending_loads
+
+
+def test_wait_for_loads_backs_off(monkeypatch):
+    client = _async_client(poll_interval=0.5, max_poll_interval=1.0)
+    context = build_output_context(asset_key="my_table")
+    list(client.copy_into_landing_area(context, "file.parquet"))
+
+    statuses = iter([True, True, True, False])
+    monkeypatch.setattr(
+        StubSnowflakeClient, "_is_query_running", lambda self, _: next(statuses)
+    )
+    sleeps = []
+    monkeypatch.setattr(snow.time, "sleep", sleeps.append)
+
+    client.wait_for_loads()
+    assert sleeps == [0.5, 1.0, 1.0]
+
+
+def test_wait_for_loads_raises_on_failure(monkeypatch):
+    client = _async_client()
+    context = build_output_context(asset_key="my_table")
+    list(client.copy_into_landing_area(context, "file.parquet"))
+
+    def _raise(query_id):
+        raise RuntimeError(f"Query {query_id} failed")
+
+    monkeypatch.setattr(
+        client._conn.connection, "get_query_status_throw_if_error", _raise
+    )
+    with pytest.raises(RuntimeError):
+        client.wait_for_loads()
+
+
+def test_put_into_landing_area(monkeypatch):
+    client = StubSnowflakeClient()
+    client.setup_for_execution(None)
+    statements = []
+    monkeypatch.setattr(
+        client._conn, "execute", lambda statement: statements.append(statement)
+    )
+    context = build_output_context(asset_key=["src_landing", "my_table"])
+
+    metadata = list(
+        client.put_into_landing_area(context, io.BytesIO(b"data"), "my_table.parquet")
+    )
+
+    assert client._conn.connection.puts == {
+        "PUT file://my_table.parquet @src_landing.%my_table "
+        "AUTO_COMPRESS=FALSE OVERWRITE=TRUE": b"data"
+    }
+    assert metadata[0]["Snowflake stage path"].value == (
+        "@src_landing.%my_table/my_table.parquet"
+    )
+    assert statements[1] == (
+        "COPY INTO src_landing.my_table(DATA) FROM @src_landing.%my_table\n"
+        "FILES =('my_table.parquet')\n"
+        "FILE_FORMAT = (type = 'parquet');"
+    )
+
+
+@pytest.mark.parametrize(
+    "arrow_type,snowflake_type",
+    [
+        (pa.int64(), "NUMBER(38, 0)"),
+        (pa.float32(), "FLOAT"),
+        (pa.bool_(), "BOOLEAN"),
+        (pa.string(), "VARCHAR"),
+        (pa.null(), "VARCHAR"),
+        (pa.decimal128(10, 2), "NUMBER(10, 2)"),
+        (pa.timestamp("ns"), "TIMESTAMP_NTZ"),
+        (pa.timestamp("us", tz="UTC"), "TIMESTAMP_TZ"),
+        (pa.date32(), "DATE"),
+        (pa.list_(pa.int64()), "ARRAY"),
+        (pa.struct([("a", pa.int64())]), "OBJECT"),
+        (pa.dictionary(pa.int8(), pa.string()), "VARCHAR"),
+    ],
+)
+def test_arrow_to_snowflake_type(arrow_type, snowflake_type):
+    assert snow.arrow_to_snowflake_type(arrow_type) == snowflake_type
+
+
+def test_typed_columns_create_and_evolve_table(monkeypatch):
+    client = StubSnowflakeClient(typed_columns=True, stage="ETLHUB_LOADS")
+    client.setup_for_execution(None)
+    statements = []
+    monkeypatch.setattr(
+        client._conn, "execute", lambda statement: statements.append(statement)
+    )
+    monkeypatch.setattr(
+        StubSnowflakeClient, "_get_table_columns", lambda self, schema, table: {"ID"}
+    )
+    context = build_output_context(asset_key=["src_landing", "my_table"])
+
+    schema = pa.schema([("id", pa.int64()), ("name", pa.string())])
+    list(client.copy_into_landing_area(context, "file.parquet", arrow_schema=schema))
+
+    assert statements[0] == (
+        'CREATE TABLE IF NOT EXISTS src_landing.my_table ("ID" NUMBER(38, 0), "NAME" VARCHAR)'
+    )
+    assert statements[1] == 'ALTER TABLE src_landing.my_table ADD COLUMN "NAME" VARCHAR'
+    assert statements[3] == (
+        "COPY INTO src_landing.my_table FROM @src_landing.ETLHUB_LOADS\n"
+        "FILES =('file.parquet')\n"
+        "FILE_FORMAT = (type = 'parquet')\n"
+        "MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE;"
+    )
+
+    # Known columns are cached, only new ones are added
+    statements.clear()
+    schema = schema.append(pa.field("score", pa.float64()))
+    list(client.copy_into_landing_area(context, "file.parquet", arrow_schema=schema))
+    assert statements[0] == 'ALTER TABLE src_landing.my_table ADD COLUMN "SCORE" FLOAT'
+    assert statements[2].startswith("COPY INTO")
+
+
+def test_typed_columns_require_schema():
+    client = StubSnowflakeClient(typed_columns=True)
+    client.setup_for_execution(None)
+    context = build_output_context(asset_key="my_table")
+
+    with pytest.raises(ValueError):
+        list(client.copy_into_landing_area(context, "file.parquet"))
+
+
+def test_prepare_landing_frame():
+    df = pd.DataFrame({"foo": ["bar"]})
+    # build_output_context can't build asset partitioned contexts
+    context = SimpleNamespace(
+        has_asset_partitions=True, asset_partition_key="2023-01-01"
+    )
+
+    assert StubSnowflakeClient().prepare_landing_frame(context, df) is df
+
+    typed_df = StubSnowflakeClient(typed_columns=True).prepare_landing_frame(
+        context, df
+    )
+    assert list(typed_df.columns) == ["foo", "SOURCE_LOAD_AT", "PARTITION"]
+    assert typed_df["PARTITION"].tolist() == ["2023-01-01"]
+    assert list(df.columns) == ["foo"]
+
+
+def test_copy_into_landing_area_load_limiter(tmp_path):
+    limiter = UtilsLoadLimiter(
+        lock_dir=str(tmp_path), max_concurrent_loads=1, timeout=0.05
+    )
+    client = _async_client(load_limiter=limiter)
+    context = build_output_context(asset_key=["src_landing", "my_table"])
+
+    metadata = list(client.copy_into_landing_area(context, "file.parquet"))
+    assert "Load slot wait (s)" in metadata[0]
+
+    # The async load holds its slot until it is awaited
+    with pytest.raises(TimeoutError):
+        limiter.acquire("default", "other_table")
+    client.wait_for_loads()
+    limiter.acquire("default", "other_table").release()
+
+    sync_client = StubSnowflakeClient(load_limiter=limiter)
+    sync_client.setup_for_execution(None)
+    list(sync_client.copy_into_landing_area(context, "file.parquet"))
+    limiter.acquire("default", "other_table").release()
+
+
+def test_copy_into_landing_area_more_async_loads_than_slots(tmp_path):
+    limiter = UtilsLoadLimiter(
+        lock_dir=str(tmp_path), max_concurrent_loads=2, timeout=1
+    )
+    client = _async_client(load_limiter=limiter)
+
+    query_ids = []
+    for table in ["a", "b", "c", "a"]:
+        metadata = list(
+            client.copy_into_landing_area(build_output_context(asset_key=table), "f.pq")
+        )
+        query_ids.append(metadata[1]["Snowflake query id"].value)
+
+    # Loads awaited to free their slots are still reported
+    loads = client.wait_for_loads()["Snowflake loads"].value
+    assert sorted(loads) == sorted(query_ids)
+    assert not client.has_pending_loads
+    limiter.acquire("default", "other_table").release()
+
+
+def test_wait_for_loads_releases_slots_on_failure(monkeypatch, tmp_path):
+    limiter = UtilsLoadLimiter(
+        lock_dir=str(tmp_path), max_concurrent_loads=1, timeout=0.05
+    )
+    client = _async_client(load_limiter=limiter)
+    list(client.copy_into_landing_area(build_output_context(asset_key="t"), "f.pq"))
+
+    def _raise(query_id):
+        raise RuntimeError(f"Query {query_id} failed")
+
+    monkeypatch.setattr(
+        client._conn.connection, "get_query_status_throw_if_error", _raise
+    )
+    with pytest.raises(RuntimeError):
+        client.wait_for_loads()
+    limiter.acquire("default", "other_table").release()
+
+
+def test_wait_for_loads_polls_other_loads_after_failure(monkeypatch):
+    client = _async_client(poll_interval=0.01)
+    query_ids = [
+        list(client.copy_into_landing_area(build_output_context(asset_key=t), "f.pq"))[
+            0
+        ]["Snowflake query id"].value
+        for t in ["a", "b", "c"]
+    ]
+    polls = {qid: 0 for qid in query_ids}
+
+    def status(query_id):
+        polls[query_id] += 1
+        if query_id != query_ids[2]:
+            raise RuntimeError(f"Query {query_id} failed")
+        return "RUNNING" if polls[query_id] < 3 else "SUCCESS"
+
+    connection = client._conn.connection
+    monkeypatch.setattr(connection, "get_query_status_throw_if_error", status)
+    monkeypatch.setattr(connection, "is_still_running", lambda s: s == "RUNNING")
+    with pytest.raises(RuntimeError, match=f"Query {query_ids[0]} failed"):
+        client.wait_for_loads()
+
+    # The load still running was polled until it finished, and is reported next
+    assert polls[query_ids[2]] == 3
+    loads = client.wait_for_loads()["Snowflake loads"].value
+    assert list(loads) == [query_ids[2]]
+
+
+def test_copy_into_landing_area_pattern():
+    client = StubSnowflakeClient()
+    pattern = "^my_table([.]part-[0-9]+)?[.]parquet$"
+
+    statement = client._get_copy_into_statement(
+        pattern, "my_table", "src_landing", None, stage="@my_stage"
+    )
+
+    assert statement == (
+        "COPY INTO src_landing.my_table(DATA) FROM @my_stage\n"
+        f"PATTERN = '{pattern}'\n"
+        "FILE_FORMAT = (type = 'parquet');"
+    )
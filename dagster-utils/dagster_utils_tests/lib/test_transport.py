@@ -0,0 +1,98 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from dagster_utils.lib._transport import (
+    HttpTransport,
+    collect_http_metrics,
+    get_http_transport,
+)
+
+
+class Handler(BaseHTTPRequestHandler):
+    attempts = 0
+
+    def do_GET(self):
+        if self.path == "/flaky":
+            Handler.attempts += 1
+            if Handler.attempts == 1:
+                self.send_response(503)
+                self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        elif self.path == "/slow":
+            time.sleep(0.1)
+
+        body = b"hello"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_transport_is_shared():
+    assert get_http_transport() is get_http_transport()
+
+
+def test_transport_retries_retryable_status(server_url):
+    Handler.attempts = 0
+    transport = HttpTransport(backoff_factor=0)
+
+    r = transport.request("GET", f"{server_url}/flaky")
+
+    assert r.status_code == 200
+    assert Handler.attempts == 2
+
+
+def test_transport_limits_concurrency_per_host(server_url):
+    transport = HttpTransport(max_concurrency_per_host=1)
+
+    start = time.perf_counter()
+    threads = [
+        threading.Thread(target=transport.request, args=("GET", f"{server_url}/slow"))
+        for _ in range(3)
+    ]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+
+    assert time.perf_counter() - start >= 0.3
+
+
+def test_collect_http_metrics(server_url):
+    transport = HttpTransport()
+
+    transport.request("GET", f"{server_url}/hello")
+    with collect_http_metrics() as metrics:
+        transport.request("GET", f"{server_url}/hello")
+        transport.request("GET", f"{server_url}/hello")
+
+    metadata = metrics.to_metadata()
+    assert metadata["HTTP requests"].value == 2
+    assert metadata["HTTP bytes received"].value == 10
+    assert list(metadata["HTTP requests by host"].data) == [server_url[7:]]
+
+
+def test_collect_http_metrics_leaves_streamed_body_unread(server_url):
+    transport = HttpTransport()
+
+    with collect_http_metrics() as metrics:
+        r = transport.request("GET", f"{server_url}/hello", stream=True)
+
+    assert metrics.to_metadata()["HTTP bytes received"].value == 5
+    assert not r._content_consumed
+    assert r.raw.read() == b"hello"
@@ -1,3 +1,6 @@
+import pandas as pd
+import pyarrow as pa
+import pytest
 from dagster import List, check_dagster_type
 
 from dagster_utils.lib import *
@@ -52,3 +55,42 @@ def test_UtilsSinkInputType():
             UtilsSinkInputType(dest_asset="my_other_cool_asset", data=df),
         ],
     ).success
+
+
+class _PolarsLikeFrame:
+    """Stands in for a Polars DataFrame, recognized by its module and `to_arrow`."""
+
+    __module__ = "polars.dataframe.frame"
+
+    def __init__(self, table: pa.Table):
+        self._table = table
+        self.height = table.num_rows
+
+    def to_arrow(self) -> pa.Table:
+        return self._table
+
+    def estimated_size(self) -> int:
+        return self._table.nbytes
+
+
+def test_UtilsSinkInputType_frames():
+    table = pa.table({"foo": ["bar", "baz"]})
+
+    for data in [table, table.to_pandas(), _PolarsLikeFrame(table)]:
+        sink = UtilsSinkInputType(dest_asset="my_cool_asset", data=data)
+        assert is_sink_frame(sink.data)
+        assert to_arrow_table(sink.data).equals(table)
+        assert frame_num_rows(sink.data) == 2
+        assert frame_nbytes(sink.data) > 0
+
+    with pytest.raises(ValueError, match="data must be"):
+        UtilsSinkInputType(dest_asset="my_cool_asset", data=[{"foo": "bar"}])
+
+
+def test_from_arrow_table():
+    table = pa.table({"foo": ["bar", "baz"]})
+
+    assert from_arrow_table(table, "arrow") is table
+    assert from_arrow_table(table).equals(pd.DataFrame({"foo": ["bar", "baz"]}))
+    with pytest.raises(ValueError, match="Frame type"):
+        from_arrow_table(table, "spark")
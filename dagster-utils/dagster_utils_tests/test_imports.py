@@ -0,0 +1,73 @@
+import subprocess
+import sys
+
+import pytest
+
+# Dependencies only some clients need, which shouldn't be paid for by importing the packages
+HEAVY_MODULES = {
+    "boto3",
+    "dagster_aws",
+    "dagster_slack",
+    "pandas",
+    "pyarrow",
+    "snowflake",
+    "sqlalchemy",
+}
+# Generous, as the measured time is a few milliseconds, but catches eager imports creeping back
+IMPORT_BUDGET_MICROSECONDS = 100_000
+
+
+def _import_times(statement: str) -> dict:
+    """Cumulative import time in microseconds of each module imported by the statement."""
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize(
+    "package", ["dagster_utils.lib", "dagster_utils.dagsterhub", "dagster_utils.utils"]
+)
+def test_package_import_is_lazy(package):
+    imported = {
+        name.split(".")[0]
+        for name in _import_times(f"import dagster; import {package}")
+    }
+
+    assert not imported & HEAVY_MODULES
+
+
+def test_package_import_time_budget():
+    # dagster is imported first, so its own import time isn't attributed to our packages
+    times = _import_times(
+        "import dagster; "
+        "import dagster_utils.lib, dagster_utils.dagsterhub, dagster_utils.utils"
+    )
+
+    total = sum(
+        time
+        for name, time in times.items()
+        if name
+        in ("dagster_utils.lib", "dagster_utils.dagsterhub", "dagster_utils.utils")
+    )
+    assert total < IMPORT_BUDGET_MICROSECONDS
+
+
+def test_lazy_attributes():
+    import dagster_utils.dagsterhub as dagsterhub
+    import dagster_utils.lib as lib
+
+    assert lib.UtilsS3Resource.__module__ == "dagster_utils.lib.s3"
+    assert "UtilsSnowflakeClient" in dir(lib)
+    assert dagsterhub.slack_on_run_failure is dagsterhub.slack_on_run_failure
+    with pytest.raises(AttributeError):
+        lib.not_a_client
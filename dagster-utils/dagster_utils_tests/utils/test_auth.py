@@ -8,6 +8,13 @@ from dagster_utils.utils import auth
 THIS_DIR = os.path.dirname(__file__)
 
 
+@pytest.fixture(autouse=True)
+def clear_auth_cache():
+    auth.clear_authentication_cache()
+    yield
+    auth.clear_authentication_cache()
+
+
 @contextmanager
 def not_raises(exception):
     """Helper function to explicitly test functions don't raise errors
@@ -52,3 +59,89 @@ def test_fetch_parameter_store_auth_returns_value(monkeypatch):
     )
 
     assert fetched_auth == {"foo": "bar"}
+
+
+@pytest.fixture
+def mock_ssm(monkeypatch):
+    import boto3
+
+    calls = {"clients": 0, "get_parameter": 0, "get_parameters": []}
+
+    class MockSSMClient:
+        def __init__(self, *args, **kwargs):
+            calls["clients"] += 1
+
+        def get_parameter(self, *args, **kwargs):
+            calls["get_parameter"] += 1
+            return {"Parameter": {"Value": '{"foo": "bar"}'}}
+
+        def get_parameters(self, *args, **kwargs):
+            calls["get_parameters"].append(kwargs["Names"])
+            return {
+                "Parameters": [
+                    {"Name": name, "Value": f'{{"name": "{name}"}}'}
+                    for name in kwargs["Names"]
+                ],
+                "InvalidParameters": [],
+            }
+
+    monkeypatch.setattr(boto3, "client", MockSSMClient)
+    yield calls
+
+
+def test_fetch_parameter_store_auth_is_cached(mock_ssm):
+    auth_config = {"type": "parameterStore", "name": "/foo/bar/baz"}
+
+    assert auth.fetch_authentication(auth_config) == {"foo": "bar"}
+    assert auth.fetch_authentication(auth_config) == {"foo": "bar"}
+    assert auth.fetch_authentication({**auth_config, "name": "/other"}) == {
+        "foo": "bar"
+    }
+
+    assert mock_ssm["get_parameter"] == 2
+    assert mock_ssm["clients"] == 1
+
+
+def test_prefetch_authentication_batches_parameters(mock_ssm):
+    auths = [{"type": "parameterStore", "name": f"/param/{i:02}"} for i in range(12)]
+
+    auth.prefetch_authentication(auths + auths[:1])
+
+    assert [len(names) for names in mock_ssm["get_parameters"]] == [10, 2]
+    assert auth.fetch_authentication(auths[11]) == {"name": "/param/11"}
+    assert mock_ssm["get_parameter"] == 0
+
+
+def test_prefetch_definitions_authentication(mock_ssm):
+    from dagster import Definitions
+
+    from dagster_utils.lib import UtilsGMailClient, UtilspCloudClient
+
+    defs = Definitions(
+        resources={"gmail": UtilsGMailClient(), "pcloud": UtilspCloudClient()}
+    )
+
+    auth.prefetch_definitions_authentication(defs)
+
+    assert mock_ssm["get_parameters"] == [
+        ["/access/gmail/dataextract", "/access/pcloud/root_folder_api_key"]
+    ]
+
+
+def test_resources_prefetch_registered_authentication(mock_ssm):
+    from dagster_utils.lib import (
+        UtilsGMailClient,
+        UtilsGSheetsClient,
+        UtilspCloudClient,
+    )
+
+    resources = [UtilsGMailClient(), UtilsGSheetsClient(), UtilspCloudClient()]
+
+    for resource in resources:
+        assert resource.auth == {"name": resource.auth_config["name"]}
+
+    # Gmail and GSheets share their secret
+    assert mock_ssm["get_parameters"] == [
+        ["/access/gmail/dataextract", "/access/pcloud/root_folder_api_key"]
+    ]
+    assert mock_ssm["get_parameter"] == 0
@@ -0,0 +1,80 @@
+import os
+
+import pytest
+import yaml
+
+from dagster_utils.utils import config_loader
+
+
+@pytest.fixture
+def configs_folder(tmp_path):
+    (tmp_path / "foo.yaml").write_text("ops:\n  some_op:\n    config:\n      bar: 1\n")
+    (tmp_path / "baz.yaml").write_text("qux: [1, 2]\n")
+    (tmp_path / "dates.yaml").write_text("start: 2022-01-01\n")
+    (tmp_path / "README.md").write_text("not a config")
+    config_loader.clear_yaml_cache()
+    yield str(tmp_path)
+
+
+def test_config_folder_is_lazy(configs_folder, mocker):
+    load = mocker.spy(config_loader, "load_yaml_file")
+
+    confs = config_loader.ConfigFolder(configs_folder)
+
+    assert sorted(confs) == ["baz", "dates", "foo"]
+    load.assert_not_called()
+    assert confs["baz"] == {"qux": [1, 2]}
+    assert load.call_count == 1
+
+
+def test_load_yaml_file_is_cached_until_modified(configs_folder, mocker):
+    path = os.path.join(configs_folder, "baz.yaml")
+    parse = mocker.spy(yaml, "load")
+
+    assert config_loader.load_yaml_file(path) == {"qux": [1, 2]}
+    assert config_loader.load_yaml_file(path) == {"qux": [1, 2]}
+    assert parse.call_count == 1
+
+    with open(path, "w") as f:
+        f.write("qux: [1, 2, 3]\n")
+    assert config_loader.load_yaml_file(path) == {"qux": [1, 2, 3]}
+    assert parse.call_count == 2
+
+
+def test_config_snapshot(configs_folder, tmp_path_factory, mocker):
+    snapshot_path = str(tmp_path_factory.mktemp("snapshot") / "confs.json")
+    config_loader.compile_config_snapshot(configs_folder, snapshot_path)
+    config_loader.clear_yaml_cache()
+    parse = mocker.spy(yaml, "load")
+
+    confs = config_loader.ConfigFolder(configs_folder, snapshot_path=snapshot_path)
+
+    assert confs["foo"] == {"ops": {"some_op": {"config": {"bar": 1}}}}
+    parse.assert_not_called()
+    # Dates don't round trip through JSON, so they are parsed from the YAML
+    assert str(confs["dates"]["start"]) == "2022-01-01"
+    assert parse.call_count == 1
+
+
+def test_config_folder_returns_copies(configs_folder, tmp_path_factory):
+    snapshot_path = str(tmp_path_factory.mktemp("snapshot") / "confs.json")
+    config_loader.compile_config_snapshot(configs_folder, snapshot_path)
+
+    for confs in [
+        config_loader.ConfigFolder(configs_folder),
+        config_loader.ConfigFolder(configs_folder, snapshot_path=snapshot_path),
+    ]:
+        confs["baz"]["qux"].append(3)
+        assert confs["baz"] == {"qux": [1, 2]}
+
+    path = os.path.join(configs_folder, "baz.yaml")
+    assert config_loader.load_yaml_file(path) == {"qux": [1, 2]}
+
+
+def test_config_loader_exports():
+    import dagster_utils.utils
+
+    for name in config_loader.__all__:
+        assert getattr(dagster_utils.utils, name) is getattr(config_loader, name)
+    for name in ["yaml", "YAMLSafeLoader", "copy"]:
+        assert not hasattr(dagster_utils.utils, name)
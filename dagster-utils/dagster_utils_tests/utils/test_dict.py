@@ -59,3 +59,38 @@ def test_merge_nested_dicts():
     other_dct = {"foo": {"qux": "quux"}}
 
     assert dicts.merge_dicts(dct, other_dct) == {"foo": {"bar": "baz", "qux": "quux"}}
+
+
+def test_compile_path_matches_safeget():
+    dcts = [{"foo": {"bar": {"baz": "qux"}}}, {"foo": {"bar": {}}}, {}]
+
+    for keys in [("foo", "bar", "baz"), ("foo", "bar"), ("foo",), ()]:
+        getter = dicts.compile_path(*keys)
+        for dct in dcts:
+            assert getter(dct) == dicts.safeget(dct, *keys)
+
+    assert dicts.compile_path("foo", 0, "bar")({"foo": [{"bar": "baz"}]}) == "baz"
+    assert dicts.compile_path("foo", "bar") is dicts.compile_path("foo", "bar")
+
+    keys = ("a", "b", "c", "d")
+    getter = dicts.compile_path(*keys)
+    for dct in [{"a": {"b": {"c": {"d": 1}}}}, {"a": {"b": {"c": {}}}}]:
+        assert getter(dct) == dicts.safeget(dct, *keys)
+
+    assert dicts.compile_path.cache_info().maxsize == dicts.COMPILED_PATHS_CACHE_SIZE
+
+
+def test_compile_paths_matches_build_dict_from_nested_properties():
+    info_location = {"quux": ["foo", "bar", "baz"], "corge": ["grault"]}
+    build = dicts.compile_paths(info_location)
+
+    for dct in [{"foo": {"bar": {"baz": "qux"}}, "grault": 1}, {"foo": {}}]:
+        assert build(dct) == dicts.build_dict_from_nested_properties(dct, info_location)
+
+
+def test_extract_columns():
+    records = ({"foo": {"bar": i}} if i % 2 else {"foo": {}} for i in range(4))
+
+    assert dicts.extract_columns(records, {"bar": ["foo", "bar"]}) == {
+        "bar": [None, 1, None, 3]
+    }
@@ -11,3 +11,20 @@ def test_logical_xor():
     assert logical_xor("hello", [0]) is False
     assert logical_xor(1, 0) is True
     assert logical_xor(1, 1) is False
+
+
+def test_load_confs(tmp_path):
+    (tmp_path / "foo.yaml").write_text("bar: baz\n")
+    (tmp_path / "qux.txt").write_text("not a config")
+
+    assert load_confs(str(tmp_path)) == {"foo": {"bar": "baz"}}
+
+
+def test_load_confs_returns_copies(tmp_path):
+    (tmp_path / "foo.yaml").write_text("bar: baz\n")
+
+    confs = load_confs(str(tmp_path))
+    confs["foo"]["bar"] = "qux"
+    confs["quux"] = {}
+
+    assert load_confs(str(tmp_path)) == {"foo": {"bar": "baz"}}
@@ -0,0 +1,126 @@
+import socket
+
+import pytest
+
+from dagster_utils.utils import tracing
+from dagster_utils.utils.tracing import (
+    StepTracer,
+    record_span,
+    span,
+    trace_generator,
+    trace_step,
+)
+
+
+def test_trace_step_aggregates_spans():
+    with trace_step() as tracer:
+        with span("Upload", 1024):
+            pass
+        with span("Upload") as s:
+            s.bytes = 1024
+        record_span("COPY", 0.5)
+
+    assert tracer.phases["Upload"]["count"] == 2
+    assert tracer.phases["Upload"]["bytes"] == 2048
+    assert tracer.phases["COPY"] == {"count": 1, "seconds": 0.5, "bytes": None}
+
+    metadata = tracer.to_metadata()
+    assert metadata["COPY time (s)"].value == 0.5
+    assert "COPY bytes" not in metadata
+    assert metadata["Upload count"].value == 2
+    assert metadata["Upload bytes"].value == 2048
+    assert "Upload throughput (MB/s)" in metadata
+    assert metadata["Peak RSS (MB)"].value > 0
+
+
+def test_span_recorded_on_error():
+    with trace_step() as tracer:
+        with pytest.raises(ValueError):
+            with span("Failing"):
+                raise ValueError()
+
+    assert tracer.phases["Failing"]["count"] == 1
+
+
+def test_span_outside_trace_step():
+    with trace_step() as tracer:
+        pass
+    with span("Untraced"):
+        pass
+
+    assert tracer.phases == {}
+
+
+def test_nested_trace_steps():
+    with trace_step() as outer:
+        with trace_step() as inner:
+            record_span("Inner", 1.0)
+        record_span("Outer", 1.0)
+
+    assert set(outer.phases) == {"Inner", "Outer"}
+    assert set(inner.phases) == {"Inner"}
+
+
+def test_statsd_export(monkeypatch):
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(5)
+    monkeypatch.setattr(
+        tracing, "STATSD_ADDRESS", f"127.0.0.1:{receiver.getsockname()[1]}"
+    )
+
+    record_span("S3 upload", 0.25, 100)
+
+    assert receiver.recv(1024).decode("utf-8").split("\n") == [
+        "dagster_utils.s3_upload.time:250.000|ms",
+        "dagster_utils.s3_upload.bytes:100|c",
+    ]
+    receiver.close()
+
+
+def test_trace_generator_only_traces_while_running():
+    def gen():
+        with span("Inside"):
+            pass
+        yield 1
+        record_span("Inside", 1.0)
+        yield 2
+        return 3
+
+    def consume():
+        result = yield from trace_generator(gen(), tracer)
+        assert result == 3
+
+    tracer = StepTracer()
+    for _ in consume():
+        # Recorded by the caller while the generator is suspended
+        record_span("Outside", 1.0)
+
+    assert set(tracer.phases) == {"Inside"}
+    assert tracer.phases["Inside"]["count"] == 2
+
+
+def test_trace_generator_closes_generator():
+    closed = []
+
+    def gen():
+        try:
+            yield 1
+            yield 2
+        finally:
+            closed.append(True)
+
+    traced = trace_generator(gen(), StepTracer())
+    next(traced)
+    traced.close()
+    assert closed == [True]
+
+
+def test_span_on_explicit_tracers():
+    tracer = StepTracer()
+    with trace_step() as active:
+        with span("Explicit", 10, tracers=(tracer,)):
+            pass
+
+    assert tracer.phases["Explicit"]["bytes"] == 10
+    assert active.phases == {}